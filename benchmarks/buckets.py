@@ -0,0 +1,56 @@
+# Filename: benchmarks/buckets.py
+# Compares ways of turning dates into destination folder names, for each
+# folder name format the front ends offer:
+#   - strftime per file (what planning used to do)
+#   - FolderNamer, which formats each distinct month or day once
+# and checks that both give the same names. Dates are synthetic.
+#
+#   python benchmarks/buckets.py [--files 1000000] [--years 15]
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from photo_sorter_core import FolderNamer
+
+# Same templates as the front ends' FOLDER_NAME_FORMATS
+FOLDER_NAME_FORMATS = {"YYYY-MM": "%Y-%m", "Month-YYYY": "%B-%Y", "YYYY-MM-DD": "%Y-%m-%d"}
+
+def synthetic_dates(count, years, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2010, 1, 1)
+    return [start + timedelta(seconds=rng.randrange(years * 365 * 86400)) for _ in range(count)]
+
+def timed(run):
+    started = time.perf_counter()
+    result = run()
+    return time.perf_counter() - started, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-file strftime with bucketed folder naming.")
+    parser.add_argument('--files', type=int, default=1_000_000)
+    parser.add_argument('--years', type=int, default=15)
+    args = parser.parse_args()
+
+    dates = synthetic_dates(args.files, args.years)
+    print(f"{args.files} dates over {args.years} years")
+
+    ok = True
+    for label, fmt in FOLDER_NAME_FORMATS.items():
+        per_file_time, expected = timed(lambda: [d.strftime(fmt) for d in dates])
+        namer = FolderNamer(fmt)
+        namer_time, named = timed(lambda: [namer(d) for d in dates])
+        same = named == expected
+        ok = ok and same
+        print(f"{label} ({fmt}): strftime per file {per_file_time:.2f}s, "
+              f"FolderNamer {namer_time:.2f}s ({per_file_time / namer_time:.1f}x), "
+              f"{len(set(named))} distinct names, {'identical' if same else 'MISMATCH'}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# Filename: benchmarks/corpus.py
+# Generates a synthetic photo library for the benchmarks: JPEGs with EXIF
+# dates, MP4s with mvhd creation times, PNGs with no date metadata, and
+# exact duplicates, spread over nested folders. Everything is built from
+# scratch with the standard library, so it runs offline anywhere.
+#
+#   python benchmarks/corpus.py OUTPUT_DIR [--files 2000] [--depth 3]
+import argparse
+import json
+import os
+import random
+import struct
+import zlib
+from datetime import datetime, timedelta
+
+MAC_EPOCH = datetime(1904, 1, 1)
+
+# Share of each kind of file; whatever is left over becomes duplicates
+DEFAULT_MIX = {'jpeg': 0.75, 'mp4': 0.1, 'png': 0.1}
+
+def tiff_with_date(date):
+    """Little-endian TIFF with IFD0 -> Exif IFD -> DateTimeOriginal."""
+    raw = date.strftime("%Y:%m:%d %H:%M:%S").encode() + b'\x00'
+    ifd0 = struct.pack('<H', 1) + struct.pack('<HHII', 34665, 4, 1, 26) + struct.pack('<I', 0)
+    exif_ifd = struct.pack('<H', 1) + struct.pack('<HHII', 36867, 2, len(raw), 44) + struct.pack('<I', 0)
+    return b'II*\x00' + struct.pack('<I', 8) + ifd0 + exif_ifd + raw
+
+def jpeg_bytes(date, size, rng=None):
+    # An ICC-sized APP2 ahead of the Exif segment makes the reader hop past
+    # it, as with real camera files; the rest is filler "scan data".
+    app1 = b'Exif\x00\x00' + tiff_with_date(date)
+    app2 = b'ICC_PROFILE\x00' + bytes(3000)
+    head = (b'\xff\xd8' + b'\xff\xe2' + struct.pack('>H', len(app2) + 2) + app2
+            + b'\xff\xe1' + struct.pack('>H', len(app1) + 2) + app1 + b'\xff\xda\x00\x02')
+    return head + _filler(max(0, size - len(head) - 2), rng) + b'\xff\xd9'
+
+def box(box_type, payload):
+    return struct.pack('>I4s', len(payload) + 8, box_type) + payload
+
+def mp4_bytes(date, size, rng=None):
+    # moov after the media data, as phones write it
+    created = int((date - MAC_EPOCH).total_seconds())
+    mvhd = box(b'mvhd', b'\x00\x00\x00\x00' + struct.pack('>IIII', created, created, 1000, 1000) + bytes(80))
+    ftyp = box(b'ftyp', b'isom\x00\x00\x02\x00isomiso2mp41')
+    moov = box(b'moov', mvhd)
+    return ftyp + box(b'mdat', _filler(max(0, size - len(ftyp) - len(moov) - 8), rng)) + moov
+
+def png_bytes(size, rng=None):
+    # Signature and a bare IHDR chunk: no date metadata at all
+    ihdr = struct.pack('>IIBBBBB', 1, 1, 8, 2, 0, 0, 0)
+    chunk = struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+    head = b'\x89PNG\r\n\x1a\n' + chunk
+    return head + _filler(max(0, size - len(head)), rng)
+
+def _filler(size, rng):
+    # Random bytes keep files distinct, so only the planted duplicates match
+    if rng is None:
+        return bytes(size)
+    return rng.randbytes(size)
+
+def generate_corpus(root, files=2000, depth=3, fanout=4, mix=None, jpeg_size=48 * 1024,
+                    mp4_size=512 * 1024, png_size=16 * 1024, seed=1):
+    """Write the corpus under root and return a summary dict."""
+    rng = random.Random(seed)
+    mix = mix or DEFAULT_MIX
+    folders = _make_folders(root, depth, fanout)
+    start = datetime(2010, 1, 1)
+
+    counts = {'jpeg': 0, 'mp4': 0, 'png': 0, 'duplicate': 0}
+    total_bytes = 0
+    written = []
+    for i in range(files):
+        folder = folders[rng.randrange(len(folders))]
+        date = start + timedelta(seconds=rng.randrange(15 * 365 * 86400))
+        pick = rng.random()
+        if pick < mix['jpeg']:
+            kind, name, data = 'jpeg', f'IMG_{i:06}.jpg', jpeg_bytes(date, jpeg_size, rng)
+        elif pick < mix['jpeg'] + mix['mp4']:
+            kind, name, data = 'mp4', f'VID_{i:06}.mp4', mp4_bytes(date, mp4_size, rng)
+        elif pick < mix['jpeg'] + mix['mp4'] + mix['png'] or not written:
+            kind, name, data = 'png', f'SCR_{i:06}.png', png_bytes(png_size, rng)
+        else:
+            kind = 'duplicate'
+            original = written[rng.randrange(len(written))]
+            name = f'COPY_{i:06}{os.path.splitext(original)[1]}'
+            with open(original, 'rb') as fh:
+                data = fh.read()
+        path = os.path.join(folder, name)
+        with open(path, 'wb') as fh:
+            fh.write(data)
+        if kind != 'duplicate':
+            written.append(path)
+        counts[kind] += 1
+        total_bytes += len(data)
+
+    return {'root': os.path.abspath(root), 'files': files, 'folders': len(folders), 'bytes': total_bytes,
+            'counts': counts, 'seed': seed}
+
+def _make_folders(root, depth, fanout):
+    folders = [root]
+    level = [root]
+    for d in range(depth):
+        level = [os.path.join(parent, f'd{d}_{i}') for parent in level for i in range(fanout)]
+        folders.extend(level)
+    for folder in folders:
+        os.makedirs(folder, exist_ok=True)
+    return folders
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic photo library.")
+    parser.add_argument('output')
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fanout', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+    summary = generate_corpus(args.output, args.files, args.depth, args.fanout, seed=args.seed)
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# Filename: benchmarks/harness.py
+# Runs the sorting engine phase by phase over a generated corpus and prints
+# one JSON document with files/s, MB/s, read/write syscalls, CPU time and
+# peak RSS for each phase, so results can be compared between versions.
+# Fully offline; use --dir /dev/shm to keep disk noise out of it.
+#
+#   python benchmarks/harness.py [--files 5000] [--workers 8] [--dir /dev/shm] [--output result.json]
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from corpus import generate_corpus
+from photo_sorter import image_video_extensions
+from photo_sorter_core import (
+    DirectoryCache, FileMover, LibraryIndex, MoveJournal, STATUS_COMPLETE, build_plan, execute_plan,
+    find_duplicates, read_proc_io, scan_media_files,
+)
+
+FOLDER_FORMAT = "%Y-%m"
+
+class PhaseMeter:
+    """Measures one phase: wall and CPU time, I/O syscalls and peak RSS."""
+
+    def __init__(self, name):
+        self.name = name
+        self.result = {}
+
+    def __enter__(self):
+        _reset_peak_rss()
+        self._io = read_proc_io()
+        self._usage = resource.getrusage(resource.RUSAGE_SELF)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self._started
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        io_after = read_proc_io()
+        self.result = {
+            'seconds': round(seconds, 4),
+            'cpu_seconds': round(usage.ru_utime - self._usage.ru_utime + usage.ru_stime - self._usage.ru_stime, 4),
+            'peak_rss_kb': _peak_rss_kb(),
+        }
+        if self._io and io_after:
+            self.result['syscalls'] = {
+                'read': io_after['syscr'] - self._io['syscr'],
+                'write': io_after['syscw'] - self._io['syscw'],
+            }
+            self.result['io_bytes'] = {
+                'read': io_after['rchar'] - self._io['rchar'],
+                'written': io_after['wchar'] - self._io['wchar'],
+            }
+
+    def count(self, files, nbytes):
+        seconds = self.result['seconds'] or 1e-9
+        self.result.update({
+            'files': files,
+            'bytes': nbytes,
+            'files_per_second': round(files / seconds, 1),
+            'mb_per_second': round(nbytes / seconds / (1024 * 1024), 2),
+        })
+        return self.result
+
+def _reset_peak_rss():
+    # Writing 5 to clear_refs resets VmHWM, so each phase reports its own peak
+    try:
+        with open('/proc/self/clear_refs', 'w') as fh:
+            fh.write('5')
+    except OSError:
+        pass
+
+def _peak_rss_kb():
+    try:
+        with open('/proc/self/status') as fh:
+            for line in fh:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # Elsewhere only the peak since process start is available (bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def run_phases(source, destination, workers):
+    phases = {}
+
+    with PhaseMeter('scan') as meter:
+        files = scan_media_files(source, image_video_extensions, recursive=True)
+    total_bytes = sum(f.stat.st_size for f in files)
+    phases['scan'] = meter.count(len(files), total_bytes)
+
+    with PhaseMeter('dedup') as meter:
+        duplicates = find_duplicates(files)
+    phases['dedup'] = meter.count(len(files), total_bytes)
+    phases['dedup']['duplicates'] = len(duplicates)
+
+    # No metadata cache, so every date is really read
+    with PhaseMeter('plan') as meter:
+        plan = list(build_plan(files, destination, FOLDER_FORMAT, workers=workers))
+    phases['plan'] = meter.count(len(plan), total_bytes)
+    phases['plan']['date_sources'] = _count(entry.date_source for entry in plan)
+
+    with PhaseMeter('move') as meter:
+        mover = FileMover(destination, target_folders=DirectoryCache())
+        journal = MoveJournal.create(destination, FOLDER_FORMAT)
+        errors = sum(1 for _, _, error in execute_plan(plan, mover, journal=journal) if error)
+        journal.close(STATUS_COMPLETE)
+    phases['move'] = meter.count(len(plan), total_bytes)
+    phases['move']['errors'] = errors
+    phases['move']['methods'] = {key: value for key, value in mover.stats.items() if key != 'copied_bytes'}
+
+    # Indexing the freshly sorted library from scratch, as on first use
+    with PhaseMeter('index') as meter:
+        with LibraryIndex(destination) as library:
+            added, _ = library.refresh(image_video_extensions)
+    phases['index'] = meter.count(added, total_bytes)
+    return phases
+
+def _count(values):
+    counts = {}
+    for value in values:
+        counts[value] = counts.get(value, 0) + 1
+    return counts
+
+def _git_revision():
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+        return result.stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sorting engine phase by phase.")
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--workers', type=int, default=None, help="metadata workers (default: from CPU count)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--dir', help="where to build the corpus (default: a temporary folder)")
+    parser.add_argument('--output', help="write the JSON here as well as to stdout")
+    parser.add_argument('--keep', action='store_true', help="keep the corpus and sorted output")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='photo_sorter_bench_', dir=args.dir)
+    try:
+        source = os.path.join(work, 'source')
+        destination = os.path.join(work, 'sorted')
+        os.makedirs(destination)
+        started = time.perf_counter()
+        corpus = generate_corpus(source, files=args.files, depth=args.depth, seed=args.seed)
+        corpus['generate_seconds'] = round(time.perf_counter() - started, 2)
+
+        result = {
+            'benchmark': 'photo-sorter-phases',
+            'revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'workers': args.workers,
+            'corpus': corpus,
+            'phases': run_phases(source, destination, args.workers),
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            fh.write(text + '\n')
+
+if __name__ == "__main__":
+    main()
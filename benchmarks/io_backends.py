@@ -0,0 +1,89 @@
+# Filename: benchmarks/io_backends.py
+# Compares the metadata I/O backends (mmap, bounded buffered reads, plain
+# file) on a generated set of JPEG and MP4 files: time per file, and read
+# requests per file, which is what each costs a round trip on a network
+# share. Point --dir at a share to time that case directly.
+#
+#   python benchmarks/io_backends.py [--files 2000] [--dir PATH] [--repeat 3]
+import argparse
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from photo_sorter_core import IO_BUFFERED, IO_FILE, IO_MMAP, extract_date
+from photo_sorter_core import io_backend
+from corpus import jpeg_bytes, mp4_bytes
+
+class CountingFileIO(io.FileIO):
+    reads = 0
+
+    def read(self, size=-1):
+        CountingFileIO.reads += 1
+        return super().read(size)
+
+    def readinto(self, buffer):
+        CountingFileIO.reads += 1
+        return super().readinto(buffer)
+
+def counting_open(path, mode='rb', buffering=-1):
+    raw = CountingFileIO(path, 'r')
+    return raw if buffering == 0 else io.BufferedReader(raw)
+
+def make_corpus(folder, count):
+    date = datetime(2020, 5, 17, 10, 30)
+    jpeg, mp4 = jpeg_bytes(date, 24 * 1024), mp4_bytes(date, 2 * 1024 * 1024)
+    paths = []
+    for i in range(count):
+        # One video for every nine photos
+        path = os.path.join(folder, f'clip{i:05}.mp4' if i % 10 == 9 else f'img{i:05}.jpg')
+        with open(path, 'wb') as fh:
+            fh.write(mp4 if path.endswith('.mp4') else jpeg)
+        paths.append(path)
+    return paths
+
+def count_reads(paths, backend):
+    # Swap the backend module's open() for one that counts read calls
+    CountingFileIO.reads = 0
+    io_backend.open = counting_open
+    try:
+        run(paths, backend)
+    finally:
+        del io_backend.open
+    return CountingFileIO.reads / len(paths)
+
+def run(paths, backend):
+    started = time.perf_counter()
+    for path in paths:
+        date_taken, _ = extract_date(path, backend)
+        if date_taken is None:
+            raise RuntimeError(f"{backend}: no date for {path}")
+    return time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare metadata I/O backends.")
+    parser.add_argument('--files', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--dir', help="where to create the files (default: a temporary folder)")
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp(prefix='photo_sorter_io_', dir=args.dir)
+    try:
+        paths = make_corpus(folder, args.files)
+        print(f"{len(paths)} files in {folder}")
+        for backend in (IO_FILE, IO_BUFFERED, IO_MMAP):
+            run(paths, backend)  # warm the page cache equally for everyone
+            best = min(run(paths, backend) for _ in range(args.repeat))
+            reads = count_reads(paths, backend)
+            print(f"{backend:>9}: {len(paths) / best:10.0f} files/s  {best / len(paths) * 1e6:6.1f} us/file  "
+                  f"{reads:5.1f} reads/file")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
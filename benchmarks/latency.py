@@ -0,0 +1,147 @@
+# Filename: benchmarks/latency.py
+# Compares the threaded and asyncio engines when every file operation pays a
+# fixed delay, as on an SMB/NFS share. The delay is injected into scandir,
+# stat, metadata opens and renames of a local corpus, so it runs offline.
+#
+#   python benchmarks/latency.py [--files 500] [--latency-ms 5] [--io-concurrency 128]
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from corpus import generate_corpus
+from photo_sorter import image_video_extensions
+from photo_sorter_core import (
+    DirectoryCache, FileMover, MoveJournal, STATUS_COMPLETE, build_plan, execute_plan, extractors,
+    iter_media_files,
+)
+from photo_sorter_core.aio import AsyncFileIO, build_plan_async, execute_plan_async, iter_media_files_async
+
+FOLDER_FORMAT = "%Y-%m"
+
+class SlowEntry:
+    """A DirEntry whose stat() pays the injected delay."""
+
+    def __init__(self, entry, delay):
+        self._entry = entry
+        self._delay = delay
+
+    def stat(self, **kwargs):
+        time.sleep(self._delay)
+        return self._entry.stat(**kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._entry, name)
+
+class SlowScandir:
+    def __init__(self, entries, delay):
+        self._entries = entries
+        self._delay = delay
+
+    def __iter__(self):
+        return (SlowEntry(entry, self._delay) for entry in self._entries)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self._entries.close()
+
+@contextmanager
+def injected_latency(delay):
+    """Patch the calls the engine makes so each one sleeps for delay seconds first."""
+    real_scandir, real_rename, real_link, real_open_reader = os.scandir, os.rename, os.link, extractors.open_reader
+
+    def scandir(path='.'):
+        time.sleep(delay)
+        return SlowScandir(real_scandir(path), delay)
+
+    def rename(source, target):
+        time.sleep(delay)
+        real_rename(source, target)
+
+    # Moves hard link and then unlink on POSIX, so the link pays the delay there
+    def link(source, target, **kwargs):
+        time.sleep(delay)
+        real_link(source, target, **kwargs)
+
+    def open_reader(file_path, io_backend=None):
+        time.sleep(delay)
+        return real_open_reader(file_path, io_backend)
+
+    os.scandir, os.rename, os.link, extractors.open_reader = scandir, rename, link, open_reader
+    try:
+        yield
+    finally:
+        os.scandir, os.rename, os.link, extractors.open_reader = real_scandir, real_rename, real_link, real_open_reader
+
+def run_threads(source, destination, workers):
+    mover = FileMover(destination, target_folders=DirectoryCache())
+    journal = MoveJournal.create(destination, FOLDER_FORMAT)
+    files = iter_media_files(source, image_video_extensions, recursive=True)
+    plan = build_plan(files, destination, FOLDER_FORMAT, workers=workers)
+    errors = sum(1 for _, _, error in execute_plan(plan, mover, journal=journal) if error)
+    journal.close(STATUS_COMPLETE)
+    return errors
+
+async def run_asyncio(source, destination, concurrency):
+    async with AsyncFileIO(concurrency) as io:
+        mover = FileMover(destination, target_folders=DirectoryCache())
+        journal = MoveJournal.create(destination, FOLDER_FORMAT)
+        files = iter_media_files_async(source, image_video_extensions, io, recursive=True)
+        plan = build_plan_async(files, destination, FOLDER_FORMAT, io)
+        errors = 0
+        async for _, _, error in execute_plan_async(plan, mover, io, journal=journal):
+            errors += bool(error)
+        journal.close(STATUS_COMPLETE)
+    return errors
+
+def timed(run, source, destination, files):
+    started = time.perf_counter()
+    errors = run(source, destination)
+    seconds = time.perf_counter() - started
+    return {'seconds': round(seconds, 3), 'files_per_second': round(files / seconds, 1), 'errors': errors}
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the threaded and asyncio engines under injected latency.")
+    parser.add_argument('--files', type=int, default=500)
+    parser.add_argument('--latency-ms', type=float, default=5.0)
+    parser.add_argument('--workers', type=int, default=None, help="metadata workers for the threaded engine")
+    parser.add_argument('--io-concurrency', type=int, default=128)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--dir', help="where to build the corpora (default: a temporary folder)")
+    args = parser.parse_args()
+
+    engines = {
+        'threads': lambda source, destination: run_threads(source, destination, args.workers),
+        'asyncio': lambda source, destination: asyncio.run(run_asyncio(source, destination, args.io_concurrency)),
+    }
+    work = tempfile.mkdtemp(prefix='photo_sorter_latency_', dir=args.dir)
+    try:
+        # One identical corpus per engine, generated before the delay is switched on
+        folders = {}
+        for name in engines:
+            source = os.path.join(work, name, 'source')
+            destination = os.path.join(work, name, 'sorted')
+            generate_corpus(source, files=args.files, seed=args.seed)
+            os.makedirs(destination)
+            folders[name] = (source, destination)
+
+        result = {'files': args.files, 'latency_ms': args.latency_ms, 'io_concurrency': args.io_concurrency}
+        with injected_latency(args.latency_ms / 1000):
+            for name, run in engines.items():
+                result[name] = timed(run, *folders[name], args.files)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Filename: benchmarks/memory.py
+# Measures memory per file of the in-memory work list and plan, as plain
+# lists of records and as the compact FileTable / PlanTable, and checks the
+# tables against BYTES_PER_FILE_BUDGET. Records are synthetic (realistic
+# nested folders and camera file names), so nothing touches the disk.
+#
+#   python benchmarks/memory.py [--files 100000]
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from photo_sorter_core import BYTES_PER_FILE_BUDGET, FileTable, PlanEntry, PlanTable, ScannedFile
+
+SOURCE = "/mnt/archive/photos"
+DESTINATION = "/mnt/library/sorted"
+FILES_PER_FOLDER = 400
+
+def synthetic_files(count, seed=1):
+    """ScannedFiles with a real os.stat_result each, as a scan would produce."""
+    rng = random.Random(seed)
+    for index in range(count):
+        folder = f"{SOURCE}/{2000 + index // 200000}/event-{index // FILES_PER_FOLDER:05}/"
+        name = f"{rng.choice(('IMG', 'DSC', 'PXL', 'VID'))}_{index:07}.{rng.choice(('jpg', 'JPG', 'heic', 'mp4'))}"
+        mtime_ns = 1_300_000_000_000_000_000 + rng.randrange(10 ** 17)
+        size = rng.randrange(500_000, 12_000_000)
+        seconds = mtime_ns / 1e9
+        stat = os.stat_result((0o100644, 10_000_000 + index, 2049, 1, 1000, 1000, size,
+                               int(seconds), int(seconds), int(seconds),
+                               seconds, seconds, seconds, mtime_ns, mtime_ns, mtime_ns, 4096, size // 512, 0))
+        yield ScannedFile(folder + name, name, stat)
+
+def synthetic_plan(files, seed=1):
+    rng = random.Random(seed)
+    for scanned in files:
+        date_taken = datetime(2010, 1, 1) + timedelta(seconds=rng.randrange(15 * 365 * 86400))
+        target = f"{DESTINATION}/{date_taken:%Y-%m}/{scanned.name}"
+        yield PlanEntry(scanned.path, target, date_taken, 'exif', scanned.stat.st_size, None, scanned.stat)
+
+def traced_bytes(build):
+    """Memory still held by what build() returns, measured with tracemalloc."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return used, kept
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure memory per file of work lists and plans.")
+    parser.add_argument('--files', type=int, default=100_000)
+    args = parser.parse_args()
+    count = args.files
+
+    # The inputs are built up front, so only the containers being compared are traced
+    files = list(synthetic_files(count))
+    plan = list(synthetic_plan(files))
+
+    results = {
+        "work list (list of ScannedFile)": traced_bytes(lambda: list(synthetic_files(count)))[0],
+        "work list (FileTable)": traced_bytes(lambda: FileTable(files))[0],
+        "plan (list of PlanEntry)": traced_bytes(lambda: list(synthetic_plan(synthetic_files(count))))[0],
+        "plan (PlanTable)": traced_bytes(lambda: PlanTable(plan))[0],
+    }
+
+    ok = True
+    for name, used in results.items():
+        per_file = used / count
+        line = f"{name}: {per_file:.0f} bytes per file ({used / (1024 * 1024):.1f} MB for {count} files)"
+        if 'Table' in name:
+            within = per_file <= BYTES_PER_FILE_BUDGET
+            ok = ok and within
+            line += f" ({'ok' if within else 'over'} budget of {BYTES_PER_FILE_BUDGET})"
+        print(line)
+    print(f"at that rate 5M files need {results['work list (FileTable)'] / count * 5e6 / 2 ** 20:.0f} MB"
+          f" for the work list and {results['plan (PlanTable)'] / count * 5e6 / 2 ** 20:.0f} MB for the plan")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
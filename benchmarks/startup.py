@@ -0,0 +1,62 @@
+# Filename: benchmarks/startup.py
+# Measures cold-start time of the engine and the headless CLI in fresh
+# interpreters, and checks it against STARTUP_TARGET_MS.
+#
+#   python benchmarks/startup.py [--runs 15]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Added cost over a bare interpreter, median of several runs
+STARTUP_TARGET_MS = 100
+
+CASES = {
+    "import photo_sorter_core": [sys.executable, "-c", "import photo_sorter_core"],
+    "photo_sorter --help": [sys.executable, "-m", "photo_sorter", "--help"],
+}
+
+# Modules that must not be loaded just by importing the engine
+LAZY_MODULES = ["PIL", "hachoir", "tkinter", "flet", "multiprocessing"]
+
+def time_command(command, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+def eagerly_loaded():
+    check = ("import sys, photo_sorter_core; "
+             f"print(' '.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", check], cwd=ROOT, capture_output=True, text=True, check=True)
+    return output.stdout.split()
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure Photo Sorter startup time.")
+    parser.add_argument('--runs', type=int, default=15)
+    args = parser.parse_args()
+
+    baseline = time_command([sys.executable, "-c", "pass"], args.runs)
+    print(f"bare interpreter: {baseline:.1f} ms")
+
+    ok = True
+    for name, command in CASES.items():
+        added = time_command(command, args.runs) - baseline
+        within = added <= STARTUP_TARGET_MS
+        ok = ok and within
+        print(f"{name}: +{added:.1f} ms ({'ok' if within else 'over'} target of {STARTUP_TARGET_MS} ms)")
+
+    loaded = eagerly_loaded()
+    if loaded:
+        ok = False
+        print(f"loaded at import time: {', '.join(loaded)}")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
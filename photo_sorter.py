@@ -1,45 +1,229 @@
 # Filename: photo_sorter.py
+# Headless front end: sorts a folder from the command line with the same
+# engine as the UIs, without creating any windows.
+#
+#   python -m photo_sorter sort SRC DST --format YYYY-MM --workers 8 --dry-run --json
+#   python -m photo_sorter sort SRC DST --stats run-stats.json --profile
+import argparse
+import json
 import os
-import shutil
-from datetime import datetime
+import sys
+import time
+from collections import Counter
 
-# Set the path to your ImportedPhotos folder
-source_folder = r'C:\Users\Dean Ha\Pictures\ImportedPhotos'
+from photo_sorter_core import (
+    ACTION_LINK, ACTION_SKIP, DUPLICATES_HARDLINK, DUPLICATES_KEEP, DUPLICATES_QUARANTINE, DUPLICATES_SKIP,
+    IO_AUTO, IO_BACKENDS, MOVE_COPY, MOVE_LINK, MOVE_RENAME, RunStats, SortRun, is_network_path,
+)
 
-# Destination folder where files will be sorted into (optional)
-# Set as the same path as source_folder to organize in-place
-destination_folder = source_folder  
+# Folder name formats, as in the UIs
+FOLDER_NAME_FORMATS = {
+    "YYYY-MM": "%Y-%m",
+    "Month-YYYY": "%B-%Y",
+    "YYYY-MM-DD": "%Y-%m-%d",
+}
 
-# Create subfolders based on the year and month of file modification/taken date
-def sort_files_by_date(folder_path, destination_path):
-    # Get all files in the folder
-    for filename in os.listdir(folder_path):
-        file_path = os.path.join(folder_path, filename)
+# Which engine runs the sort: asyncio keeps many file operations in flight,
+# which pays off when each one is a network round trip
+ENGINE_AUTO = 'auto'
+ENGINE_THREADS = 'threads'
+ENGINE_ASYNCIO = 'asyncio'
+ENGINES = (ENGINE_AUTO, ENGINE_THREADS, ENGINE_ASYNCIO)
+DEFAULT_IO_CONCURRENCY = 128
 
-        # Skip if it's a directory
-        if os.path.isdir(file_path):
-            continue
+DUPLICATE_POLICIES = {
+    "skip": DUPLICATES_SKIP,
+    "hardlink": DUPLICATES_HARDLINK,
+    "quarantine": DUPLICATES_QUARANTINE,
+    "keep": DUPLICATES_KEEP,
+}
 
+image_video_extensions = {
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.heif', '.heic',
+    '.raf', '.cr2', '.rw2', '.erf', '.nrw', '.nef', '.rwz', '.dng', '.arw', '.eip', '.bay',
+    '.dcr', '.gpr', '.raw', '.crw', '.3fr', '.sr2', '.k25', '.mef', '.kc2', '.cs1', '.mos',
+    '.orf', '.kdc', '.cr3', '.srf', '.srw', '.j6i', '.ari', '.fff', '.mrw', '.mfw', '.rwl',
+    '.x3f', '.pef', '.iiq', '.cxi', '.nksc',
+    '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.mpeg', '.mpg', '.webm'
+}
+
+def sort_folder(args, echo):
+    """Run one sort and return the summary dict printed by --json."""
+    started = time.perf_counter()
+    run = new_run(args)
+    summary = new_summary(args, run)
+    results = run.results()
+    try:
+        for entry, method, error in results:
+            report_result(summary, entry, method, error, args.dry_run, echo)
+    except KeyboardInterrupt:
+        run.controller.cancel()
+    finally:
+        results.close()
+    return finish_summary(summary, run, started)
+
+async def sort_folder_async(args, echo):
+    """sort_folder on the asyncio engine, keeping args.io_concurrency file operations in flight."""
+    started = time.perf_counter()
+    run = new_run(args)
+    summary = new_summary(args, run)
+    summary['engine'] = 'asyncio'
+    results = run.results_async(args.io_concurrency)
+    try:
+        async for entry, method, error in results:
+            report_result(summary, entry, method, error, args.dry_run, echo)
+    finally:
+        await results.aclose()
+    return finish_summary(summary, run, started)
+
+def new_run(args):
+    return SortRun(os.path.abspath(args.source), os.path.abspath(args.destination), FOLDER_NAME_FORMATS[args.format],
+                   image_video_extensions, recursive=args.recursive, duplicate_policy=DUPLICATE_POLICIES[args.duplicates],
+                   workers=args.workers, use_processes=args.processes, io_backend=args.io,
+                   use_cache=not args.no_cache, use_library=not args.no_index, dry_run=args.dry_run)
+
+def new_summary(args, run):
+    return {
+        'source': run.source,
+        'destination': run.destination,
+        'format': args.format,
+        'dry_run': args.dry_run,
+        'engine': 'threads',
+        'counts': Counter(files=0, moved=0, linked=0, skipped=0, errors=0),
+        'bytes': Counter(moved=0),
+    }
+
+def report_result(summary, entry, method, error, dry_run, echo):
+    counts = summary['counts']
+    name = os.path.basename(entry.source)
+    counts['files'] += 1
+    if error:
+        counts['errors'] += 1
+        print(f"Error processing {name}: {error}", file=sys.stderr)
+    elif entry.action == ACTION_SKIP:
+        counts['skipped'] += 1
+        if entry.duplicate_of == entry.source:
+            echo(f"Already sorted: {name}")
+        else:
+            echo(f"Skipped: {name} (same as {entry.duplicate_of})")
+    else:
+        # A hard link that fell back to a real move counts as moved
+        linked = method == MOVE_LINK or (method is None and entry.action == ACTION_LINK)
+        counts['linked' if linked else 'moved'] += 1
+        summary['bytes']['moved'] += 0 if linked else entry.size or 0
+        verb = "Would move" if dry_run else "Moved"
+        echo(f"{verb}: {name} to {os.path.dirname(entry.target)}")
+
+def finish_summary(summary, run, started):
+    counts = summary['counts']
+    if run.files is not None:
+        # A cancelled run still reports every file the scan found
+        counts['files'] = run.files
+    if run.mover:
+        counts['renamed'] = run.mover.stats[MOVE_RENAME]
+        counts['copied'] = run.mover.stats[MOVE_COPY]
+        summary['bytes']['copied'] = run.mover.stats['copied_bytes']
+    # The plan phase waits on metadata reads; the rest of the loop is moving files
+    seconds = run.timer.seconds
+    total = time.perf_counter() - started
+    seconds['move'] = max(0.0, total - sum(seconds.values()))
+    seconds['total'] = total
+    summary['cancelled'] = run.cancelled
+    summary['timings'] = run.timer.as_dict()
+    return summary
+
+def use_async_engine(args):
+    if args.engine == ENGINE_AUTO:
+        return is_network_path(args.source) or is_network_path(args.destination)
+    return args.engine == ENGINE_ASYNCIO
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='photo_sorter', description="Sort photos and videos into dated folders.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    sort = commands.add_parser('sort', help="sort SOURCE into dated folders under DESTINATION")
+    sort.add_argument('source')
+    sort.add_argument('destination', help="destination folder (may be the same as the source)")
+    sort.add_argument('--format', choices=FOLDER_NAME_FORMATS, default="YYYY-MM", help="folder name format")
+    sort.add_argument('--workers', type=int, default=None, help="metadata reader workers (default: from CPU count)")
+    sort.add_argument('--processes', action='store_true', help="read metadata in worker processes instead of threads")
+    sort.add_argument('--io', choices=IO_BACKENDS, default=IO_AUTO,
+                      help="how metadata is read (auto: plain file locally, buffered blocks on network shares)")
+    sort.add_argument('--engine', choices=ENGINES, default=ENGINE_AUTO,
+                      help="threads, or asyncio for high-latency shares (auto: asyncio when either folder is on a network share)")
+    sort.add_argument('--io-concurrency', type=int, default=DEFAULT_IO_CONCURRENCY, metavar='N',
+                      help="file operations the asyncio engine keeps in flight")
+    sort.add_argument('--recursive', action='store_true', help="include subfolders of the source")
+    sort.add_argument('--duplicates', choices=DUPLICATE_POLICIES, default='skip', help="what to do with identical files")
+    sort.add_argument('--dry-run', action='store_true', help="plan only; move nothing")
+    sort.add_argument('--json', action='store_true', help="print a JSON summary instead of a line per file")
+    sort.add_argument('--no-cache', action='store_true', help="don't use the metadata cache")
+    sort.add_argument('--no-index', action='store_true', help="don't check or update the destination library index")
+    sort.add_argument('--stats', metavar='FILE',
+                      help="write timing histograms, I/O counts and the slowest files to FILE as JSON")
+    sort.add_argument('--slowest', type=int, default=10, metavar='N', help="how many of the slowest files --stats lists")
+    sort.add_argument('--profile', action='store_true',
+                      help="add a cProfile capture to --stats (the raw profile is saved as FILE.prof)")
+    sort.add_argument('--trace-memory', action='store_true', help="add tracemalloc peak and top allocations to --stats")
+    args = parser.parse_args(argv)
+    if (args.profile or args.trace_memory) and not args.stats:
+        parser.error("--profile and --trace-memory need --stats FILE")
+    return args
+
+def write_stats(path, stats, summary):
+    """Dump a run's RunStats with the CLI's phase timings and counts."""
+    data = stats.as_dict()
+    data['phases'] = {phase: seconds for phase, seconds in summary['timings'].items() if phase != 'total'}
+    data['counts'] = summary['counts']
+    data['bytes'] = summary['bytes']
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(data, fh, indent=2)
+        fh.write('\n')
+
+def main(argv=None):
+    args = parse_args(argv)
+    for folder in (args.source, args.destination):
+        if not os.path.isdir(folder):
+            print(f"Not a folder: {folder}", file=sys.stderr)
+            return 2
+
+    echo = (lambda message: None) if args.json else print
+    stats = None
+    if args.stats:
+        stats = RunStats(slowest=args.slowest, trace_memory=args.trace_memory,
+                         profile_path=args.stats + '.prof' if args.profile else None)
+        stats.start()
+    try:
+        if use_async_engine(args):
+            import asyncio
+            summary = asyncio.run(sort_folder_async(args, echo))
+        else:
+            summary = sort_folder(args, echo)
+    except OSError as e:
+        print(f"Error accessing source folder: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        print("Cancelled.", file=sys.stderr)
+        return 130
+    finally:
+        if stats:
+            stats.stop()
+
+    if stats:
         try:
-            # Get the file's modification time
-            modification_time = os.path.getmtime(file_path)
-            date_taken = datetime.fromtimestamp(modification_time)
-
-            # Create folder name based on year and month (e.g., '2024-08')
-            folder_name = date_taken.strftime('%Y-%m')
-            target_folder = os.path.join(destination_path, folder_name)
-
-            # Create the target folder if it doesn't exist
-            if not os.path.exists(target_folder):
-                os.makedirs(target_folder)
-
-            # Move the file to the respective folder
-            shutil.move(file_path, os.path.join(target_folder, filename))
-            print(f'Moved: {filename} to {target_folder}')
-        
-        except Exception as e:
-            print(f'Error processing {filename}: {e}')
-
-# Run the script
+            write_stats(args.stats, stats, summary)
+        except OSError as e:
+            print(f"Could not write stats: {e}", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        counts = summary['counts']
+        print(f"{counts['files']} files: {counts['moved']} moved, {counts['linked']} hard-linked, {counts['skipped']} skipped, "
+              f"{counts['errors']} errors in {summary['timings']['total']:.1f}s")
+    if summary['cancelled']:
+        return 130
+    return 1 if summary['counts']['errors'] else 0
+
 if __name__ == "__main__":
-    sort_files_by_date(source_folder, destination_folder)
+    sys.exit(main())
@@ -0,0 +1,20 @@
+# Filename: photo_sorter_core/__init__.py
+# Shared sorting engine used by the Photo Sorter front ends.
+from .buckets import FolderNamer, folder_namer
+from .cache import MetadataCache, default_cache_path, open_cache
+from .control import RateLimiter, RunController
+from .dedup import DUPLICATES_HARDLINK, DUPLICATES_KEEP, DUPLICATES_QUARANTINE, DUPLICATES_SKIP, find_duplicates, mark_duplicates
+from .extractors import NotApplicable, extract_date, register_extractor, sniff_format
+from .instrument import RunStats, read_proc_io, timed_phase
+from .io_backend import IO_AUTO, IO_BACKENDS, IO_BUFFERED, IO_FILE, IO_MMAP, is_network_path, open_reader
+from .journal import STATUS_CANCELLED, STATUS_COMPLETE, STATUS_UNDONE, MoveJournal, find_resumable_journal, read_journal, remaining_entries, undo_journal, undo_last_run
+from .library import LIBRARY_INDEX, LibraryIndex, mark_already_sorted, open_library
+from .metadata import get_date_taken, get_date_taken_with_source, get_exif_date_taken, get_video_creation_date
+from .mover import MOVE_COPY, MOVE_LINK, MOVE_RENAME, DirectoryCache, FileMover, copy_then_unlink
+from .pipeline import extract_dates
+from .plan import ACTION_LINK, ACTION_SKIP, PlanEntry, PlanWriter, build_plan, execute_plan, load_plan, save_plan
+from .progress import ProgressSnapshot, ProgressTracker, format_duration, format_progress, walk_ahead
+from .records import BYTES_PER_FILE_BUDGET, FileStat, FileTable, PlanTable
+from .runner import EVENT_DEDUP, EVENT_DUPLICATES, EVENT_INDEXED, EVENT_INDEXING, EVENT_SCAN, EVENT_SCANNED, PhaseTimer, SortRun
+from .scanner import MediaFilter, ScannedFile, iter_media_files, scan_media_files
+from .ui_events import MAX_LOG_LINES, UI_FLUSH_INTERVAL_MS, UiEventQueue
@@ -0,0 +1,408 @@
+# Filename: photo_sorter_core/aio.py
+# asyncio variant of the engine for sources where per-file latency dominates,
+# such as SMB and NFS shares. Every blocking call runs on a thread pool
+# behind AsyncFileIO, which caps how many are in flight:
+#   - scandir, stat
+#   - metadata reads
+#   - renames and copies
+# Each stage keeps a bounded number of operations outstanding and only
+# starts more as its consumer takes results. Hundreds of round trips
+# overlap instead of being paid one after another, yet a slow consumer
+# still holds the whole pipeline back.
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from . import instrument
+from .cache import file_fingerprint
+from .dedup import DUPLICATES_KEEP, DuplicateMarker
+from .journal import JOURNAL_SYNC_EVERY
+from .library import check_already_sorted
+from .metadata import get_date_taken_with_source
+from .plan import ACTION_LINK, TargetNames, folder_names, plan_entry, target_folder
+from .progress import WALK_AHEAD_MAX_FILES, FileQueue
+from .records import FileTable
+from .scanner import ENTRY_DIR, ENTRY_FILE, MediaFilter, ScannedFile
+
+# Blocking file operations allowed in flight at once. Mostly they wait on
+# the network, so this can be far above the core count.
+DEFAULT_IO_CONCURRENCY = 128
+
+class AsyncFileIO:
+    """Runs blocking file calls on a thread pool, at most concurrency at a time.
+
+    Calls beyond the limit wait as coroutines, not as queued pool jobs, so
+    they can still be cancelled.
+    """
+
+    def __init__(self, concurrency=DEFAULT_IO_CONCURRENCY):
+        self.concurrency = concurrency
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="aio")
+        self._slots = asyncio.Semaphore(concurrency)
+
+    async def run(self, func, *args):
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, partial(func, *args))
+
+    def close(self):
+        # The stages wait for their own calls, so nothing useful is cut off here
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+async def iter_media_files_async(folder, extensions, io, recursive=False, max_depth=None,
+                                 include=None, exclude=None, skip_dirs=()):
+    """Async iter_media_files: many folders are listed, and many files stat'ed, at once.
+
+    Takes the same options as scanner.iter_media_files. Up to
+    io.concurrency folders are listed at a time; the rest wait as plain
+    paths. Files come out as their folders finish listing, not in walk order.
+    """
+    media = MediaFilter(extensions, recursive, max_depth, include, exclude, skip_dirs)
+    waiting = deque([(folder, '', 0)])
+    listings = {}
+    try:
+        while waiting or listings:
+            while waiting and len(listings) < io.concurrency:
+                directory, relative_dir, depth = waiting.popleft()
+                listings[asyncio.ensure_future(io.run(_list_folder, directory, relative_dir, depth, media))] = depth
+            done, _ = await asyncio.wait(listings, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                depth = listings.pop(task)
+                try:
+                    candidates, subdirs = task.result()
+                except OSError:
+                    # An unreadable subfolder shouldn't end the whole walk
+                    if depth == 0:
+                        raise
+                    continue
+
+                waiting.extend(subdirs)
+                # Stats go out in slices, so a huge folder doesn't become one task per file
+                for start in range(0, len(candidates), io.concurrency):
+                    batch = candidates[start:start + io.concurrency]
+                    stats = await asyncio.gather(*(io.run(_stat_entry, entry) for entry in batch))
+                    for entry, stat_result in zip(batch, stats):
+                        if stat_result is not None:
+                            yield ScannedFile(entry.path, entry.name, stat_result)
+    finally:
+        for task in listings:
+            task.cancel()
+
+async def collect_files_async(files):
+    """Gather an async scan into a FileTable, as scan_media_files does for a plain one."""
+    table = FileTable()
+    async for scanned in files:
+        table.append(scanned)
+    return table
+
+async def walk_ahead_async(files, tracker, max_ahead=WALK_AHEAD_MAX_FILES):
+    """Async progress.walk_ahead: the scan runs as its own task, growing tracker's total.
+
+    Found files wait in a compact FileQueue, and the scan pauses while
+    max_ahead of them are queued.
+    """
+    found = FileQueue()
+    ready = asyncio.Condition()
+    state = {'done': False}
+
+    async def scan():
+        try:
+            async for scanned in files:
+                tracker.add_total()
+                async with ready:
+                    await ready.wait_for(lambda: len(found) < max_ahead)
+                    found.append(scanned)
+                    ready.notify()
+            tracker.set_total()
+        finally:
+            state['done'] = True
+            async with ready:
+                ready.notify()
+
+    task = asyncio.ensure_future(scan())
+    try:
+        while True:
+            async with ready:
+                await ready.wait_for(lambda: found or state['done'])
+                if not found:
+                    break
+                scanned = found.popleft()
+                ready.notify()
+            yield scanned
+        # Re-raises a scan error once the files found before it are used up
+        await task
+    finally:
+        task.cancel()
+
+def _list_folder(directory, relative_dir, depth, media):
+    # One scandir pass on a pool thread: (file DirEntries to stat, subfolders to list)
+    stats = instrument.recorder
+    started = time.perf_counter() if stats is not None else 0
+    files = []
+    subdirs = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            relative_path = relative_dir + entry.name
+            kind = media.match(entry, relative_path, depth)
+            if kind == ENTRY_DIR:
+                subdirs.append((entry.path, relative_path + '/', depth + 1))
+            elif kind == ENTRY_FILE:
+                files.append(entry)
+    if stats is not None:
+        stats.timed('scan.folder', time.perf_counter() - started, directory)
+    return files, subdirs
+
+def _stat_entry(entry):
+    try:
+        stat_result = entry.stat()
+    except OSError:
+        # Vanished or unreadable between listing and stat
+        return None
+    if instrument.recorder is not None:
+        instrument.recorder.count('stat')
+    return stat_result
+
+async def build_plan_async(files, destination_folder, folder_name_format, io, cache=None, controller=None,
+                           io_backend=None, read_ahead=None):
+    """Async build_plan: yields a PlanEntry per file, in input order.
+
+    files may be a plain or an async iterable of ScannedFile. Up to
+    read_ahead dates (default: io.concurrency) are read at once. With a
+    MetadataCache, the lookup and the write-back run on the pool with the
+    read. Each destination folder's existing names (see plan.TargetNames)
+    are listed on the pool as soon as a date first points at it.
+    """
+    read_ahead = read_ahead or io.concurrency
+    extract = partial(get_date_taken_with_source, io_backend=io_backend) if io_backend else get_date_taken_with_source
+    pending = deque()
+    targets = TargetNames()
+    # Destination folder -> task listing it, until its first entry is planned
+    listings = {}
+
+    def list_ahead(task):
+        if task.cancelled() or task.exception() is not None:
+            return
+        folder = target_folder(task.result()[0], destination_folder, folder_name_format)
+        if folder is not None and folder not in listings and not targets.is_listed(folder):
+            listings[folder] = asyncio.ensure_future(io.run(folder_names, folder))
+
+    def read(scanned):
+        task = asyncio.ensure_future(io.run(_read_date, extract, cache, scanned))
+        task.add_done_callback(list_ahead)
+        return scanned, task
+
+    try:
+        async for scanned in _aiter(files):
+            pending.append(read(scanned))
+            if len(pending) < read_ahead:
+                continue
+            entry = await _plan_next(pending.popleft(), io, destination_folder, folder_name_format, targets, listings)
+            if not await _checkpoint(controller, io, throttle=False):
+                return
+            yield entry
+
+        while pending:
+            entry = await _plan_next(pending.popleft(), io, destination_folder, folder_name_format, targets, listings)
+            if not await _checkpoint(controller, io, throttle=False):
+                return
+            yield entry
+    finally:
+        for _, task in pending:
+            task.cancel()
+        for task in listings.values():
+            task.cancel()
+
+def _read_date(extract, cache, scanned):
+    # On a pool thread, since the cache is SQLite: the lookup, the read on a miss and storing its result
+    if cache is not None:
+        fingerprint = file_fingerprint(scanned.stat)
+        cached = cache.get(scanned.path, fingerprint)
+        if instrument.recorder is not None:
+            instrument.recorder.count('cache.hit' if cached else 'cache.miss')
+        if cached:
+            return cached
+    date_taken, date_source = extract(scanned.path, scanned.stat.st_mtime)
+    if cache is not None:
+        cache.put(scanned.path, fingerprint, date_taken, date_source)
+    return date_taken, date_source
+
+async def _plan_next(item, io, destination_folder, folder_name_format, targets, listings):
+    scanned, task = item
+    date_taken = date_source = error = None
+    try:
+        date_taken, date_source = await task
+    except Exception as e:
+        error = e
+    entry = plan_entry(scanned, date_taken, date_source, error, destination_folder, folder_name_format)
+    if entry.target:
+        folder = os.path.dirname(entry.target)
+        if not targets.is_listed(folder):
+            listing = listings.pop(folder, None)
+            targets.add_listing(folder, await (listing or io.run(folder_names, folder)))
+        entry = entry._replace(target=targets.claim(entry.target))
+    return entry
+
+async def mark_duplicates_async(plan, duplicates, policy, destination_folder):
+    """Async dedup.mark_duplicates."""
+    marker = DuplicateMarker(duplicates, policy, destination_folder) if duplicates and policy != DUPLICATES_KEEP else None
+    async for entry in plan:
+        yield marker.mark(entry) if marker else entry
+
+async def mark_already_sorted_async(plan, library, io, ignore=(), read_ahead=None):
+    """Async library.mark_already_sorted: entries come out in plan order.
+
+    Lookups (SQLite, and hashing for possible matches) run on the pool, up
+    to read_ahead (default: io.concurrency) at once.
+    """
+    read_ahead = read_ahead or io.concurrency
+    pending = deque()
+    try:
+        async for entry in plan:
+            pending.append(asyncio.ensure_future(io.run(check_already_sorted, entry, library, ignore)))
+            if len(pending) >= read_ahead:
+                yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def execute_plan_async(entries, mover, io, controller=None, journal=None, library=None, max_in_flight=None):
+    """Async execute_plan: yields (entry, method, error) as each move finishes.
+
+    Up to max_in_flight moves (default: io.concurrency) run at once. With a
+    MoveJournal, plan records are synced in batches and no move of a batch
+    starts before its sync. A hard link to a file that is still being
+    moved waits for that move. If the caller stops early, moves already
+    started are allowed to finish and are journaled. Journal and library
+    writes are batched onto the pool, never run on the event loop.
+    """
+    max_in_flight = max_in_flight or io.concurrency
+    running = set()
+    # target -> task still moving a file there, so links can wait for their original
+    moving = {}
+    batch = []
+    # (entry, method) of moves not yet written to the journal and library
+    moved = []
+
+    def start(entry):
+        task = asyncio.ensure_future(_move_entry(entry, mover, io, moving))
+        running.add(task)
+        if entry.target and not entry.error:
+            moving[entry.target] = task
+
+    def finish(task):
+        running.discard(task)
+        entry, method, error = task.result()
+        if moving.get(entry.target) is task:
+            del moving[entry.target]
+        if entry.error:
+            error = entry.error
+        elif not error and method and (journal is not None or library is not None):
+            moved.append((entry, method))
+        return entry, method, error
+
+    async def record(planned=()):
+        # One pool call per batch keeps the journal's writes in order
+        nonlocal moved
+        if moved or planned:
+            done, moved = moved, []
+            await io.run(_record_batch, journal, library, done, planned)
+
+    async def make_room():
+        # Results of the moves that had to finish before another can start
+        finished = []
+        while len(running) >= max_in_flight:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            finished.extend(finish(task) for task in done)
+        return finished
+
+    try:
+        async for entry in _aiter(entries):
+            if not await _checkpoint(controller, io, entry.size):
+                break
+            batch.append(entry)
+            if journal is not None:
+                if len(batch) < JOURNAL_SYNC_EVERY:
+                    continue
+                await record(batch)
+            elif len(moved) >= JOURNAL_SYNC_EVERY:
+                await record()
+            for queued in batch:
+                for result in await make_room():
+                    yield result
+                start(queued)
+            batch = []
+        else:
+            # The last, partial batch
+            if journal is not None and batch:
+                await record(batch)
+            for queued in batch:
+                for result in await make_room():
+                    yield result
+                start(queued)
+
+        while running:
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield finish(task)
+    finally:
+        # Files already being moved are left to finish, never half-moved
+        if running:
+            await asyncio.wait(running)
+            for task in list(running):
+                finish(task)
+        await record()
+
+def _record_batch(journal, library, done, planned):
+    # Completed moves first, then the next batch's plan records, made durable by one fsync
+    for entry, method in done:
+        if journal is not None:
+            journal.record_done(entry, method)
+        if library is not None:
+            library.record_moved(entry, method)
+    if journal is not None:
+        for entry in planned:
+            journal.record_planned(entry)
+        if planned:
+            journal.sync()
+
+async def _move_entry(entry, mover, io, moving):
+    if entry.error or not entry.target:
+        return entry, None, None
+    link_to = entry.duplicate_of if entry.action == ACTION_LINK else None
+    original = moving.get(link_to) if link_to else None
+    if original is not None:
+        await asyncio.wait([original])
+    try:
+        method = await io.run(mover.move, entry.source, entry.target, entry.stat, link_to)
+    except Exception as e:
+        return entry, None, e
+    return entry, method, None
+
+async def _checkpoint(controller, io, nbytes=0, throttle=True):
+    # RunController blocks on threading events, so waiting while paused or
+    # throttled happens on the pool; a running, unthrottled run never leaves the loop
+    if controller is None:
+        return True
+    if throttle and (controller.is_paused or controller.limiter):
+        return await io.run(controller.checkpoint, nbytes)
+    if controller.is_paused:
+        return await io.run(controller.wait_if_paused)
+    return not controller.is_cancelled
+
+async def _aiter(items):
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
@@ -0,0 +1,57 @@
+# Filename: photo_sorter_core/buckets.py
+# Date bucketing: turning dates into destination folder names. strftime is
+# slow, more so for locale-dependent formats like '%B-%Y', yet a library has
+# only a few thousand distinct days. So each distinct bucket is formatted
+# once and every file with that bucket reuses the name.
+import re
+
+# Granularity a folder name format depends on, from its strftime directives
+GRANULARITY_MONTH = 'month'
+GRANULARITY_DAY = 'day'
+GRANULARITY_EXACT = 'exact'
+
+_MONTH_DIRECTIVES = set('YymBbhC%')
+_DAY_DIRECTIVES = _MONTH_DIRECTIVES | set('dejaAwuUWVGgxDF')
+_DIRECTIVE = re.compile(r'%[-#_^0]?(.)')
+
+def format_granularity(folder_name_format):
+    """The coarsest unit two dates can share and still get the same folder name."""
+    directives = set(_DIRECTIVE.findall(folder_name_format))
+    if directives <= _MONTH_DIRECTIVES:
+        return GRANULARITY_MONTH
+    if directives <= _DAY_DIRECTIVES:
+        return GRANULARITY_DAY
+    return GRANULARITY_EXACT
+
+class FolderNamer:
+    """date_taken.strftime(folder_name_format), run once per distinct month or day.
+
+    Formats with time fields (%H, %M...) are passed through to strftime.
+    """
+
+    def __init__(self, folder_name_format):
+        self.folder_name_format = folder_name_format
+        self._granularity = format_granularity(folder_name_format)
+        self._names = {}
+
+    def __call__(self, date_taken):
+        if self._granularity == GRANULARITY_EXACT:
+            return date_taken.strftime(self.folder_name_format)
+        if self._granularity == GRANULARITY_MONTH:
+            bucket = date_taken.year * 12 + date_taken.month
+        else:
+            bucket = date_taken.toordinal()
+        name = self._names.get(bucket)
+        if name is None:
+            # A ValueError (e.g. a year strftime can't show) reaches the caller, as before
+            name = self._names[bucket] = date_taken.strftime(self.folder_name_format)
+        return name
+
+_namers = {}
+
+def folder_namer(folder_name_format):
+    """The shared FolderNamer for a format, so its names are reused across runs."""
+    namer = _namers.get(folder_name_format)
+    if namer is None:
+        namer = _namers[folder_name_format] = FolderNamer(folder_name_format)
+    return namer
@@ -0,0 +1,120 @@
+# Filename: photo_sorter_core/cache.py
+# On-disk cache of resolved dates so re-runs over the same folder can skip
+# metadata parsing for files that haven't changed since they were last read.
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+# Eviction defaults: forget entries not used for 90 days, and keep the
+# database at a bounded number of rows.
+MAX_AGE_DAYS = 90
+MAX_ENTRIES = 2_000_000
+
+# Inserts are committed in batches rather than per file
+COMMIT_EVERY = 500
+
+# Version of the date readers whose results are stored. Bump it whenever a
+# reader learns a new format or changes what it returns, so rows written by
+# older readers (e.g. an mtime fallback for a RAW file that can now be
+# parsed) are read again instead of trusted forever.
+READERS_VERSION = 2
+
+def default_cache_path():
+    if os.name == 'nt':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        return os.path.join(base, 'PhotoSorter', 'metadata.sqlite')
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'photo_sorter', 'metadata.sqlite')
+
+def file_fingerprint(stat_result):
+    """Cheap identity of a file's content: (size, mtime in ns, inode)."""
+    return stat_result.st_size, stat_result.st_mtime_ns, stat_result.st_ino
+
+def open_cache(path=None):
+    """Open the metadata cache, or return None if it can't be used here."""
+    try:
+        return MetadataCache(path)
+    except (OSError, sqlite3.Error):
+        return None
+
+class MetadataCache:
+    """SQLite-backed map of path -> (date_taken, source), validated by fingerprint.
+
+    Rows from another READERS_VERSION count as misses and are overwritten.
+    """
+
+    def __init__(self, path=None, max_age_days=MAX_AGE_DAYS, max_entries=MAX_ENTRIES):
+        self.path = path or default_cache_path()
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS dates ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER, mtime_ns INTEGER, inode INTEGER,"
+            " date_taken TEXT, source TEXT, last_used REAL, readers INTEGER)"
+        )
+        columns = [row[1] for row in self._db.execute("PRAGMA table_info(dates)")]
+        if 'readers' not in columns:
+            # Caches from before the version column; their rows are all stale
+            self._db.execute("ALTER TABLE dates ADD COLUMN readers INTEGER")
+        self._db.execute("CREATE INDEX IF NOT EXISTS dates_last_used ON dates(last_used)")
+        self.evict(max_age_days, max_entries)
+
+    def get(self, file_path, fingerprint):
+        """Return (date_taken, source) if cached for this exact fingerprint, else None."""
+        file_path = os.path.abspath(file_path)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT size, mtime_ns, inode, date_taken, source, readers FROM dates WHERE path = ?",
+                (file_path,),
+            ).fetchone()
+            if not row or tuple(row[:3]) != tuple(fingerprint) or row[5] != READERS_VERSION:
+                return None
+            self._db.execute("UPDATE dates SET last_used = ? WHERE path = ?", (time.time(), file_path))
+            self._mark_dirty()
+        return datetime.fromisoformat(row[3]), row[4]
+
+    def put(self, file_path, fingerprint, date_taken, source):
+        file_path = os.path.abspath(file_path)
+        size, mtime_ns, inode = fingerprint
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO dates VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_path, size, mtime_ns, inode, date_taken.isoformat(), source, time.time(), READERS_VERSION),
+            )
+            self._mark_dirty()
+
+    def evict(self, max_age_days=MAX_AGE_DAYS, max_entries=MAX_ENTRIES):
+        with self._lock:
+            self._db.execute("DELETE FROM dates WHERE last_used < ?", (time.time() - max_age_days * 86400,))
+            self._db.execute("DELETE FROM dates WHERE readers IS NOT ?", (READERS_VERSION,))
+            self._db.execute(
+                "DELETE FROM dates WHERE path IN ("
+                " SELECT path FROM dates ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (max_entries,),
+            )
+            self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _mark_dirty(self):
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
@@ -0,0 +1,89 @@
+# Filename: photo_sorter_core/control.py
+# Pause/resume/cancel for a sorting run, shared between the UI thread and
+# the worker thread, plus an optional throttle for shared disks.
+import threading
+import time
+
+class RateLimiter:
+    """Paces work to at most files_per_second and/or bytes_per_second."""
+
+    def __init__(self, files_per_second=None, bytes_per_second=None):
+        self.files_per_second = files_per_second
+        self.bytes_per_second = bytes_per_second
+        self._lock = threading.Lock()
+        self._next_start = time.monotonic()
+
+    def reserve(self, files=1, nbytes=0):
+        """Book the cost of the next item, returning how long to wait before doing it."""
+        cost = 0.0
+        if self.files_per_second:
+            cost += files / self.files_per_second
+        if self.bytes_per_second:
+            cost += nbytes / self.bytes_per_second
+
+        with self._lock:
+            now = time.monotonic()
+            # Idle time isn't banked, so a long pause can't turn into a burst
+            start = max(self._next_start, now)
+            self._next_start = start + cost
+        return start - now
+
+class RunController:
+    """Event-based run state: workers block on pause instead of polling."""
+
+    def __init__(self, files_per_second=None, bytes_per_second=None):
+        self._resumed = threading.Event()
+        self._resumed.set()
+        self._cancelled = threading.Event()
+        if files_per_second or bytes_per_second:
+            self.limiter = RateLimiter(files_per_second, bytes_per_second)
+        else:
+            self.limiter = None
+
+    @property
+    def is_paused(self):
+        return not self._resumed.is_set()
+
+    @property
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def pause(self):
+        self._resumed.clear()
+
+    def resume(self):
+        self._resumed.set()
+
+    def toggle_pause(self):
+        """Flip between paused and running; returns True if now paused."""
+        if self.is_paused:
+            self.resume()
+        else:
+            self.pause()
+        return self.is_paused
+
+    def cancel(self):
+        self._cancelled.set()
+        # Wake a paused worker so it can see the cancel
+        self._resumed.set()
+
+    def wait_if_paused(self):
+        """Block while paused; returns False once the run has been cancelled."""
+        if not self._resumed.is_set():
+            self._resumed.wait()
+        return not self._cancelled.is_set()
+
+    def checkpoint(self, nbytes=0):
+        """Call before each file: blocks while paused and applies the rate limit.
+
+        Returns False once the run has been cancelled. Costs nothing when the
+        run is neither paused nor throttled.
+        """
+        if not self.wait_if_paused():
+            return False
+        if self.limiter:
+            delay = self.limiter.reserve(1, nbytes)
+            if delay > 0:
+                # Sleep on the cancel event so a cancel cuts the wait short
+                self._cancelled.wait(delay)
+        return not self._cancelled.is_set()
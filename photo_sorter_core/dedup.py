@@ -0,0 +1,147 @@
+# Filename: photo_sorter_core/dedup.py
+# Finds byte-identical copies among the files of a run, cheapest test first:
+# same size, then a hash of the first and last few KB, and only then a full
+# content hash for the files that still collide.
+import hashlib
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import instrument
+from .plan import ACTION_LINK, ACTION_SKIP, TargetNames
+
+# What to do with a confirmed duplicate
+DUPLICATES_KEEP = 'keep'              # move it like any other file
+DUPLICATES_SKIP = 'skip'              # leave it in the source folder
+DUPLICATES_HARDLINK = 'hardlink'      # sort it as a hard link to the original
+DUPLICATES_QUARANTINE = 'quarantine'  # move it into a separate folder
+
+QUARANTINE_FOLDER = 'Duplicates'
+
+# Bytes hashed from each end of the file in the quick pass
+EDGE_BYTES = 64 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+DEFAULT_HASH_WORKERS = 8
+
+def edge_hash(path, size):
+    """Hash of the first and last EDGE_BYTES; tells most same-size files apart."""
+    stats = instrument.recorder
+    started = time.perf_counter() if stats is not None else 0
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as fh:
+        digest.update(fh.read(EDGE_BYTES))
+        if size > 2 * EDGE_BYTES:
+            fh.seek(size - EDGE_BYTES)
+            digest.update(fh.read(EDGE_BYTES))
+        elif size > EDGE_BYTES:
+            digest.update(fh.read())
+    if stats is not None:
+        stats.timed('hash.edge', time.perf_counter() - started, path, nbytes=min(size, 2 * EDGE_BYTES))
+    return digest.hexdigest()
+
+def full_hash(path):
+    stats = instrument.recorder
+    started = time.perf_counter() if stats is not None else 0
+    digest = hashlib.blake2b()
+    nbytes = 0
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+            nbytes += len(chunk)
+    if stats is not None:
+        stats.timed('hash.full', time.perf_counter() - started, path, nbytes=nbytes)
+    return digest.hexdigest()
+
+def find_duplicates(files, workers=DEFAULT_HASH_WORKERS):
+    """Map the absolute path of every duplicate ScannedFile to that of its original.
+
+    The original is the first file of each identical group in input order.
+    Files that can't be read are treated as unique. Paths are made absolute
+    to match the sources of plan entries, however the folder was given.
+    """
+    by_size = defaultdict(list)
+    for scanned in files:
+        # Empty files are all "identical" but there's nothing to save
+        if scanned.stat.st_size:
+            by_size[scanned.stat.st_size].append(os.path.abspath(scanned.path))
+
+    candidates = [(path, size) for size, paths in by_size.items() if len(paths) > 1 for path in paths]
+    if not candidates:
+        return {}
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hash") as executor:
+        by_edges = _group(executor, lambda item: (item[1], edge_hash(*item)), candidates)
+        # A file small enough to be covered by its edge hash needs no second pass
+        small = [group for group in by_edges if group[0][1] <= 2 * EDGE_BYTES]
+        large = [item for group in by_edges if group[0][1] > 2 * EDGE_BYTES for item in group]
+        by_content = small + _group(executor, lambda item: (item[1], full_hash(item[0])), large)
+
+    # Grouping keeps input order, so the first path of each group is the original
+    duplicates = {}
+    for group in by_content:
+        original = group[0][0]
+        for path, _ in group[1:]:
+            duplicates[path] = original
+    return duplicates
+
+def _group(executor, key, items):
+    # Groups items by key(item) computed on the pool, keeping only groups of two or more
+    groups = defaultdict(list)
+    for item, item_key in zip(items, executor.map(_safe(key), items)):
+        if item_key is not None:
+            groups[item_key].append(item)
+    return [group for group in groups.values() if len(group) > 1]
+
+def _safe(key):
+    def wrapper(item):
+        try:
+            return key(item)
+        except OSError:
+            return None
+    return wrapper
+
+def mark_duplicates(plan, duplicates, policy, destination_folder):
+    """Rewrite plan entries for duplicate files according to policy.
+
+    Originals always come before their duplicates in the plan, so each
+    duplicate can point at where its original is being sorted to.
+    """
+    if not duplicates or policy == DUPLICATES_KEEP:
+        yield from plan
+        return
+
+    marker = DuplicateMarker(duplicates, policy, destination_folder)
+    for entry in plan:
+        yield marker.mark(entry)
+
+class DuplicateMarker:
+    """mark_duplicates one entry at a time, for callers that don't have an iterator."""
+
+    def __init__(self, duplicates, policy, destination_folder):
+        self.duplicates = duplicates
+        self.policy = policy
+        self.destination_folder = destination_folder
+        self._originals = set(duplicates.values())
+        self._original_targets = {}
+        self._quarantine_targets = TargetNames()
+
+    def mark(self, entry):
+        source = os.path.abspath(entry.source)
+        if source in self._originals:
+            # An original that is already in place stays at its own path
+            self._original_targets[source] = entry.duplicate_of if entry.action == ACTION_SKIP else entry.target
+
+        original = self.duplicates.get(source)
+        original_target = self._original_targets.get(original)
+        if original is None or entry.error or not original_target or self.policy == DUPLICATES_KEEP:
+            return entry
+        if self.policy == DUPLICATES_SKIP:
+            return entry._replace(target=None, action=ACTION_SKIP, duplicate_of=original_target)
+        if self.policy == DUPLICATES_HARDLINK:
+            return entry._replace(action=ACTION_LINK, duplicate_of=original_target)
+        if self.policy == DUPLICATES_QUARANTINE:
+            quarantine_target = self._quarantine_targets.claim(os.path.join(
+                os.path.abspath(self.destination_folder), QUARANTINE_FOLDER, os.path.basename(entry.source)))
+            return entry._replace(target=quarantine_target, duplicate_of=original_target)
+        raise ValueError(f"unknown duplicate policy: {self.policy}")
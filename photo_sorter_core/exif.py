@@ -0,0 +1,124 @@
+# Filename: photo_sorter_core/exif.py
+# Minimal EXIF reader that pulls the capture date straight out of the
+# JPEG APP1 segment or TIFF header, without letting Pillow open the image.
+import io
+import struct
+from datetime import datetime
+
+EXIF_DATE_TIME = 306
+EXIF_DATE_TIME_ORIGINAL = 36867
+EXIF_IFD_POINTER = 34665
+
+TIFF_ASCII = 2
+
+# Sanity limits so a corrupt file can't make us read far
+MAX_IFD_ENTRIES = 512
+MAX_JPEG_SEGMENTS = 32
+
+def read_exif_date(file_path):
+    """Return DateTimeOriginal (or DateTime) from a JPEG or TIFF file.
+
+    Returns None when the file has EXIF but no usable date. Raises
+    ValueError when the header isn't something this reader understands,
+    so callers can fall back to a full parser.
+    """
+    with open(file_path, 'rb') as fh:
+        head = fh.read(4)
+        if head[:2] == b'\xff\xd8':
+            return read_jpeg_date(fh)
+        if head in (b'II*\x00', b'MM\x00*'):
+            return read_tiff_date(fh)
+    raise ValueError("not a JPEG or TIFF file")
+
+def read_jpeg_date(fh, base=0):
+    """Read the capture date from the Exif APP1 segment of a JPEG starting at `base` in fh."""
+    fh.seek(base)
+    if fh.read(2) != b'\xff\xd8':
+        raise ValueError("not a JPEG file")
+    tiff = _read_jpeg_app1(fh)
+    if tiff is None:
+        return None
+    return read_tiff_date(io.BytesIO(tiff))
+
+def _read_jpeg_app1(fh):
+    # Walk the marker segments up to the start of scan, returning the TIFF
+    # payload of the first Exif APP1 segment.
+    for _ in range(MAX_JPEG_SEGMENTS):
+        marker = fh.read(4)
+        if len(marker) < 4 or marker[0] != 0xFF:
+            raise ValueError("malformed JPEG marker")
+        code = marker[1]
+        length = struct.unpack('>H', marker[2:])[0]
+        if code == 0xDA or code == 0xD9:
+            return None
+        if length < 2:
+            raise ValueError("malformed JPEG segment")
+        if code == 0xE1:
+            payload = fh.read(length - 2)
+            if payload[:6] == b'Exif\x00\x00':
+                return payload[6:]
+        else:
+            fh.seek(length - 2, io.SEEK_CUR)
+    return None
+
+def read_tiff_date(fh, base=0):
+    """Read the capture date from a TIFF structure starting at `base` in fh."""
+    fh.seek(base)
+    header = fh.read(8)
+    if len(header) < 8:
+        raise ValueError("truncated TIFF header")
+    if header[:2] == b'II':
+        order = '<'
+    elif header[:2] == b'MM':
+        order = '>'
+    else:
+        raise ValueError("malformed TIFF header")
+    ifd0_offset = struct.unpack(order + 'I', header[4:8])[0]
+
+    ifd0 = _read_ifd(fh, base, ifd0_offset, order)
+    exif_offset = ifd0.get(EXIF_IFD_POINTER)
+    if exif_offset:
+        exif_ifd = _read_ifd(fh, base, exif_offset[2], order)
+        date_taken = _read_date(fh, base, exif_ifd.get(EXIF_DATE_TIME_ORIGINAL), order)
+        if date_taken:
+            return date_taken
+    # Some containers (CR3's CMT2 box) store the Exif IFD itself as IFD0
+    return (_read_date(fh, base, ifd0.get(EXIF_DATE_TIME_ORIGINAL), order)
+            or _read_date(fh, base, ifd0.get(EXIF_DATE_TIME), order))
+
+def _read_ifd(fh, base, offset, order):
+    # Map tag id -> (type, count, raw value/offset field as int)
+    fh.seek(base + offset)
+    raw_count = fh.read(2)
+    if len(raw_count) < 2:
+        raise ValueError("truncated IFD")
+    count = struct.unpack(order + 'H', raw_count)[0]
+    if count > MAX_IFD_ENTRIES:
+        raise ValueError("implausible IFD entry count")
+    data = fh.read(count * 12)
+    if len(data) < count * 12:
+        raise ValueError("truncated IFD")
+
+    entries = {}
+    for i in range(count):
+        tag, kind, n, value = struct.unpack_from(order + 'HHII', data, i * 12)
+        entries[tag] = (kind, n, value)
+    return entries
+
+def _read_date(fh, base, entry, order):
+    if not entry:
+        return None
+    kind, n, value = entry
+    if kind != TIFF_ASCII or n < 19:
+        return None
+    fh.seek(base + value)
+    return parse_exif_datetime(fh.read(19))
+
+def parse_exif_datetime(raw):
+    """Parse an EXIF 'YYYY:MM:DD HH:MM:SS' value, or None if it's blank/invalid."""
+    if isinstance(raw, bytes):
+        raw = raw.decode('ascii', 'replace')
+    try:
+        return datetime.strptime(raw.strip('\x00 ')[:19], "%Y:%m:%d %H:%M:%S")
+    except ValueError:
+        return None
@@ -0,0 +1,296 @@
+# Filename: photo_sorter_core/instrument.py
+# Optional run instrumentation. It records:
+#   - timing histograms per phase, per extractor and per move method
+#   - byte, stat and read counts
+#   - the slowest files
+#   - optionally, a cProfile and tracemalloc capture
+# Nothing is recorded unless a RunStats is started. Until then each hot path
+# checks one module global and moves on, so a normal run pays nothing.
+import bisect
+import heapq
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+# Histogram bucket upper bounds in seconds; one more bucket catches the rest
+BUCKET_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+DEFAULT_SLOWEST = 10
+# Functions and allocation sites kept from a profile / tracemalloc capture
+PROFILE_TOP = 25
+MEMORY_TOP = 15
+
+# The RunStats currently recording, or None. Hot paths read this once and
+# skip all bookkeeping when it's None.
+recorder = None
+
+_NOT_RECORDING = nullcontext()
+
+def timed_phase(name):
+    """Time a block as phase name on the recording RunStats; a no-op when none is."""
+    return recorder.phase(name) if recorder is not None else _NOT_RECORDING
+
+class Histogram:
+    """Count, total, max and bucketed distribution of durations in seconds."""
+
+    __slots__ = ('count', 'total', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding that share of samples (so an
+        # overestimate by at most one bucket), capped at the true max
+        wanted = fraction * self.count
+        seen = 0
+        for bound, count in zip(BUCKET_BOUNDS, self.buckets):
+            seen += count
+            if seen >= wanted:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        labels = [f"<={_ms(bound)}ms" for bound in BUCKET_BOUNDS] + [f">{_ms(BUCKET_BOUNDS[-1])}ms"]
+        return {
+            'count': self.count,
+            'total_seconds': round(self.total, 4),
+            'mean_ms': _ms(self.total / self.count) if self.count else 0,
+            'p50_ms': _ms(self.percentile(0.5)),
+            'p95_ms': _ms(self.percentile(0.95)),
+            'max_ms': _ms(self.max),
+            'buckets': {label: count for label, count in zip(labels, self.buckets) if count},
+        }
+
+class RunStats:
+    """Collects instrumentation for one run; start() it to begin recording.
+
+    profile captures cProfile data for the thread that calls start() (the
+    run's own thread: scanning, planning and moving). Metadata reads in
+    pool threads show up in the 'metadata' and 'extractor.*' histograms
+    instead. Worker processes (use_processes) aren't recorded at all.
+    profile_path, if given, also gets the raw profile for pstats or snakeviz.
+    trace_memory records peak traced memory and the top allocation sites.
+    """
+
+    def __init__(self, slowest=DEFAULT_SLOWEST, profile=False, trace_memory=False, profile_path=None):
+        self.slowest_count = slowest
+        self.profile = profile or bool(profile_path)
+        self.profile_path = profile_path
+        self.trace_memory = trace_memory
+        self.histograms = {}
+        self.counters = Counter()
+        self.phases = Counter()
+        self.started = None
+        self.stopped = None
+        self._slowest = []  # min-heap of (seconds, histogram name, path)
+        self._lock = threading.Lock()
+        self._io_at_start = None
+        self._io_at_stop = None
+        self._profiler = None
+        self._profile_result = None
+        self._memory_result = None
+
+    def start(self):
+        global recorder
+        if self.trace_memory:
+            import tracemalloc
+            tracemalloc.start()
+        if self.profile:
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        self._io_at_start = read_proc_io()
+        self.started = time.perf_counter()
+        recorder = self
+        return self
+
+    def stop(self):
+        """Stop recording; safe to call more than once."""
+        global recorder
+        if recorder is self:
+            recorder = None
+        if self.stopped is not None or self.started is None:
+            return self
+        self.stopped = time.perf_counter()
+        self._io_at_stop = read_proc_io()
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profile_result = _top_functions(self._profiler)
+            if self.profile_path:
+                self._profiler.dump_stats(self.profile_path)
+            self._profiler = None
+        if self.trace_memory:
+            import tracemalloc
+            if tracemalloc.is_tracing():
+                self._memory_result = _top_allocations(tracemalloc)
+                tracemalloc.stop()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def timed(self, name, seconds, path=None, nbytes=0):
+        """Add one duration to histogram name; with a path it competes for the slowest list."""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.add(seconds)
+            if nbytes:
+                self.counters[name + '.bytes'] += nbytes
+            if path is not None and self.slowest_count:
+                item = (seconds, name, path)
+                if len(self._slowest) < self.slowest_count:
+                    heapq.heappush(self._slowest, item)
+                elif seconds > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, item)
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    @property
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def slowest(self):
+        with self._lock:
+            items = sorted(self._slowest, reverse=True)
+        return [{'seconds': round(seconds, 4), 'kind': name, 'path': path} for seconds, name, path in items]
+
+    def as_dict(self):
+        """Everything recorded so far, ready for json.dumps; safe to call mid-run."""
+        with self._lock:
+            histograms = {name: histogram.as_dict() for name, histogram in sorted(self.histograms.items())}
+            counters = dict(sorted(self.counters.items()))
+            phases = {name: round(seconds, 4) for name, seconds in self.phases.items()}
+        result = {
+            'elapsed_seconds': round(self.elapsed, 4),
+            'phases': phases,
+            'counters': counters,
+            'histograms': histograms,
+            'slowest': self.slowest(),
+        }
+        io_now = self._io_at_stop or read_proc_io()
+        if self._io_at_start and io_now:
+            result['io'] = {
+                'read_syscalls': io_now['syscr'] - self._io_at_start['syscr'],
+                'write_syscalls': io_now['syscw'] - self._io_at_start['syscw'],
+                'bytes_read': io_now['rchar'] - self._io_at_start['rchar'],
+                'bytes_written': io_now['wchar'] - self._io_at_start['wchar'],
+            }
+        if self._profile_result is not None:
+            result['profile'] = self._profile_result
+        if self._memory_result is not None:
+            result['memory'] = self._memory_result
+        return result
+
+    def summary_lines(self, histograms=8, slowest=3):
+        """A few lines of text for a live stats panel."""
+        stats = self.as_dict()
+        counters = stats['counters']
+        lines = [f"Elapsed {stats['elapsed_seconds']:.1f}s"
+                 f"  stats {counters.get('stat', 0)}"
+                 f"  metadata reads {counters.get('read', 0)} ({counters.get('read.bytes', 0) / (1024 * 1024):.1f} MB)"]
+        if 'io' in stats:
+            io = stats['io']
+            lines.append(f"Syscalls: {io['read_syscalls']} reads, {io['write_syscalls']} writes"
+                         f"  ({io['bytes_read'] / (1024 * 1024):.1f} MB in, {io['bytes_written'] / (1024 * 1024):.1f} MB out)")
+        if stats['phases']:
+            lines.append("Phases: " + "  ".join(f"{name} {seconds:.2f}s" for name, seconds in stats['phases'].items()))
+        busiest = sorted(stats['histograms'].items(), key=lambda item: item[1]['total_seconds'], reverse=True)
+        for name, histogram in busiest[:histograms]:
+            lines.append(f"{name:<22} {histogram['count']:>7}  total {histogram['total_seconds']:>8.2f}s"
+                         f"  p50 {histogram['p50_ms']:>7}ms  p95 {histogram['p95_ms']:>7}ms  max {histogram['max_ms']:>8}ms")
+        for item in stats['slowest'][:slowest]:
+            lines.append(f"Slow: {item['seconds'] * 1000:.0f}ms {item['kind']} {os.path.basename(item['path'])}")
+        return lines
+
+class _Phase:
+    def __init__(self, stats, name):
+        self._stats = stats
+        self._name = name
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self._started
+        with self._stats._lock:
+            self._stats.phases[self._name] += seconds
+
+class CountingReader:
+    """Wraps a metadata reader, counting read calls and bytes on a RunStats."""
+
+    def __init__(self, fh, stats):
+        self._fh = fh
+        self._stats = stats
+        self.name = fh.name
+
+    def read(self, size=-1):
+        data = self._fh.read(size)
+        self._stats.count('read')
+        self._stats.count('read.bytes', len(data))
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._fh.seek(offset, whence)
+
+    def tell(self):
+        return self._fh.tell()
+
+    def __getattr__(self, name):
+        # Anything else a parser looks for (fileno, mode...) comes from the real reader
+        return getattr(self._fh, name)
+
+def read_proc_io():
+    """Linux per-process I/O counters (syscr, syscw, rchar, wchar...), or None."""
+    try:
+        with open('/proc/self/io') as fh:
+            return {key: int(value) for key, value in (line.split(':') for line in fh)}
+    except OSError:
+        return None
+
+def _ms(seconds):
+    return round(seconds * 1000, 3)
+
+def _top_functions(profiler):
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP]
+    return [{
+        'function': f"{os.path.basename(filename)}:{line}({function})",
+        'calls': calls,
+        'own_seconds': round(own, 4),
+        'cumulative_seconds': round(cumulative, 4),
+    } for (filename, line, function), (_, calls, own, cumulative, _) in rows]
+
+def _top_allocations(tracemalloc):
+    current, peak = tracemalloc.get_traced_memory()
+    top = tracemalloc.take_snapshot().statistics('lineno')[:MEMORY_TOP]
+    return {
+        'current_bytes': current,
+        'peak_bytes': peak,
+        'top': [{'where': f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+                 'bytes': stat.size, 'blocks': stat.count} for stat in top],
+    }
@@ -0,0 +1,203 @@
+# Filename: photo_sorter_core/io_backend.py
+# How the metadata readers get at file bytes. Header parsing is a string of
+# tiny seek+read pairs. On a network share each read is a round trip, so
+# there the file is fetched in a few large, bounded blocks instead. On a
+# local disk a plain buffered file measured fastest (benchmarks/io_backends.py):
+# setting up a memory map costs more than the handful of reads it saves, so
+# mmap is available but not picked automatically.
+import functools
+import mmap
+import os
+import re
+from collections import OrderedDict
+
+IO_AUTO = 'auto'          # plain file locally, block reads on network paths
+IO_MMAP = 'mmap'
+IO_BUFFERED = 'buffered'  # bounded block reads
+IO_FILE = 'file'          # a plain Python file object
+
+IO_BACKENDS = (IO_AUTO, IO_MMAP, IO_BUFFERED, IO_FILE)
+
+# Block reads: one request fetches this much, and at most this many blocks
+# are kept per file
+BLOCK_SIZE = 64 * 1024
+MAX_CACHED_BLOCKS = 8
+
+# Mount types treated as network file systems on Linux
+NETWORK_FILESYSTEMS = {
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'afs', '9p', 'ceph', 'glusterfs',
+    'fuse.sshfs', 'fuse.rclone', 'davfs', 'fuse.davfs2',
+}
+
+DRIVE_REMOTE = 4
+
+def open_reader(file_path, backend=None):
+    """Open file_path for metadata reading with the given IO_* backend.
+
+    The result supports read/seek/tell/close, has a .name, and is a context
+    manager. None or IO_AUTO picks per path.
+    """
+    backend = backend or IO_AUTO
+    if backend == IO_AUTO:
+        backend = IO_BUFFERED if is_network_path(file_path) else IO_FILE
+    if backend == IO_MMAP:
+        try:
+            return MmapReader(file_path)
+        except ValueError:
+            # Empty files can't be mapped
+            return open(file_path, 'rb')
+    if backend == IO_BUFFERED:
+        return BlockReader(file_path)
+    if backend == IO_FILE:
+        return open(file_path, 'rb')
+    raise ValueError(f"unknown I/O backend: {backend}")
+
+class MmapReader:
+    """File-like view of a read-only memory map; reads are plain slices."""
+
+    def __init__(self, file_path):
+        self.name = file_path
+        with open(file_path, 'rb') as fh:
+            self._map = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._size = len(self._map)
+        self._position = 0
+
+    def read(self, size=-1):
+        start = self._position
+        end = self._size if size is None or size < 0 else min(self._size, start + size)
+        self._position = max(start, end)
+        return self._map[start:end]
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class BlockReader:
+    """File-like reader that fetches BLOCK_SIZE blocks and keeps a few of them.
+
+    Parsers hopping between nearby offsets are served from memory, and each
+    miss costs one large read instead of many small ones.
+    """
+
+    def __init__(self, file_path, block_size=BLOCK_SIZE, max_blocks=MAX_CACHED_BLOCKS):
+        self.name = file_path
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.reads = 0
+        self._file = open(file_path, 'rb', buffering=0)
+        self._size = os.fstat(self._file.fileno()).st_size
+        self._blocks = OrderedDict()
+        self._position = 0
+
+    def _block(self, index):
+        block = self._blocks.get(index)
+        if block is not None:
+            self._blocks.move_to_end(index)
+            return block
+        start = index * self.block_size
+        self._file.seek(start)
+        chunks = []
+        wanted = max(0, min(self.block_size, self._size - start))
+        while wanted:
+            chunk = self._file.read(wanted)
+            self.reads += 1
+            if not chunk:
+                break
+            chunks.append(chunk)
+            wanted -= len(chunk)
+        block = b''.join(chunks)
+        self._blocks[index] = block
+        if len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+        return block
+
+    def read(self, size=-1):
+        remaining = self._size - self._position
+        if size is None or size < 0 or size > remaining:
+            size = max(0, remaining)
+        chunks = []
+        while size:
+            index, offset = divmod(self._position, self.block_size)
+            piece = self._block(index)[offset:offset + size]
+            if not piece:
+                break
+            chunks.append(piece)
+            self._position += len(piece)
+            size -= len(piece)
+        return b''.join(chunks)
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self._position
+        elif whence == os.SEEK_END:
+            offset += self._size
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._position = offset
+        return offset
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def is_network_path(file_path):
+    """Best guess at whether file_path lives on a network file system."""
+    path = os.path.abspath(file_path)
+    if os.name == 'nt':
+        if path.startswith('\\\\'):
+            return True
+        return _is_remote_drive(os.path.splitdrive(path)[0].upper())
+    for mount_point, fs_type in _mounts():
+        if path == mount_point or path.startswith(mount_point.rstrip('/') + '/'):
+            return fs_type in NETWORK_FILESYSTEMS
+    return False
+
+@functools.lru_cache(maxsize=None)
+def _is_remote_drive(drive):
+    try:
+        import ctypes
+        return ctypes.windll.kernel32.GetDriveTypeW(drive + '\\') == DRIVE_REMOTE
+    except (AttributeError, OSError):
+        return False
+
+@functools.lru_cache(maxsize=None)
+def _mounts():
+    # (mount point, type), longest mount point first so the innermost wins
+    mounts = []
+    try:
+        with open('/proc/self/mounts', encoding='utf-8', errors='replace') as fh:
+            for line in fh:
+                fields = line.split()
+                if len(fields) >= 3:
+                    # Spaces and such in mount points are octal-escaped
+                    mount_point = re.sub(r'\\([0-7]{3})', lambda m: chr(int(m.group(1), 8)), fields[1])
+                    mounts.append((mount_point, fields[2]))
+    except OSError:
+        return ()
+    return tuple(sorted(mounts, key=lambda mount: len(mount[0]), reverse=True))
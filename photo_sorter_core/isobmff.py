@@ -0,0 +1,84 @@
+# Filename: photo_sorter_core/isobmff.py
+# Reads the creation time of MP4/MOV (ISO base media / QuickTime) files from
+# moov/mvhd by seeking from box header to box header, so only a few hundred
+# bytes are read however large the clip is and wherever the moov box sits.
+import io
+import struct
+from datetime import datetime, timedelta
+
+# QuickTime and ISO-BMFF timestamps count seconds from 1904-01-01 UTC
+MAC_EPOCH = datetime(1904, 1, 1)
+
+# Sanity limit so a corrupt file can't make us walk forever
+MAX_BOXES = 4096
+
+def iter_boxes(fh, start, end):
+    """Yield (type, payload_start, box_end) for each box between start and end."""
+    position = start
+    for _ in range(MAX_BOXES):
+        if position + 8 > end:
+            return
+        fh.seek(position)
+        header = fh.read(8)
+        if len(header) < 8:
+            return
+        size, box_type = struct.unpack('>I4s', header)
+        header_size = 8
+        if size == 1:
+            # 64-bit size follows the type
+            large = fh.read(8)
+            if len(large) < 8:
+                raise ValueError("truncated box header")
+            size = struct.unpack('>Q', large)[0]
+            header_size = 16
+        elif size == 0:
+            # Box runs to the end of the enclosing space
+            size = end - position
+        if size < header_size:
+            raise ValueError("malformed box size")
+        yield box_type, position + header_size, min(position + size, end)
+        position += size
+    raise ValueError("too many boxes")
+
+def find_box(fh, path, start, end):
+    """Return (payload_start, box_end) of the box at path (e.g. [b'moov', b'mvhd']), or None."""
+    for box_type in path:
+        for found_type, payload_start, box_end in iter_boxes(fh, start, end):
+            if found_type == box_type:
+                start, end = payload_start, box_end
+                break
+        else:
+            return None
+    return start, end
+
+def read_mvhd_date(fh):
+    """Return the movie creation time (naive UTC) from moov/mvhd in fh.
+
+    Returns None if there is no movie header or the time was never set.
+    Raises ValueError if the box structure doesn't make sense, so the file
+    can be handed to a full parser.
+    """
+    end = fh.seek(0, io.SEEK_END)
+    found = find_box(fh, [b'moov', b'mvhd'], 0, end)
+    if found is None:
+        return None
+    payload_start, box_end = found
+
+    fh.seek(payload_start)
+    payload = fh.read(min(box_end - payload_start, 20))
+    if len(payload) < 4:
+        raise ValueError("truncated mvhd box")
+    if payload[0] == 1:
+        if len(payload) < 12:
+            raise ValueError("truncated mvhd box")
+        created = struct.unpack_from('>Q', payload, 4)[0]
+    else:
+        if len(payload) < 8:
+            raise ValueError("truncated mvhd box")
+        created = struct.unpack_from('>I', payload, 4)[0]
+    if not created:
+        return None
+    try:
+        return MAC_EPOCH + timedelta(seconds=created)
+    except OverflowError:
+        raise ValueError("implausible mvhd creation time")
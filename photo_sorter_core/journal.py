@@ -0,0 +1,209 @@
+# Filename: photo_sorter_core/journal.py
+# Write-ahead journal of planned and completed moves. Every run appends to
+# its own JSON Lines file under the destination folder, so a run that was
+# killed can be resumed without re-reading metadata, and any run can be
+# undone by renaming its files back.
+import errno
+import json
+import os
+from collections import namedtuple
+from datetime import datetime
+
+from .mover import copy_then_unlink, is_cross_device_error
+from .plan import entry_from_record, entry_to_record
+from .records import PlanTable
+
+JOURNAL_FOLDER = os.path.join('.photo_sorter', 'journal')
+
+# Planned moves are made durable in batches of this many, before any of
+# them is carried out; completed moves ride along on the same fsyncs.
+JOURNAL_SYNC_EVERY = 128
+
+STATUS_COMPLETE = 'complete'
+STATUS_CANCELLED = 'cancelled'
+STATUS_UNDONE = 'undone'
+STATUS_UNDO_INCOMPLETE = 'undo-incomplete'
+
+# planned: PlanEntry list in journal order
+# done: {source: target} for moves known to have finished
+# status: last recorded end status, or None if the run never finished
+JournalState = namedtuple('JournalState', ['header', 'planned', 'done', 'undone', 'status'])
+
+def journal_folder(destination_folder):
+    return os.path.join(destination_folder, JOURNAL_FOLDER)
+
+def list_journals(destination_folder):
+    """Journal paths for destination_folder, oldest first."""
+    folder = journal_folder(destination_folder)
+    try:
+        names = sorted(name for name in os.listdir(folder) if name.endswith('.jsonl'))
+    except FileNotFoundError:
+        return []
+    return [os.path.join(folder, name) for name in names]
+
+class MoveJournal:
+    """Appends plan/done records for one run and fsyncs them in batches."""
+
+    def __init__(self, path, header=None):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(path, 'a', encoding='utf-8')
+        self._unsynced = 0
+        if header is not None:
+            self._write(dict(header, type='run'))
+
+    @classmethod
+    def create(cls, destination_folder, folder_name_format):
+        started = datetime.now()
+        name = started.strftime('run-%Y%m%d-%H%M%S-%f.jsonl')
+        header = {
+            'destination': os.path.abspath(destination_folder),
+            'folder_format': folder_name_format,
+            'started': started.isoformat(timespec='seconds'),
+        }
+        return cls(os.path.join(journal_folder(destination_folder), name), header)
+
+    def journal_plan(self, entries):
+        """Yield entries back, each only after its plan record is on disk.
+
+        Entries are read ahead in batches so one fsync covers many moves.
+        Entries without a target are passed through unjournaled.
+        """
+        batch = []
+        for entry in entries:
+            batch.append(entry)
+            self.record_planned(entry)
+            if len(batch) >= JOURNAL_SYNC_EVERY:
+                self.sync()
+                yield from batch
+                batch = []
+        self.sync()
+        yield from batch
+
+    def record_planned(self, entry):
+        """Write entry's plan record without syncing; call sync() before moving it."""
+        if entry.target:
+            self._write(dict(entry_to_record(entry), type='plan'), sync=False)
+
+    def record_done(self, entry, method):
+        self._write({'type': 'done', 'source': entry.source, 'target': entry.target, 'method': method})
+
+    def record_undone(self, source):
+        self._write({'type': 'undone', 'source': source})
+
+    def close(self, status):
+        self._write({'type': 'end', 'status': status, 'at': datetime.now().isoformat(timespec='seconds')})
+        self.sync()
+        self._file.close()
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def _write(self, record, sync=True):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        self._unsynced += 1
+        if sync and self._unsynced >= JOURNAL_SYNC_EVERY:
+            self.sync()
+
+def read_journal(path):
+    header = None
+    # Keyed by source: a resumed run journals its remaining entries again
+    planned = {}
+    done = {}
+    undone = set()
+    status = None
+
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-write
+                continue
+            kind = record.get('type')
+            if kind == 'run':
+                header = record
+            elif kind == 'plan':
+                entry = entry_from_record(record)
+                planned[entry.source] = entry
+            elif kind == 'done':
+                done[record['source']] = record['target']
+            elif kind == 'undone':
+                undone.add(record['source'])
+            elif kind == 'end':
+                status = record['status']
+
+    if header is None:
+        raise ValueError(f"{path} is not a Photo Sorter journal")
+    return JournalState(header, list(planned.values()), done, undone, status)
+
+def _has_moved(entry):
+    # A move whose done record was lost in a crash shows up as a missing
+    # source with the target in place.
+    return not os.path.lexists(entry.source) and os.path.lexists(entry.target)
+
+def find_resumable_journal(destination_folder):
+    """Newest journal in destination_folder whose run didn't finish, or None."""
+    for path in reversed(list_journals(destination_folder)):
+        try:
+            state = read_journal(path)
+        except (OSError, ValueError):
+            continue
+        if state.status in (STATUS_COMPLETE, STATUS_UNDONE, STATUS_UNDO_INCOMPLETE):
+            return None
+        return path
+    return None
+
+def remaining_entries(state):
+    """Planned entries from a journal that still have to be moved, as a PlanTable."""
+    return PlanTable(entry for entry in state.planned
+                     if entry.source not in state.done and not _has_moved(entry) and os.path.lexists(entry.source))
+
+def undo_journal(path):
+    """Move every file from a journaled run back where it came from.
+
+    Yields (source, target, error) newest move first. Files are renamed
+    back; a move that crossed devices is copied back the same way.
+    """
+    state = read_journal(path)
+    moved = [entry for entry in state.planned
+             if entry.source not in state.undone and (entry.source in state.done or _has_moved(entry))]
+
+    journal = MoveJournal(path)
+    errors = 0
+    failed = True
+    try:
+        for entry in reversed(moved):
+            try:
+                if os.path.lexists(entry.source):
+                    raise FileExistsError(errno.EEXIST, "a file is already back at the original path", entry.source)
+                os.makedirs(os.path.dirname(entry.source), exist_ok=True)
+                try:
+                    os.rename(entry.target, entry.source)
+                except OSError as e:
+                    if not is_cross_device_error(e):
+                        raise
+                    copy_then_unlink(entry.target, entry.source)
+                journal.record_undone(entry.source)
+                yield entry.source, entry.target, None
+            except OSError as e:
+                errors += 1
+                yield entry.source, entry.target, e
+        failed = errors > 0
+    finally:
+        # An incomplete or interrupted undo can be retried; only the files
+        # still in place are tried again
+        journal.close(STATUS_UNDO_INCOMPLETE if failed else STATUS_UNDONE)
+
+def undo_last_run(destination_folder):
+    """Undo the newest run into destination_folder that hasn't been undone yet."""
+    for path in reversed(list_journals(destination_folder)):
+        try:
+            if read_journal(path).status == STATUS_UNDONE:
+                continue
+        except (OSError, ValueError):
+            continue
+        return undo_journal(path)
+    return iter(())
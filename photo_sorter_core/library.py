@@ -0,0 +1,218 @@
+# Filename: photo_sorter_core/library.py
+# Persistent index of what is already in a destination folder, so incoming
+# files can be checked against the existing library without walking it.
+# Lookups go by size first; content hashes are only computed, and then kept,
+# for the few library files that share an incoming file's size.
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from .dedup import EDGE_BYTES, edge_hash, full_hash
+from .mover import MOVE_RENAME
+from .plan import ACTION_SKIP
+from .scanner import iter_media_files
+
+LIBRARY_INDEX = os.path.join('.photo_sorter', 'library.sqlite')
+
+# Rows are committed in batches rather than per file
+COMMIT_EVERY = 500
+
+def open_library(destination_folder):
+    """Open the destination's library index, or return None if it can't be used here."""
+    try:
+        return LibraryIndex(destination_folder)
+    except (OSError, sqlite3.Error):
+        return None
+
+class LibraryIndex:
+    """SQLite map of library files (relative path -> size, mtime, date, hashes).
+
+    Paths are stored relative to the destination folder so the index stays
+    valid if the whole library is moved or mounted elsewhere.
+    """
+
+    def __init__(self, destination_folder, path=None):
+        self.root = os.path.abspath(destination_folder)
+        self.path = path or os.path.join(self.root, LIBRARY_INDEX)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " size INTEGER, mtime_ns INTEGER,"
+            " date_taken TEXT, edge_hash TEXT, content_hash TEXT)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_size ON files(size)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+
+    @property
+    def last_refreshed(self):
+        """When the library was last walked in full, or None if it never was."""
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = 'last_refreshed'").fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def add(self, file_path, stat_result=None, date_taken=None):
+        """Record a file now in the library; stats it if no stat is given."""
+        if stat_result is None:
+            stat_result = os.stat(file_path)
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, NULL, NULL)",
+                (self._relative(file_path), stat_result.st_size, stat_result.st_mtime_ns,
+                 date_taken.isoformat() if date_taken else None),
+            )
+            self._mark_dirty()
+
+    def record_moved(self, entry, method):
+        """Add a plan entry that has just been moved into the library."""
+        # A rename keeps size and mtime, so the scan's stat is still accurate
+        stat_result = entry.stat if method == MOVE_RENAME else None
+        try:
+            self.add(entry.target, stat_result, entry.date_taken)
+        except OSError:
+            pass
+
+    def remove(self, file_path):
+        with self._lock:
+            self._db.execute("DELETE FROM files WHERE path = ?", (self._relative(file_path),))
+            self._mark_dirty()
+
+    def refresh(self, extensions):
+        """Walk the library once and bring the index in line with it.
+
+        New or changed files are (re)added without hashes, and rows for files
+        that are gone are dropped. Returns (added, removed).
+        """
+        with self._lock:
+            known = {row[0]: (row[1], row[2]) for row in self._db.execute("SELECT path, size, mtime_ns FROM files")}
+
+        added = 0
+        seen = set()
+        skip_dirs = [os.path.join(self.root, os.path.dirname(LIBRARY_INDEX))]
+        for scanned in iter_media_files(self.root, extensions, recursive=True, skip_dirs=skip_dirs):
+            relative = self._relative(scanned.path)
+            seen.add(relative)
+            if known.get(relative) != (scanned.stat.st_size, scanned.stat.st_mtime_ns):
+                self.add(scanned.path, scanned.stat)
+                added += 1
+
+        removed = [(relative,) for relative in known.keys() - seen]
+        with self._lock:
+            self._db.executemany("DELETE FROM files WHERE path = ?", removed)
+            self._db.execute("INSERT OR REPLACE INTO meta VALUES ('last_refreshed', ?)",
+                             (datetime.now().isoformat(timespec='seconds'),))
+            self._db.commit()
+            self._pending = 0
+        return added, len(removed)
+
+    def find(self, file_path, stat_result, ignore=()):
+        """Return the library path of a file with the same content, or None.
+
+        Most files have no size match and cost a single indexed query. Rows
+        whose file has changed or disappeared since it was indexed are dropped.
+        """
+        size = stat_result.st_size
+        if not size:
+            return None
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path, mtime_ns, edge_hash, content_hash FROM files WHERE size = ?", (size,)
+            ).fetchall()
+        if not rows:
+            return None
+
+        file_path = os.path.abspath(file_path)
+        incoming_edge = incoming_content = None
+        for relative, mtime_ns, library_edge, library_content in rows:
+            library_path = os.path.join(self.root, relative)
+            if library_path == file_path or library_path in ignore:
+                continue
+            try:
+                library_stat = os.stat(library_path)
+                if (library_stat.st_size, library_stat.st_mtime_ns) != (size, mtime_ns):
+                    self.remove(library_path)
+                    continue
+
+                if incoming_edge is None:
+                    incoming_edge = edge_hash(file_path, size)
+                if library_edge is None:
+                    library_edge = edge_hash(library_path, size)
+                    self._store_hash(relative, 'edge_hash', library_edge)
+                if library_edge != incoming_edge:
+                    continue
+
+                # The edge hash covers small files completely
+                if size <= 2 * EDGE_BYTES:
+                    return library_path
+                if incoming_content is None:
+                    incoming_content = full_hash(file_path)
+                if library_content is None:
+                    library_content = full_hash(library_path)
+                    self._store_hash(relative, 'content_hash', library_content)
+                if library_content == incoming_content:
+                    return library_path
+            except FileNotFoundError:
+                self.remove(library_path)
+            except OSError:
+                continue
+        return None
+
+    def close(self):
+        with self._lock:
+            self._db.commit()
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _relative(self, file_path):
+        return os.path.relpath(os.path.abspath(file_path), self.root)
+
+    def _store_hash(self, relative, column, value):
+        with self._lock:
+            self._db.execute(f"UPDATE files SET {column} = ? WHERE path = ?", (value, relative))
+            self._mark_dirty()
+
+    def _mark_dirty(self):
+        self._pending += 1
+        if self._pending >= COMMIT_EVERY:
+            self._db.commit()
+            self._pending = 0
+
+def mark_already_sorted(plan, library, ignore=()):
+    """Turn plan entries for files already in the library into skips.
+
+    Library paths in ignore (typically the files of this same run, when the
+    source folder is inside the destination) never count as a match.
+    """
+    for entry in plan:
+        yield check_already_sorted(entry, library, ignore)
+
+def check_already_sorted(entry, library, ignore=()):
+    """mark_already_sorted for a single entry."""
+    match = None
+    # Duplicates within the run were already dealt with by mark_duplicates;
+    # their original may be in the library by now, moved moments ago
+    if entry.target and not entry.error and entry.stat is not None and not entry.duplicate_of:
+        try:
+            match = library.find(entry.source, entry.stat, ignore)
+        except OSError:
+            pass
+    if match:
+        return entry._replace(target=None, action=ACTION_SKIP, duplicate_of=match)
+    return entry
@@ -0,0 +1,121 @@
+# Filename: photo_sorter_core/metadata.py
+# Pillow and hachoir are slow to import, so they are loaded on first use
+# inside the readers below; a run that never needs them never pays for them.
+import os
+import time
+from datetime import datetime
+
+from . import instrument
+from .exif import EXIF_DATE_TIME, EXIF_DATE_TIME_ORIGINAL, read_exif_date, read_jpeg_date, read_tiff_date
+from .extractors import (
+    FORMAT_ASF, FORMAT_AVI, FORMAT_CR3, FORMAT_FLV, FORMAT_HEIF, FORMAT_ISOBMFF, FORMAT_JPEG,
+    FORMAT_MATROSKA, FORMAT_MPEG, FORMAT_RAF, FORMAT_TIFF, extract_date, register_extractor,
+)
+from .isobmff import read_mvhd_date
+from .raw import read_cr3_date, read_heif_date, read_raf_date
+
+# Where a resolved date came from
+SOURCE_EXIF = 'exif'
+SOURCE_VIDEO = 'video'
+SOURCE_MTIME = 'mtime'
+
+# Extensions tried when a file's first bytes aren't recognised
+exif_extensions = {
+    '.jpg', '.jpeg', '.tif', '.tiff',
+    # TIFF-based RAW formats
+    '.dng', '.nef', '.nrw', '.cr2', '.arw', '.srf', '.sr2', '.pef', '.orf', '.rw2', '.rwl',
+    '.3fr', '.erf', '.mef', '.mos', '.iiq', '.kdc', '.dcr', '.srw',
+}
+video_extensions = {'.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv', '.wmv', '.mpeg', '.mpg'}
+
+def get_exif_date_taken(file_path):
+    # Fast path: read only the EXIF header. Pillow is used only when the
+    # header reader can't make sense of the file.
+    try:
+        return read_exif_date(file_path)
+    except (OSError, ValueError):
+        pass
+
+    try:
+        with open(file_path, 'rb') as fh:
+            return read_pillow_exif_date(fh)
+    except OSError:
+        return None
+
+def read_pillow_exif_date(fh):
+    try:
+        from PIL import Image
+        with Image.open(fh) as image:
+            exif_data = image._getexif()
+        if not exif_data:
+            return None
+        date_taken = exif_data.get(EXIF_DATE_TIME_ORIGINAL) or exif_data.get(EXIF_DATE_TIME)
+        if date_taken:
+            return datetime.strptime(date_taken, "%Y:%m:%d %H:%M:%S")
+    except Exception:
+        return None
+
+def get_video_creation_date(file_path):
+    try:
+        from hachoir.metadata import extractMetadata
+        from hachoir.parser import createParser
+        parser = createParser(file_path)
+        if not parser:
+            return None
+        with parser:
+            metadata = extractMetadata(parser)
+        if metadata and metadata.has("creation_date"):
+            return metadata.get("creation_date").value
+    except Exception:
+        return None
+
+def read_hachoir_date(fh):
+    # hachoir opens the file itself by name
+    return get_video_creation_date(fh.name)
+
+# Built-in extractors, cheapest first for each format
+register_extractor('exif-jpeg', read_jpeg_date, SOURCE_EXIF, formats=[FORMAT_JPEG],
+                   extensions=['.jpg', '.jpeg'], cost=1)
+register_extractor('exif-tiff', read_tiff_date, SOURCE_EXIF, formats=[FORMAT_TIFF],
+                   extensions=exif_extensions - {'.jpg', '.jpeg'}, cost=1)
+register_extractor('raf', read_raf_date, SOURCE_EXIF, formats=[FORMAT_RAF], extensions=['.raf'], cost=1)
+register_extractor('cr3', read_cr3_date, SOURCE_EXIF, formats=[FORMAT_CR3], extensions=['.cr3'], cost=1)
+register_extractor('heif', read_heif_date, SOURCE_EXIF, formats=[FORMAT_HEIF],
+                   extensions=['.heic', '.heif', '.avif'], cost=1)
+register_extractor('pillow', read_pillow_exif_date, SOURCE_EXIF, formats=[FORMAT_JPEG],
+                   extensions=['.jpg', '.jpeg'], cost=50)
+register_extractor('mvhd', read_mvhd_date, SOURCE_VIDEO, formats=[FORMAT_ISOBMFF],
+                   extensions=['.mp4', '.mov', '.m4v', '.3gp'], cost=1)
+register_extractor('hachoir', read_hachoir_date, SOURCE_VIDEO,
+                   formats=[FORMAT_ISOBMFF, FORMAT_MATROSKA, FORMAT_AVI, FORMAT_ASF, FORMAT_FLV, FORMAT_MPEG],
+                   extensions=video_extensions, cost=100)
+
+# Resolve the date a file was taken: whatever metadata the file's format
+# carries (see extractors.py), and the file modification time as the last resort.
+def get_date_taken_with_source(file_path, mtime=None, io_backend=None):
+    stats = instrument.recorder
+    if stats is None:
+        return _resolve_date(file_path, mtime, io_backend)
+    started = time.perf_counter()
+    try:
+        return _resolve_date(file_path, mtime, io_backend)
+    finally:
+        stats.timed('metadata', time.perf_counter() - started, file_path)
+
+def _resolve_date(file_path, mtime, io_backend):
+    try:
+        date_taken, source = extract_date(file_path, io_backend)
+        if date_taken:
+            return date_taken, source
+    except OSError:
+        pass
+
+    # The scanner usually hands us the mtime already, saving a stat here
+    if mtime is None:
+        mtime = os.path.getmtime(file_path)
+        if instrument.recorder is not None:
+            instrument.recorder.count('stat')
+    return datetime.fromtimestamp(mtime), SOURCE_MTIME
+
+def get_date_taken(file_path):
+    return get_date_taken_with_source(file_path)[0]
@@ -0,0 +1,289 @@
+# Filename: photo_sorter_core/mover.py
+# Moves files into the sorted tree. Same-filesystem moves are a single
+# rename; cross-device moves use a tuned copy, size check and unlink, and
+# the run keeps count of which path each file took.
+import errno
+import os
+import shutil
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+from . import instrument
+
+MOVE_RENAME = 'rename'
+MOVE_COPY = 'copy'
+MOVE_LINK = 'link'
+
+# Buffered copy size when the kernel can't do the copy for us
+COPY_BUFFER_SIZE = 8 * 1024 * 1024
+
+# Cross-device copies of files up to this size run in parallel in move_many;
+# for big files a single stream already saturates the link.
+PARALLEL_COPY_MAX_SIZE = 16 * 1024 * 1024
+DEFAULT_COPY_WORKERS = 4
+
+# Errors meaning the filesystem can't hard link (FAT, some network shares)
+_LINK_UNSUPPORTED = {errno.EPERM, errno.ENOSYS, errno.EMLINK,
+                     getattr(errno, 'ENOTSUP', errno.EPERM),
+                     getattr(errno, 'EOPNOTSUPP', errno.EPERM)}
+
+# Windows reports a cross-volume rename as ERROR_NOT_SAME_DEVICE
+_WINERROR_NOT_SAME_DEVICE = 17
+
+# Errors meaning "this kernel copy isn't available here", so try the next one
+_KERNEL_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EBADF,
+                            getattr(errno, 'ENOTSUP', errno.EINVAL),
+                            getattr(errno, 'EOPNOTSUPP', errno.EINVAL)}
+
+class DirectoryCache:
+    """Remembers which destination folders already exist.
+
+    A run usually maps thousands of files onto a few hundred folders, so
+    after the first file each folder costs no syscalls at all.
+    """
+
+    def __init__(self):
+        self._ensured = set()
+        self._lock = threading.Lock()
+
+    def ensure(self, path):
+        if path in self._ensured:
+            return
+        os.makedirs(path, exist_ok=True)
+        if instrument.recorder is not None:
+            instrument.recorder.count('mkdir')
+        with self._lock:
+            self._ensured.add(path)
+
+    def ensure_all(self, paths):
+        """Create a whole planned folder set up front, parents first.
+
+        Failures are left for the per-file ensure to report against the
+        files that needed the folder.
+        """
+        for path in sorted(set(paths)):
+            try:
+                self.ensure(path)
+            except OSError:
+                continue
+
+    def __contains__(self, path):
+        return path in self._ensured
+
+    def __len__(self):
+        return len(self._ensured)
+
+class FileMover:
+    """Moves files into destination_folder, counting renames vs. copies."""
+
+    def __init__(self, destination_folder, target_folders=None, copy_workers=DEFAULT_COPY_WORKERS):
+        self.destination_dev = os.stat(destination_folder).st_dev
+        # Optional DirectoryCache; when set, target folders are created on demand
+        self.target_folders = target_folders
+        self.copy_workers = copy_workers
+        self.stats = Counter()
+        self._stats_lock = threading.Lock()
+
+    def move(self, source_path, target_path, source_stat=None, link_to=None):
+        """Move one file and return MOVE_RENAME, MOVE_COPY or MOVE_LINK.
+
+        With link_to (an identical file already in the destination), the
+        target is made a hard link to it and the source removed; if linking
+        isn't possible the file is moved normally.
+        """
+        stats = instrument.recorder
+        if stats is None:
+            return self._move(source_path, target_path, source_stat, link_to)
+        started = time.perf_counter()
+        try:
+            method = self._move(source_path, target_path, source_stat, link_to)
+        except OSError:
+            stats.count('move.failed')
+            raise
+        copied = source_stat.st_size if method == MOVE_COPY and source_stat is not None else 0
+        stats.timed('move.' + method, time.perf_counter() - started, source_path, nbytes=copied)
+        return method
+
+    def _move(self, source_path, target_path, source_stat, link_to):
+        if self.target_folders is not None:
+            self.target_folders.ensure(os.path.dirname(target_path))
+
+        if link_to:
+            try:
+                os.link(link_to, target_path)
+                os.unlink(source_path)
+                self._count(MOVE_LINK, 0)
+                return MOVE_LINK
+            except OSError:
+                pass
+
+        # A zero st_dev means the scan couldn't tell (DirEntry on Windows),
+        # so just try the rename and let the OS say if it crosses devices.
+        if source_stat is None or not source_stat.st_dev or source_stat.st_dev == self.destination_dev:
+            try:
+                rename_no_replace(source_path, target_path)
+                self._count(MOVE_RENAME, 0)
+                return MOVE_RENAME
+            except OSError as e:
+                if not is_cross_device_error(e):
+                    raise
+
+        self._count(MOVE_COPY, copy_then_unlink(source_path, target_path))
+        return MOVE_COPY
+
+    def _count(self, method, copied_bytes):
+        with self._stats_lock:
+            self.stats[method] += 1
+            self.stats['copied_bytes'] += copied_bytes
+
+    def is_cross_device(self, source_stat):
+        return bool(source_stat.st_dev) and source_stat.st_dev != self.destination_dev
+
+    def move_many(self, jobs):
+        """Move (key, source_path, target_path, source_stat, link_to) jobs, yielding (key, method, error) in order.
+
+        Cross-device copies of small files are spread over a thread pool so
+        the per-file latency of many small copies overlaps; everything else
+        runs inline. A link job whose original is still being copied waits
+        for that copy first. A job with no target_path is passed through
+        untouched with a method of None.
+        """
+        window = max(1, self.copy_workers) * 2
+        pending = deque()
+        # target_path -> future of each pooled copy not yet yielded
+        copying = {}
+        executor = ThreadPoolExecutor(max_workers=max(1, self.copy_workers), thread_name_prefix="copy")
+        try:
+            for key, source_path, target_path, source_stat, link_to in jobs:
+                if target_path is None:
+                    future = Future()
+                    future.set_result(None)
+                elif (self.copy_workers > 1 and not link_to and source_stat is not None
+                        and self.is_cross_device(source_stat) and source_stat.st_size <= PARALLEL_COPY_MAX_SIZE):
+                    future = executor.submit(self.move, source_path, target_path, source_stat)
+                    copying[target_path] = future
+                else:
+                    if link_to in copying:
+                        # Linking before the original has landed would fail and fall back to a copy
+                        wait([copying[link_to]])
+                    future = Future()
+                    try:
+                        future.set_result(self.move(source_path, target_path, source_stat, link_to))
+                    except Exception as e:
+                        future.set_exception(e)
+                pending.append((key, future, target_path))
+
+                while pending and (len(pending) >= window or pending[0][1].done()):
+                    yield _move_result(copying, *pending.popleft())
+
+            while pending:
+                yield _move_result(copying, *pending.popleft())
+        finally:
+            # Let copies already in flight finish so no file is left half-moved
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def summary(self):
+        text = f"{self.stats[MOVE_RENAME]} renamed, {self.stats[MOVE_COPY]} copied across devices"
+        if self.stats[MOVE_COPY]:
+            text += f" ({self.stats['copied_bytes'] / (1024 * 1024):.1f} MB)"
+        if self.stats[MOVE_LINK]:
+            text += f", {self.stats[MOVE_LINK]} duplicates hard-linked"
+        return text
+
+def _move_result(copying, key, future, target_path):
+    copying.pop(target_path, None)
+    try:
+        return key, future.result(), None
+    except Exception as e:
+        return key, None, e
+
+def is_cross_device_error(error):
+    return error.errno == errno.EXDEV or getattr(error, 'winerror', None) == _WINERROR_NOT_SAME_DEVICE
+
+def rename_no_replace(source_path, target_path):
+    """Rename source to target, raising FileExistsError instead of replacing a file.
+
+    Windows renames never replace. Elsewhere the file is hard linked to the
+    target, which fails if the target exists, and then unlinked; where hard
+    links aren't supported the target is checked just before a plain rename.
+    """
+    if os.name == 'nt':
+        os.rename(source_path, target_path)
+        return
+    try:
+        if os.link in os.supports_follow_symlinks:
+            # A symlink is moved as itself, as rename would
+            os.link(source_path, target_path, follow_symlinks=False)
+        else:
+            os.link(source_path, target_path)
+    except OSError as e:
+        if e.errno not in _LINK_UNSUPPORTED or isinstance(e, FileExistsError):
+            raise
+        if os.path.lexists(target_path):
+            raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), target_path)
+        os.rename(source_path, target_path)
+        return
+    os.unlink(source_path)
+
+def copy_then_unlink(source_path, target_path):
+    """Copy source to target via a temporary name, verify the size, then remove source."""
+    partial_path = target_path + '.partial'
+    try:
+        with open(source_path, 'rb') as src, open(partial_path, 'xb') as dst:
+            size = os.fstat(src.fileno()).st_size
+            _copy_contents(src, dst, size)
+            dst.flush()
+            copied = os.fstat(dst.fileno()).st_size
+        if copied != size:
+            raise OSError(errno.EIO, f"copied {copied} of {size} bytes", source_path)
+        shutil.copystat(source_path, partial_path)
+        rename_no_replace(partial_path, target_path)
+    except BaseException:
+        try:
+            os.unlink(partial_path)
+        except OSError:
+            pass
+        raise
+
+    os.unlink(source_path)
+    return copied
+
+def _copy_contents(src, dst, size):
+    # Kernel-side copies first; copy_file_range can even be done server-side on NFS/SMB
+    for kernel_copy in (_copy_file_range, _sendfile):
+        try:
+            if kernel_copy(src.fileno(), dst.fileno(), size):
+                return
+        except OSError as e:
+            if e.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+        src.seek(0)
+        dst.seek(0)
+        dst.truncate()
+    shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
+
+def _copy_file_range(src_fd, dst_fd, size):
+    if not hasattr(os, 'copy_file_range'):
+        return False
+    copied = 0
+    while copied < size:
+        sent = os.copy_file_range(src_fd, dst_fd, min(size - copied, 1 << 30))
+        if sent == 0:
+            break
+        copied += sent
+    return copied == size
+
+def _sendfile(src_fd, dst_fd, size):
+    # Only Linux can sendfile between regular files
+    if not hasattr(os, 'sendfile') or not sys.platform.startswith('linux'):
+        return False
+    copied = 0
+    while copied < size:
+        sent = os.sendfile(dst_fd, src_fd, copied, min(size - copied, 1 << 30))
+        if sent == 0:
+            break
+        copied += sent
+    return copied == size
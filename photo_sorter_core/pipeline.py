@@ -0,0 +1,78 @@
+# Filename: photo_sorter_core/pipeline.py
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import instrument
+from .cache import file_fingerprint
+from .metadata import get_date_taken_with_source
+
+# Metadata reads are I/O bound, so threads can outnumber cores. Process
+# pools only help when parsing itself is the bottleneck.
+DEFAULT_THREAD_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+DEFAULT_PROCESS_WORKERS = os.cpu_count() or 1
+
+# How many results each worker may read ahead of the consumer
+READ_AHEAD_PER_WORKER = 4
+
+def extract_dates(files, workers=None, use_processes=False, cache=None,
+                  extract=get_date_taken_with_source):
+    """Yield (scanned_file, date_taken, source, error) for each ScannedFile, in input order.
+
+    Dates are read concurrently by a bounded worker pool while the caller
+    consumes results one at a time. Only a small window of files is
+    submitted ahead of the consumer, so pausing the consumer also pauses
+    the workers and closing the generator cancels outstanding reads.
+
+    With a MetadataCache, unchanged files are answered from the cache
+    without touching the pool, and fresh results are written back to it.
+    """
+    if use_processes:
+        # Imported here since it pulls in multiprocessing, which thread runs never need
+        from concurrent.futures import ProcessPoolExecutor
+        workers = workers or DEFAULT_PROCESS_WORKERS
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        workers = workers or DEFAULT_THREAD_WORKERS
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="metadata")
+
+    window = workers * READ_AHEAD_PER_WORKER
+    pending = deque()
+
+    try:
+        for scanned in files:
+            pending.append(_submit(executor, extract, cache, scanned))
+            if len(pending) >= window:
+                yield _collect(cache, *pending.popleft())
+
+        while pending:
+            yield _collect(cache, *pending.popleft())
+    finally:
+        for _, future, _ in pending:
+            future.cancel()
+        # A process pool left to shut down in the background can race the
+        # interpreter's exit and write to closed pipes, so wait for its
+        # workers; only the few reads already running are waited on.
+        executor.shutdown(wait=use_processes, cancel_futures=True)
+
+def _submit(executor, extract, cache, scanned):
+    # Returns (scanned_file, future, store) where store says whether the
+    # result still has to be written to the cache.
+    if cache is not None:
+        cached = cache.get(scanned.path, file_fingerprint(scanned.stat))
+        if instrument.recorder is not None:
+            instrument.recorder.count('cache.hit' if cached else 'cache.miss')
+        if cached:
+            future = Future()
+            future.set_result(cached)
+            return scanned, future, False
+    return scanned, executor.submit(extract, scanned.path, scanned.stat.st_mtime), cache is not None
+
+def _collect(cache, scanned, future, store):
+    try:
+        date_taken, source = future.result()
+    except Exception as e:
+        return scanned, None, None, e
+    if store:
+        cache.put(scanned.path, file_fingerprint(scanned.stat), date_taken, source)
+    return scanned, date_taken, source, None
@@ -0,0 +1,227 @@
+# Filename: photo_sorter_core/plan.py
+# A sort is split into a plan phase (read every file's date and decide where
+# it goes) and an execute phase (apply the moves). Plans stream from one
+# phase to the other, or can be saved as JSON Lines to review, diff and
+# apply later, even on another machine.
+import json
+import os
+from datetime import datetime
+from functools import partial
+
+from .buckets import folder_namer
+from .metadata import get_date_taken_with_source
+from .pipeline import extract_dates
+from .records import HashSet, PlanEntry, PlanTable
+
+PLAN_FORMAT = 'photo-sorter-plan'
+PLAN_VERSION = 1
+
+# Leave the file where it is: a duplicate, or already sorted
+ACTION_SKIP = 'skip'
+# Replace the file with a hard link to duplicate_of at target
+ACTION_LINK = 'link'
+
+def build_plan(files, destination_folder, folder_name_format, workers=None, use_processes=False,
+               cache=None, controller=None, io_backend=None):
+    """Yield a PlanEntry for every ScannedFile, in order, as dates are read.
+
+    Pausing the controller pauses planning; cancelling ends the plan early.
+    io_backend picks how metadata is read (see io_backend.IO_*).
+    """
+    extract = partial(get_date_taken_with_source, io_backend=io_backend) if io_backend else get_date_taken_with_source
+    dated_files = extract_dates(files, workers=workers, use_processes=use_processes, cache=cache, extract=extract)
+    targets = TargetNames()
+    try:
+        for scanned, date_taken, date_source, error in dated_files:
+            if controller and not controller.wait_if_paused():
+                return
+            yield plan_entry(scanned, date_taken, date_source, error, destination_folder, folder_name_format, targets)
+    finally:
+        dated_files.close()
+
+def plan_entry(scanned, date_taken, date_source, error, destination_folder, folder_name_format, targets=None):
+    """The PlanEntry for one ScannedFile whose date has been read (or failed with error).
+
+    With a TargetNames, the target is renamed if the run or the destination
+    already has a file by that name. A file that is already at its target,
+    as when a folder is sorted in place, is skipped, with duplicate_of set
+    to its own path.
+    """
+    source = os.path.abspath(scanned.path)
+    size = scanned.stat.st_size
+    if error:
+        return PlanEntry(source, None, None, None, size, str(error), scanned.stat)
+    try:
+        folder_name = folder_namer(folder_name_format)(date_taken)
+    except ValueError as e:
+        return PlanEntry(source, None, date_taken, date_source, size, str(e), scanned.stat)
+    target = os.path.join(os.path.abspath(destination_folder), folder_name, scanned.name)
+    if os.path.normcase(target) == os.path.normcase(source):
+        return PlanEntry(source, None, date_taken, date_source, size, None, scanned.stat, ACTION_SKIP, source)
+    if targets is not None:
+        target = targets.claim(target)
+    return PlanEntry(source, target, date_taken, date_source, size, None, scanned.stat)
+
+class TargetNames:
+    """Keeps the targets of one plan distinct, so no file lands on another.
+
+    A recursive scan often finds the same name in several folders (two
+    cameras' IMG_0001.jpg); the second becomes 'IMG_0001 (1).jpg'. Names
+    already in the destination count as taken too; each target folder is
+    listed once, on first use. Names are compared ignoring case, as the
+    destination may be on a case-insensitive volume, and kept as hashes in
+    a HashSet, so a hash match only costs a needless suffix.
+    """
+
+    def __init__(self):
+        self._taken = HashSet()
+        self._listed = set()
+
+    def claim(self, target):
+        """target, or the first free 'name (n).ext' next to it; either way now taken."""
+        folder, name = os.path.split(target)
+        if folder not in self._listed:
+            self.add_listing(folder, folder_names(folder))
+        stem, extension = os.path.splitext(name)
+        candidate = target
+        number = 0
+        while not self._taken.add(hash(candidate.lower())):
+            number += 1
+            candidate = os.path.join(folder, f"{stem} ({number}){extension}")
+        return candidate
+
+    def is_listed(self, folder):
+        return folder in self._listed
+
+    def add_listing(self, folder, names):
+        """Take folder_names(folder), listed ahead of claim (e.g. on a pool thread)."""
+        self._listed.add(folder)
+        for name in names:
+            self._taken.add(hash(os.path.join(folder, name).lower()))
+
+def folder_names(folder):
+    """Names of the entries in folder; none if it doesn't exist yet."""
+    try:
+        with os.scandir(folder) as entries:
+            return [entry.name for entry in entries]
+    except OSError:
+        return []
+
+def target_folder(date_taken, destination_folder, folder_name_format):
+    """The folder plan_entry would put a file with this date in, or None if the date can't be formatted."""
+    try:
+        return os.path.join(os.path.abspath(destination_folder), folder_namer(folder_name_format)(date_taken))
+    except ValueError:
+        return None
+
+def execute_plan(entries, mover, controller=None, precreate_folders=True, journal=None, library=None):
+    """Apply a plan, yielding (entry, method, error) for each entry in order.
+
+    method is how the file moved (rename/copy/link), or None if it didn't. error
+    is the exception from the move, or the planning error message for
+    entries that had no target. With a full plan in a list or PlanTable, every
+    target folder is created up front so the move loop makes no directory calls.
+
+    With a MoveJournal, each entry is journaled before it moves and marked
+    done after, so an interrupted run can be resumed or undone. With a
+    LibraryIndex, every file that lands in the destination is added to it.
+    """
+    if precreate_folders and isinstance(entries, (list, PlanTable)) and mover.target_folders is not None:
+        mover.target_folders.ensure_all(os.path.dirname(entry.target) for entry in entries if entry.target)
+
+    if journal is not None:
+        entries = journal.journal_plan(entries)
+
+    def jobs():
+        for entry in entries:
+            if controller and not controller.checkpoint(entry.size):
+                return
+            link_to = entry.duplicate_of if entry.action == ACTION_LINK else None
+            yield entry, entry.source, entry.target, entry.stat, link_to
+
+    results = mover.move_many(jobs())
+    try:
+        for entry, method, error in results:
+            if entry.error:
+                error = entry.error
+            elif not error and method:
+                if journal is not None:
+                    journal.record_done(entry, method)
+                if library is not None:
+                    library.record_moved(entry, method)
+            yield entry, method, error
+    finally:
+        results.close()
+
+class PlanWriter:
+    """Writes a plan as JSON Lines: one header object, then one object per entry."""
+
+    def __init__(self, path, destination_folder, folder_name_format):
+        self.count = 0
+        self._file = open(path, 'w', encoding='utf-8')
+        header = {
+            'format': PLAN_FORMAT,
+            'version': PLAN_VERSION,
+            'destination': os.path.abspath(destination_folder),
+            'folder_format': folder_name_format,
+            'created': datetime.now().isoformat(timespec='seconds'),
+        }
+        self._file.write(json.dumps(header) + '\n')
+
+    def write(self, entry):
+        self._file.write(json.dumps(entry_to_record(entry), ensure_ascii=False) + '\n')
+        self.count += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def save_plan(path, entries, destination_folder, folder_name_format):
+    """Write all entries to path; returns how many were written."""
+    with PlanWriter(path, destination_folder, folder_name_format) as writer:
+        for entry in entries:
+            writer.write(entry)
+    return writer.count
+
+def load_plan(path):
+    """Read a saved plan, returning (header, entries) with the entries in a PlanTable."""
+    with open(path, encoding='utf-8') as fh:
+        header = json.loads(fh.readline() or 'null')
+        if not isinstance(header, dict) or header.get('format') != PLAN_FORMAT:
+            raise ValueError(f"{path} is not a Photo Sorter plan")
+        if header.get('version', 0) > PLAN_VERSION:
+            raise ValueError(f"{path} was written by a newer Photo Sorter (plan version {header['version']})")
+
+        entries = PlanTable()
+        for line in fh:
+            if not line.strip():
+                continue
+            entries.append(entry_from_record(json.loads(line)))
+    return header, entries
+
+def entry_to_record(entry):
+    record = {
+        'source': entry.source,
+        'target': entry.target,
+        'date': entry.date_taken.isoformat() if entry.date_taken else None,
+        'date_source': entry.date_source,
+        'size': entry.size,
+    }
+    if entry.error:
+        record['error'] = entry.error
+    if entry.action:
+        record['action'] = entry.action
+    if entry.duplicate_of:
+        record['duplicate_of'] = entry.duplicate_of
+    return record
+
+def entry_from_record(record):
+    date_taken = datetime.fromisoformat(record['date']) if record.get('date') else None
+    return PlanEntry(record['source'], record.get('target'), date_taken,
+                     record.get('date_source'), record.get('size', 0), record.get('error'),
+                     action=record.get('action'), duplicate_of=record.get('duplicate_of'))
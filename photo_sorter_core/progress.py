@@ -0,0 +1,207 @@
+# Filename: photo_sorter_core/progress.py
+# Streaming progress for a run. Work starts right away: the total grows as
+# the scan discovers files (walk_ahead keeps the scan running on its own
+# thread) and becomes exact once the scan finishes. Throughput and ETA are
+# smoothed so the UIs can show them without jitter.
+import threading
+import time
+from collections import deque, namedtuple
+
+from .records import FileTable
+
+# Rates are sampled at most this often and blended into a moving average;
+# a higher weight follows changes faster but jitters more
+RATE_SAMPLE_SECONDS = 0.5
+RATE_SMOOTHING = 0.3
+
+# walk_ahead keeps at most this many found files waiting for the consumer
+# (about 60 MB); past that the scan waits, and the total stops growing, until
+# the consumer catches up
+WALK_AHEAD_MAX_FILES = 1_000_000
+WALK_AHEAD_CHUNK = 4096
+
+# done/total: files finished / files known so far; total_final says whether
+# the scan is over. fraction is None until it is.
+ProgressSnapshot = namedtuple('ProgressSnapshot', [
+    'done', 'total', 'total_final', 'fraction', 'files_per_second', 'bytes_per_second', 'eta_seconds',
+])
+
+class ProgressTracker:
+    """Thread-safe counts, totals and smoothed rates for one run."""
+
+    def __init__(self, total=None):
+        self._lock = threading.Lock()
+        self.done = 0
+        self.done_bytes = 0
+        self.total = total or 0
+        self.total_final = total is not None
+        self.started = time.perf_counter()
+        self._sampled_at = self.started
+        self._sampled_done = 0
+        self._sampled_bytes = 0
+        self._files_per_second = None
+        self._bytes_per_second = None
+        self.stopped = None
+
+    def set_total(self, total=None, final=True):
+        """Set the total (None keeps the count found so far) and whether it's exact."""
+        with self._lock:
+            if total is not None:
+                self.total = total
+            self.total_final = final
+
+    def add_total(self, count=1):
+        """More files found by a scan still in progress."""
+        with self._lock:
+            self.total += count
+
+    def advance(self, nbytes=0):
+        """One file finished (moved, skipped or failed)."""
+        with self._lock:
+            self.done += 1
+            self.done_bytes += nbytes
+
+    def finish(self):
+        """The run completed: whatever was processed is all there was."""
+        with self._lock:
+            self.total = self.done
+            self.total_final = True
+        self.stop()
+
+    def stop(self):
+        """Freeze the rates at the run's overall average; safe to call more than once."""
+        with self._lock:
+            if self.stopped is not None:
+                return
+            self.stopped = time.perf_counter()
+            elapsed = self.stopped - self.started
+            if elapsed > 0:
+                self._files_per_second = self.done / elapsed
+                self._bytes_per_second = self.done_bytes / elapsed
+
+    def snapshot(self):
+        now = time.perf_counter()
+        with self._lock:
+            if self.done == 0:
+                # Rates count from the first finished file, not from the scan or dedup before it
+                self._sampled_at = now
+            elapsed = now - self._sampled_at
+            if elapsed >= RATE_SAMPLE_SECONDS and self.stopped is None:
+                files_rate = (self.done - self._sampled_done) / elapsed
+                bytes_rate = (self.done_bytes - self._sampled_bytes) / elapsed
+                if self._files_per_second is None:
+                    self._files_per_second, self._bytes_per_second = files_rate, bytes_rate
+                else:
+                    self._files_per_second += RATE_SMOOTHING * (files_rate - self._files_per_second)
+                    self._bytes_per_second += RATE_SMOOTHING * (bytes_rate - self._bytes_per_second)
+                self._sampled_at, self._sampled_done, self._sampled_bytes = now, self.done, self.done_bytes
+            total = max(self.total, self.done)
+            # Until the scan is over the share done would keep shrinking, so there is none
+            fraction = None
+            if self.total_final:
+                fraction = self.done / total if total else 1.0
+            eta = None
+            if self._files_per_second and total and self.stopped is None:
+                eta = (total - self.done) / self._files_per_second
+            return ProgressSnapshot(self.done, total, self.total_final, fraction,
+                                    self._files_per_second, self._bytes_per_second, eta)
+
+def format_progress(snapshot):
+    """One status line, e.g. '120 of 400 files  35.2 files/s  12.1 MB/s  ETA 0:08'."""
+    if snapshot.total_final:
+        line = f"{snapshot.done} of {snapshot.total} files"
+    else:
+        # The scan is still finding files, so the ETA is a lower bound
+        line = f"{snapshot.done} of {snapshot.total}+ files"
+    if snapshot.files_per_second is not None:
+        line += f"  {snapshot.files_per_second:.1f} files/s  {snapshot.bytes_per_second / (1024 * 1024):.1f} MB/s"
+    if snapshot.eta_seconds is not None and snapshot.done < snapshot.total:
+        line += f"  ETA {'' if snapshot.total_final else '>'}{format_duration(snapshot.eta_seconds)}"
+    return line
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+class FileQueue:
+    """FIFO of ScannedFile kept in FileTable chunks, about 60 bytes a file.
+
+    Not thread-safe; walk_ahead and walk_ahead_async lock around it.
+    """
+
+    def __init__(self):
+        self._chunks = deque()
+        self._position = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, scanned):
+        if not self._chunks or len(self._chunks[-1]) >= WALK_AHEAD_CHUNK:
+            self._chunks.append(FileTable())
+        self._chunks[-1].append(scanned)
+        self._count += 1
+
+    def popleft(self):
+        scanned = self._chunks[0][self._position]
+        self._position += 1
+        self._count -= 1
+        # A chunk is dropped once it's full and fully read
+        if self._position == WALK_AHEAD_CHUNK:
+            self._chunks.popleft()
+            self._position = 0
+        return scanned
+
+def walk_ahead(files, tracker, max_ahead=WALK_AHEAD_MAX_FILES):
+    """Yield from files while a background thread keeps scanning ahead.
+
+    Every file the scan finds grows tracker's total straight away, so the
+    estimate firms up long before the consumer reaches the end. Files not
+    yet taken wait in a compact FileQueue; the scan pauses while max_ahead
+    of them are queued. The total is marked final when the scan finishes;
+    a scan error is re-raised to the consumer once it has taken the files
+    found before it.
+    """
+    found = FileQueue()
+    ready = threading.Condition()
+    state = {'done': False, 'error': None, 'stop': False}
+
+    def scan():
+        try:
+            for scanned in files:
+                tracker.add_total()
+                with ready:
+                    while len(found) >= max_ahead and not state['stop']:
+                        ready.wait()
+                    if state['stop']:
+                        return
+                    found.append(scanned)
+                    ready.notify()
+        except Exception as e:
+            state['error'] = e
+        finally:
+            if not state['stop'] and state['error'] is None:
+                tracker.set_total()
+            with ready:
+                state['done'] = True
+                ready.notify()
+
+    threading.Thread(target=scan, daemon=True, name="scan-ahead").start()
+    try:
+        while True:
+            with ready:
+                while not found and not state['done']:
+                    ready.wait()
+                if not found:
+                    break
+                scanned = found.popleft()
+                ready.notify()
+            yield scanned
+        if state['error'] is not None:
+            raise state['error']
+    finally:
+        with ready:
+            state['stop'] = True
+            ready.notify()
@@ -0,0 +1,173 @@
+# Filename: photo_sorter_core/raw.py
+# Capture dates from camera RAW and HEIF files whose EXIF isn't at the top
+# of a plain TIFF: Fujifilm RAF, Canon CR3 and HEIC/HEIF/AVIF. Each reader
+# follows the container's own pointers to the EXIF block with a few small,
+# bounded reads and never touches image data. (TIFF-based RAW such as CR2,
+# NEF, ARW and DNG is read directly by exif.read_tiff_date.)
+import io
+import struct
+
+from .exif import read_jpeg_date, read_tiff_date
+from .isobmff import find_box, iter_boxes
+
+RAF_MAGIC = b'FUJIFILMCCD-RAW '
+# Offset of the embedded JPEG's (offset, length) pair in the RAF header
+RAF_JPEG_POINTER = 84
+
+# Canon's uuid box inside moov that holds the CMT metadata boxes
+CR3_METADATA_UUID = bytes.fromhex('85c0b687820f11e08111f4ce462b6a48')
+
+# HEIF item boxes larger than this aren't read
+MAX_ITEM_BOX_SIZE = 1024 * 1024
+
+def read_raf_date(fh):
+    """Date from the EXIF of the JPEG preview embedded in a RAF file."""
+    fh.seek(0)
+    if fh.read(len(RAF_MAGIC)) != RAF_MAGIC:
+        raise ValueError("not a RAF file")
+    fh.seek(RAF_JPEG_POINTER)
+    pointer = fh.read(8)
+    if len(pointer) < 8:
+        raise ValueError("truncated RAF header")
+    jpeg_offset, jpeg_length = struct.unpack('>II', pointer)
+    if not jpeg_offset or not jpeg_length:
+        return None
+    return read_jpeg_date(fh, jpeg_offset)
+
+def read_cr3_date(fh):
+    """Date from the CMT2 (Exif) or CMT1 (IFD0) TIFF blocks of a Canon CR3."""
+    end = fh.seek(0, io.SEEK_END)
+    moov = find_box(fh, [b'moov'], 0, end)
+    if moov is None:
+        return None
+
+    for box_type, payload_start, box_end in iter_boxes(fh, *moov):
+        if box_type != b'uuid':
+            continue
+        fh.seek(payload_start)
+        if fh.read(16) != CR3_METADATA_UUID:
+            continue
+        blocks = {found_type: start for found_type, start, _ in iter_boxes(fh, payload_start + 16, box_end)}
+        for name in (b'CMT2', b'CMT1'):
+            if name in blocks:
+                date_taken = read_tiff_date(fh, blocks[name])
+                if date_taken:
+                    return date_taken
+        return None
+    return None
+
+def read_heif_date(fh):
+    """Date from the Exif item of a HEIF/HEIC/AVIF file, located through meta/iinf and meta/iloc."""
+    end = fh.seek(0, io.SEEK_END)
+    meta = find_box(fh, [b'meta'], 0, end)
+    if meta is None:
+        return None
+    # meta is a full box: skip its version and flags
+    children = {box_type: (start, box_end) for box_type, start, box_end in iter_boxes(fh, meta[0] + 4, meta[1])}
+    if b'iinf' not in children or b'iloc' not in children:
+        return None
+
+    item_id = _find_exif_item(_read_box(fh, *children[b'iinf']))
+    if item_id is None:
+        return None
+    location = _find_item_location(_read_box(fh, *children[b'iloc']), item_id)
+    if location is None:
+        return None
+
+    # The Exif item starts with the offset from its own data to the TIFF header
+    offset, length = location
+    fh.seek(offset)
+    prefix = fh.read(4)
+    if len(prefix) < 4:
+        raise ValueError("truncated Exif item")
+    tiff_offset = struct.unpack('>I', prefix)[0]
+    if tiff_offset + 4 >= length:
+        raise ValueError("malformed Exif item")
+    return read_tiff_date(fh, offset + 4 + tiff_offset)
+
+def _read_box(fh, start, end):
+    if end - start > MAX_ITEM_BOX_SIZE:
+        raise ValueError("implausibly large HEIF item box")
+    fh.seek(start)
+    return fh.read(end - start)
+
+def _find_exif_item(iinf):
+    # Item info box: version/flags, entry count, then one infe box per item
+    if len(iinf) < 6:
+        raise ValueError("truncated iinf box")
+    version = iinf[0]
+    position = 6 if version == 0 else 8
+    reader = io.BytesIO(iinf)
+    for box_type, start, box_end in iter_boxes(reader, position, len(iinf)):
+        if box_type != b'infe' or box_end - start < 12:
+            continue
+        infe_version = iinf[start]
+        if infe_version == 2:
+            item_id, = struct.unpack_from('>H', iinf, start + 4)
+            item_type = iinf[start + 8:start + 12]
+        elif infe_version == 3:
+            item_id, = struct.unpack_from('>I', iinf, start + 4)
+            item_type = iinf[start + 10:start + 14]
+        else:
+            continue
+        if item_type == b'Exif':
+            return item_id
+    return None
+
+def _find_item_location(iloc, wanted_id):
+    # Item location box; returns the (file offset, length) of the item's
+    # first extent when it is stored directly in the file
+    try:
+        version = iloc[0]
+        offset_size, length_size = iloc[4] >> 4, iloc[4] & 0x0F
+        base_offset_size = iloc[5] >> 4
+        index_size = iloc[5] & 0x0F if version in (1, 2) else 0
+        position = 6
+        if version < 2:
+            item_count, = struct.unpack_from('>H', iloc, position)
+            position += 2
+        else:
+            item_count, = struct.unpack_from('>I', iloc, position)
+            position += 4
+
+        for _ in range(item_count):
+            if version < 2:
+                item_id, = struct.unpack_from('>H', iloc, position)
+                position += 2
+            else:
+                item_id, = struct.unpack_from('>I', iloc, position)
+                position += 4
+            construction_method = 0
+            if version in (1, 2):
+                construction_method = struct.unpack_from('>H', iloc, position)[0] & 0x0F
+                position += 2
+            position += 2  # data_reference_index
+            base_offset = _read_uint(iloc, position, base_offset_size)
+            position += base_offset_size
+            extent_count, = struct.unpack_from('>H', iloc, position)
+            position += 2
+
+            extents = []
+            for _ in range(extent_count):
+                position += index_size
+                extent_offset = _read_uint(iloc, position, offset_size)
+                position += offset_size
+                extent_length = _read_uint(iloc, position, length_size)
+                position += length_size
+                extents.append((base_offset + extent_offset, extent_length))
+
+            if item_id == wanted_id:
+                # Items built from idat or other items aren't plain file ranges
+                if construction_method != 0 or not extents:
+                    return None
+                return extents[0]
+    except (IndexError, struct.error):
+        raise ValueError("malformed iloc box")
+    return None
+
+def _read_uint(data, position, size):
+    if size == 0:
+        return 0
+    if position + size > len(data):
+        raise ValueError("truncated iloc box")
+    return int.from_bytes(data[position:position + size], 'big')
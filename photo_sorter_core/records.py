@@ -0,0 +1,335 @@
+# Filename: photo_sorter_core/records.py
+# Compact, column-backed storage for the work list and for whole plans, so
+# runs over millions of files fit in memory. Instead of a tuple, a path
+# string and an os.stat_result per file (several hundred bytes), each field
+# is one slot in a typed array:
+#   - folder prefixes are stored once and referenced by index
+#   - file names are packed into one byte buffer
+#   - dates are integers (microseconds since 0001-01-01)
+# Iterating yields ordinary ScannedFile / PlanEntry records, built on the fly.
+import os
+import sys
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+# One candidate file: full path, bare filename and its os.stat_result
+ScannedFile = namedtuple('ScannedFile', ['path', 'name', 'stat'])
+
+# source/target: absolute paths (target is None when the date couldn't be read)
+# date_taken/date_source: the resolved date and where it came from
+# size: bytes, used for throttling and reporting
+# error: why the file can't be moved, if it can't
+# stat: the scan's os.stat_result; only kept in memory, never saved
+# action: None for a plain move, or ACTION_SKIP/ACTION_LINK for duplicates
+# duplicate_of: target of the identical file this one duplicates
+PlanEntry = namedtuple('PlanEntry', ['source', 'target', 'date_taken', 'date_source', 'size', 'error', 'stat',
+                                     'action', 'duplicate_of'],
+                       defaults=(None, None, None, None))
+
+# What benchmarks/memory.py holds the tables to, per file
+BYTES_PER_FILE_BUDGET = 150
+
+_EPOCH = datetime.min
+_NO_DATE = -1
+_SAME_NAME = 0xFFFFFFFF
+# PlanTable flags: the low bits hold the action, this one says a stat was kept
+_HAS_STAT = 0x80
+
+_ENCODING = sys.getfilesystemencoding()
+_ENCODE_ERRORS = sys.getfilesystemencodeerrors()
+_SEPARATORS = os.sep + (os.altsep or '')
+
+class FileStat(namedtuple('FileStat', ['st_size', 'st_mtime_ns', 'st_ino', 'st_dev'])):
+    """The stat fields the engine uses, standing in for os.stat_result."""
+
+    __slots__ = ()
+
+    @property
+    def st_mtime(self):
+        # Computed as os.stat computes it, so the float matches to the last bit
+        seconds, nanoseconds = divmod(self.st_mtime_ns, 1000000000)
+        return seconds + nanoseconds * 1e-9
+
+class _Strings:
+    """Append-only string column: one byte buffer plus an end offset per string."""
+
+    def __init__(self):
+        self._data = bytearray()
+        self._ends = array('Q')
+
+    def append(self, text):
+        self._data += text.encode(_ENCODING, _ENCODE_ERRORS)
+        self._ends.append(len(self._data))
+        return len(self._ends) - 1
+
+    def __getitem__(self, index):
+        start = self._ends[index - 1] if index else 0
+        return self._data[start:self._ends[index]].decode(_ENCODING, _ENCODE_ERRORS)
+
+    def __len__(self):
+        return len(self._ends)
+
+    def nbytes(self):
+        return len(self._data) + self._ends.itemsize * len(self._ends)
+
+class _Prefixes:
+    """Interned strings (folder paths, date sources) referenced by a small index."""
+
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def index(self, value):
+        found = self._index.get(value)
+        if found is None:
+            found = self._index[value] = len(self.values)
+            self.values.append(value)
+        return found
+
+    def nbytes(self):
+        # Rough string object size; there are few of these
+        return sum(len(value or '') + 64 for value in self.values)
+
+def _split(path, name=None):
+    # (folder prefix with its trailing separator, file name): prefix + name == path
+    if name and path.endswith(name) and (len(path) == len(name) or path[-len(name) - 1] in _SEPARATORS):
+        return path[:len(path) - len(name)], name
+    folder, name = os.path.split(path)
+    return path[:len(path) - len(name)], name
+
+def date_to_int(value):
+    """A naive datetime as microseconds since 0001-01-01; exact and sortable."""
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+def int_to_date(value):
+    return _EPOCH + timedelta(microseconds=value)
+
+class HashSet:
+    """A set of hashes in one open-addressed array, 16 to 32 bytes per member.
+
+    Members are 64-bit ints such as hash(text); callers must treat a match as
+    "probably seen", since two texts can share a hash.
+    """
+
+    def __init__(self):
+        self._slots = array('q', bytes(8 * 16))
+        self._count = 0
+
+    def add(self, value):
+        """Add value; False if it was already there."""
+        # 0 marks an empty slot, so it shares a slot with 1
+        value = value or 1
+        mask = len(self._slots) - 1
+        index = value & mask
+        while self._slots[index]:
+            if self._slots[index] == value:
+                return False
+            index = (index + 1) & mask
+        self._slots[index] = value
+        self._count += 1
+        if self._count * 2 > len(self._slots):
+            self._grow()
+        return True
+
+    def __contains__(self, value):
+        value = value or 1
+        mask = len(self._slots) - 1
+        index = value & mask
+        while self._slots[index]:
+            if self._slots[index] == value:
+                return True
+            index = (index + 1) & mask
+        return False
+
+    def __len__(self):
+        return self._count
+
+    def _grow(self):
+        old = self._slots
+        self._slots = array('q', bytes(16 * len(old)))
+        self._count = 0
+        for value in old:
+            if value:
+                self.add(value)
+
+class FileTable:
+    """A list of ScannedFile stored as columns, about 60 bytes per file.
+
+    Supports append, len, indexing and iteration like the list it replaces.
+    `path in table` checks by absolute path, via an index built on first use,
+    so the table can be passed as mark_already_sorted's ignore set.
+    """
+
+    def __init__(self, files=()):
+        self._folders = _Prefixes()
+        self._folder = array('I')
+        self._names = _Strings()
+        self._size = array('q')
+        self._mtime_ns = array('q')
+        self._ino = array('Q')
+        self._dev = array('Q')
+        self._by_path = None
+        for scanned in files:
+            self.append(scanned)
+
+    def append(self, scanned):
+        folder, name = _split(scanned.path, scanned.name)
+        stat = scanned.stat
+        self._folder.append(self._folders.index(folder))
+        self._names.append(name)
+        self._size.append(stat.st_size)
+        self._mtime_ns.append(stat.st_mtime_ns)
+        self._ino.append(stat.st_ino)
+        self._dev.append(stat.st_dev)
+        self._by_path = None
+
+    def __len__(self):
+        return len(self._folder)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        name = self._names[index]
+        return ScannedFile(self._folders.values[self._folder[index]] + name, name,
+                           FileStat(self._size[index], self._mtime_ns[index], self._ino[index], self._dev[index]))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def total_size(self):
+        return sum(self._size)
+
+    def __contains__(self, path):
+        if self._by_path is None:
+            self._by_path = self._path_index()
+        keys, row_bits = self._by_path
+        path = os.path.abspath(path)
+        prefix = hash(path) >> row_bits
+        row_mask = (1 << row_bits) - 1
+        position = bisect_left(keys, prefix << row_bits)
+        while position < len(keys) and keys[position] >> row_bits == prefix:
+            if os.path.abspath(self[keys[position] & row_mask].path) == path:
+                return True
+            position += 1
+        return False
+
+    def _path_index(self):
+        # One sorted array of keys: the high bits of each absolute path's hash,
+        # with its row in the low bits. Matches are confirmed against the row,
+        # so the dropped hash bits only cost an extra comparison now and then.
+        row_bits = max(1, len(self).bit_length())
+        keys = array('q', sorted(hash(os.path.abspath(scanned.path)) >> row_bits << row_bits | index
+                                 for index, scanned in enumerate(self)))
+        return keys, row_bits
+
+    def nbytes(self):
+        """Approximate memory held by the columns, for budgeting."""
+        columns = (self._folder, self._size, self._mtime_ns, self._ino, self._dev)
+        return (sum(column.itemsize * len(column) for column in columns)
+                + self._names.nbytes() + self._folders.nbytes())
+
+class PlanTable:
+    """A list of PlanEntry stored as columns, about 80 bytes per entry.
+
+    Source and target folders are interned; a target keeps the source's file
+    name unless it was renamed (e.g. by quarantine). Rarely set fields
+    (errors, duplicate_of, timezone-aware dates) live in a side dict.
+    """
+
+    _ACTIONS = (None, 'skip', 'link')
+
+    def __init__(self, entries=()):
+        self._folders = _Prefixes()
+        self._sources = _Prefixes()
+        self._source_folder = array('I')
+        self._names = _Strings()
+        self._target_folder = array('i')
+        self._target_name = array('I')
+        self._renamed = _Strings()
+        self._date = array('q')
+        self._date_source = array('B')
+        self._flags = array('B')
+        self._size = array('q')
+        self._mtime_ns = array('q')
+        self._ino = array('Q')
+        self._dev = array('Q')
+        self._extra = {}
+        for entry in entries:
+            self.append(entry)
+
+    def append(self, entry):
+        index = len(self)
+        source_folder, name = _split(entry.source)
+        self._source_folder.append(self._folders.index(source_folder))
+        self._names.append(name)
+
+        if entry.target:
+            target_folder, target_name = _split(entry.target, name)
+            self._target_folder.append(self._folders.index(target_folder))
+            self._target_name.append(_SAME_NAME if target_name == name else self._renamed.append(target_name))
+        else:
+            self._target_folder.append(-1)
+            self._target_name.append(_SAME_NAME)
+
+        extra = {}
+        if entry.date_taken is None:
+            self._date.append(_NO_DATE)
+        elif entry.date_taken.tzinfo is None:
+            self._date.append(date_to_int(entry.date_taken))
+        else:
+            self._date.append(_NO_DATE)
+            extra['date_taken'] = entry.date_taken
+        self._date_source.append(self._sources.index(entry.date_source))
+        self._size.append(entry.size or 0)
+
+        stat = entry.stat
+        self._flags.append(self._ACTIONS.index(entry.action) | (_HAS_STAT if stat is not None else 0))
+        self._mtime_ns.append(stat.st_mtime_ns if stat is not None else 0)
+        self._ino.append(stat.st_ino if stat is not None else 0)
+        self._dev.append(stat.st_dev if stat is not None else 0)
+        if entry.error:
+            extra['error'] = entry.error
+        if entry.duplicate_of:
+            extra['duplicate_of'] = entry.duplicate_of
+        if extra:
+            self._extra[index] = extra
+
+    def __len__(self):
+        return len(self._source_folder)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        name = self._names[index]
+        target = None
+        if self._target_folder[index] >= 0:
+            target_name = self._target_name[index]
+            target = self._folders.values[self._target_folder[index]] + (
+                name if target_name == _SAME_NAME else self._renamed[target_name])
+        extra = self._extra.get(index, {})
+        date = self._date[index]
+        flags = self._flags[index]
+        stat = None
+        if flags & _HAS_STAT:
+            stat = FileStat(self._size[index], self._mtime_ns[index], self._ino[index], self._dev[index])
+        return PlanEntry(
+            self._folders.values[self._source_folder[index]] + name, target,
+            int_to_date(date) if date != _NO_DATE else extra.get('date_taken'),
+            self._sources.values[self._date_source[index]], self._size[index], extra.get('error'), stat,
+            self._ACTIONS[flags & ~_HAS_STAT], extra.get('duplicate_of'),
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def nbytes(self):
+        """Approximate memory held by the columns, for budgeting."""
+        columns = (self._source_folder, self._target_folder, self._target_name, self._date, self._date_source,
+                   self._flags, self._size, self._mtime_ns, self._ino, self._dev)
+        return (sum(column.itemsize * len(column) for column in columns) + self._names.nbytes()
+                + self._renamed.nbytes() + self._folders.nbytes() + self._sources.nbytes() + 250 * len(self._extra))
@@ -0,0 +1,380 @@
+# Filename: photo_sorter_core/runner.py
+# One sort from start to finish, shared by every front end: scan the source,
+# find duplicates, open the destination's library index, plan, then move
+# (or only save the plan, or a dry run). SortRun yields each file's result
+# and reports the steps before them through a notify callback; the CLI and
+# the UIs only render what it hands them.
+import os
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from .cache import open_cache
+from .control import RunController
+from .dedup import DEFAULT_HASH_WORKERS, DUPLICATES_KEEP, DUPLICATES_SKIP, find_duplicates, mark_duplicates
+from .instrument import timed_phase
+from .journal import STATUS_CANCELLED, STATUS_COMPLETE, MoveJournal
+from .library import LIBRARY_INDEX, mark_already_sorted, open_library
+from .mover import DirectoryCache, FileMover
+from .plan import ACTION_SKIP, PlanWriter, build_plan, execute_plan
+from .progress import walk_ahead
+from .records import FileTable
+from .scanner import iter_media_files
+
+# notify(event, value) events, in the order a run reaches them:
+# the scan started; value is True if sorting waits for it to finish (dedup needs every file)
+EVENT_SCAN = 'scan'
+# the scan finished before sorting; value is how many files it found
+EVENT_SCANNED = 'scanned'
+# hashing possible duplicates started
+EVENT_DEDUP = 'dedup'
+# value is how many files are duplicates of another file of the run
+EVENT_DUPLICATES = 'duplicates'
+# first run into this destination: the files already there are being indexed
+EVENT_INDEXING = 'indexing'
+# value is how many files were indexed, or the OSError that stopped indexing
+EVENT_INDEXED = 'indexed'
+
+class PhaseTimer:
+    """Wall-clock seconds per phase. Streaming phases are timed by how long
+    the consumer waits on each item, so they can overlap a later phase."""
+
+    def __init__(self):
+        self.seconds = Counter()
+
+    def start(self, phase):
+        return _Phase(self.seconds, phase)
+
+    def iterate(self, phase, iterable):
+        iterator = iter(iterable)
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self.seconds[phase] += time.perf_counter() - started
+                yield item
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+
+    async def aiterate(self, phase, iterable):
+        iterator = iterable.__aiter__()
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    item = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    self.seconds[phase] += time.perf_counter() - started
+                yield item
+        finally:
+            if hasattr(iterator, 'aclose'):
+                await iterator.aclose()
+
+    def as_dict(self):
+        return {phase: round(seconds, 4) for phase, seconds in self.seconds.items()}
+
+class _Phase:
+    def __init__(self, seconds, phase):
+        self._seconds = seconds
+        self._phase = phase
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self._seconds[self._phase] += time.perf_counter() - self._started
+
+class SortRun:
+    """One sort of source into dated folders under destination.
+
+    results() runs it on threads and results_async() on the asyncio engine;
+    both yield (entry, method, error) for every file in plan order, as
+    execute_plan does. With dry_run nothing moves, and with plan_path the
+    plan is saved there instead of applied. A ProgressTracker, if given, is
+    kept up to date, and the scan then runs ahead of sorting when it can.
+    After the run, mover has the move counts (None if nothing was moved)
+    and timer the seconds spent in each phase.
+    """
+
+    def __init__(self, source, destination, folder_name_format, extensions, recursive=False, max_depth=None,
+                 include=None, exclude=None, duplicate_policy=DUPLICATES_SKIP, dedup_workers=DEFAULT_HASH_WORKERS,
+                 workers=None, use_processes=False, io_backend=None, use_cache=True, use_library=True,
+                 dry_run=False, plan_path=None, controller=None, progress=None, notify=None):
+        self.source = source
+        self.destination = destination
+        self.folder_name_format = folder_name_format
+        self.extensions = extensions
+        self.recursive = recursive
+        self.max_depth = max_depth
+        self.include = include
+        self.exclude = exclude
+        self.duplicate_policy = duplicate_policy
+        self.dedup_workers = dedup_workers
+        self.workers = workers
+        self.use_processes = use_processes
+        self.io_backend = io_backend
+        self.use_cache = use_cache
+        self.use_library = use_library
+        self.dry_run = dry_run
+        self.plan_path = plan_path
+        self.controller = controller or RunController()
+        self.progress = progress
+        self.notify = notify or (lambda event, value=None: None)
+        # A ready plan to apply (see for_plan) instead of scanning source
+        self.plan = None
+        self.journal = None
+        # Files found, once a full scan has counted them
+        self.files = None
+        # Entries written to plan_path
+        self.saved = 0
+        self.mover = None
+        self.timer = PhaseTimer()
+
+    @classmethod
+    def for_plan(cls, plan, destination, folder_name_format=None, journal=None, **options):
+        """A run that applies plan (a saved plan, or a journal's remaining entries).
+
+        journal is the MoveJournal to keep recording into; by default a new
+        one is created.
+        """
+        run = cls(None, destination, folder_name_format, (), **options)
+        run.plan = plan
+        run.journal = journal
+        return run
+
+    @property
+    def cancelled(self):
+        return self.controller.is_cancelled
+
+    def results(self):
+        """Run the sort on threads, yielding (entry, method, error) per file."""
+        library = cache = None
+        closing = []
+        finished = False
+        try:
+            if self.plan is None:
+                files, duplicates = self._scan()
+                with self._phase('index'):
+                    library = self.open_library()
+                cache = open_cache() if self.use_cache else None
+                planned = build_plan(files, self.destination, self.folder_name_format, workers=self.workers,
+                                     use_processes=self.use_processes, cache=cache, controller=self.controller,
+                                     io_backend=self.io_backend)
+                plan = mark_duplicates(planned, duplicates, self.duplicate_policy, self.destination)
+                if library is not None:
+                    plan = mark_already_sorted(plan, library, ignore=self._this_run(files))
+                plan = self.timer.iterate('plan', plan)
+                closing += [plan, planned]
+            else:
+                library = self.open_library()
+                plan = self.plan
+                self._planned(plan)
+
+            if self.dry_run:
+                results = ((entry, None, entry.error) for entry in plan)
+            elif self.plan_path:
+                results = self._save(plan)
+            else:
+                self.mover = FileMover(self.destination, target_folders=DirectoryCache())
+                if self.journal is None:
+                    self.journal = MoveJournal.create(self.destination, self.folder_name_format)
+                results = execute_plan(plan, self.mover, self.controller, journal=self.journal, library=library)
+            closing.insert(0, results)
+
+            for result in results:
+                self._advance(result)
+                yield result
+            finished = True
+        finally:
+            for generator in closing:
+                generator.close()
+            if self.journal is not None and not self.dry_run and not self.plan_path:
+                # Without an end record the run counts as interrupted and can be resumed
+                self.journal.close(self._journal_status(finished))
+            if library is not None:
+                library.close()
+            if cache is not None:
+                cache.close()
+        self._finish()
+
+    async def results_async(self, io_concurrency=None):
+        """results() on the asyncio engine, keeping io_concurrency file operations in flight.
+
+        Every blocking call (scandir, stat, reads, moves, SQLite, journal
+        writes) runs on a thread pool, so this can run on a UI's event loop.
+        """
+        # Imported here so thread runs never load asyncio
+        from .aio import (
+            DEFAULT_IO_CONCURRENCY, AsyncFileIO, build_plan_async, collect_files_async, execute_plan_async,
+            iter_media_files_async, mark_already_sorted_async, mark_duplicates_async, walk_ahead_async,
+        )
+        async with AsyncFileIO(io_concurrency or DEFAULT_IO_CONCURRENCY) as io:
+            library = cache = None
+            closing = []
+            finished = False
+            try:
+                if self.plan is None:
+                    files = iter_media_files_async(self.source, self.extensions, io, recursive=self.recursive,
+                                                   max_depth=self.max_depth, include=self.include,
+                                                   exclude=self.exclude, skip_dirs=[self.destination])
+                    duplicates = {}
+                    self.notify(EVENT_SCAN, self._needs_full_scan())
+                    if self._needs_full_scan():
+                        with self._phase('scan'):
+                            files = await collect_files_async(files)
+                        self._scanned(files)
+                        self.notify(EVENT_DEDUP)
+                        with self._phase('dedup'):
+                            duplicates = await io.run(find_duplicates, files, self.dedup_workers)
+                        self.notify(EVENT_DUPLICATES, len(duplicates))
+                    elif self.progress is not None:
+                        files = walk_ahead_async(files, self.progress)
+
+                    with self._phase('index'):
+                        library = await io.run(self.open_library)
+                    cache = await io.run(open_cache) if self.use_cache else None
+                    planned = build_plan_async(files, self.destination, self.folder_name_format, io, cache=cache,
+                                               controller=self.controller, io_backend=self.io_backend)
+                    plan = mark_duplicates_async(planned, duplicates, self.duplicate_policy, self.destination)
+                    if library is not None:
+                        plan = mark_already_sorted_async(plan, library, io, ignore=self._this_run(files))
+                    plan = self.timer.aiterate('plan', plan)
+                    closing += [plan, planned]
+                else:
+                    library = await io.run(self.open_library)
+                    self._planned(self.plan)
+                    plan = _aiter(self.plan)
+
+                if self.dry_run:
+                    results = _dry_run_async(plan)
+                elif self.plan_path:
+                    results = self._save_async(plan, io)
+                else:
+                    self.mover = await io.run(FileMover, self.destination, DirectoryCache())
+                    if self.journal is None:
+                        self.journal = await io.run(MoveJournal.create, self.destination, self.folder_name_format)
+                    results = execute_plan_async(plan, self.mover, io, self.controller, journal=self.journal,
+                                                 library=library)
+                closing.insert(0, results)
+
+                async for result in results:
+                    self._advance(result)
+                    yield result
+                finished = True
+            finally:
+                for generator in closing:
+                    await generator.aclose()
+                if self.journal is not None and not self.dry_run and not self.plan_path:
+                    await io.run(self.journal.close, self._journal_status(finished))
+                if library is not None:
+                    await io.run(library.close)
+                if cache is not None:
+                    await io.run(cache.close)
+        self._finish()
+
+    def open_library(self):
+        """The destination's LibraryIndex, indexed on first use, or None if the run doesn't use one.
+
+        A run that moves nothing reads an existing index but never creates one.
+        """
+        if not self.use_library:
+            return None
+        if (self.dry_run or self.plan_path) and not os.path.exists(os.path.join(self.destination, LIBRARY_INDEX)):
+            return None
+        library = open_library(self.destination)
+        if library is not None and library.last_refreshed is None:
+            self.notify(EVENT_INDEXING)
+            try:
+                added, _ = library.refresh(self.extensions)
+            except OSError as e:
+                self.notify(EVENT_INDEXED, e)
+            else:
+                self.notify(EVENT_INDEXED, added)
+        return library
+
+    def _scan(self):
+        # (files, duplicates): a FileTable when dedup needs the whole list, else a stream
+        files = iter_media_files(self.source, self.extensions, recursive=self.recursive, max_depth=self.max_depth,
+                                 include=self.include, exclude=self.exclude, skip_dirs=[self.destination])
+        self.notify(EVENT_SCAN, self._needs_full_scan())
+        if not self._needs_full_scan():
+            # Sorting starts with the first file found while the scan carries on ahead of it
+            return (walk_ahead(files, self.progress) if self.progress is not None else files), {}
+
+        with self._phase('scan'):
+            files = FileTable(files)
+        self._scanned(files)
+        self.notify(EVENT_DEDUP)
+        with self._phase('dedup'):
+            duplicates = find_duplicates(files, workers=self.dedup_workers)
+        self.notify(EVENT_DUPLICATES, len(duplicates))
+        return files, duplicates
+
+    def _needs_full_scan(self):
+        return self.duplicate_policy != DUPLICATES_KEEP
+
+    def _scanned(self, files):
+        self.files = len(files)
+        if self.progress is not None:
+            self.progress.set_total(self.files)
+        self.notify(EVENT_SCANNED, self.files)
+
+    def _planned(self, plan):
+        if self.progress is not None:
+            self.progress.set_total(len(plan))
+
+    def _this_run(self, files):
+        # Files of this run that sit inside the destination don't count as sorted
+        return files if isinstance(files, FileTable) else ()
+
+    def _save(self, plan):
+        with PlanWriter(self.plan_path, self.destination, self.folder_name_format) as writer:
+            for entry in plan:
+                writer.write(entry)
+                self.saved = writer.count
+                yield entry, None, entry.error
+
+    async def _save_async(self, plan, io):
+        writer = await io.run(PlanWriter, self.plan_path, self.destination, self.folder_name_format)
+        try:
+            async for entry in plan:
+                # Buffered, so only the occasional write reaches the file
+                writer.write(entry)
+                self.saved = writer.count
+                yield entry, None, entry.error
+        finally:
+            await io.run(writer.close)
+
+    def _advance(self, result):
+        if self.progress is None:
+            return
+        entry, method, error = result
+        moved = not error and not entry.error and entry.action != ACTION_SKIP
+        self.progress.advance(entry.size or 0 if moved else 0)
+
+    def _journal_status(self, finished):
+        return STATUS_COMPLETE if finished and not self.cancelled else STATUS_CANCELLED
+
+    def _finish(self):
+        if self.progress is not None and not self.cancelled:
+            self.progress.finish()
+
+    @contextmanager
+    def _phase(self, name):
+        with timed_phase(name), self.timer.start(name):
+            yield
+
+async def _aiter(items):
+    for item in items:
+        yield item
+
+async def _dry_run_async(plan):
+    async for entry in plan:
+        yield entry, None, entry.error
@@ -0,0 +1,125 @@
+# Filename: photo_sorter_core/scanner.py
+# Directory enumeration built on os.scandir, so each file costs one stat at
+# most and the type check comes for free from the directory listing.
+import os
+import time
+from fnmatch import fnmatch
+
+from . import instrument
+from .records import FileTable, ScannedFile
+
+# What MediaFilter.match makes of a directory entry
+ENTRY_DIR = 'dir'
+ENTRY_FILE = 'file'
+
+def iter_media_files(folder, extensions, recursive=False, max_depth=None,
+                     include=None, exclude=None, skip_dirs=()):
+    """Lazily yield a ScannedFile for every media file under folder.
+
+    Without recursive only folder itself is listed. With it, subfolders
+    are walked depth-first down to max_depth levels (None for no limit),
+    yielding files as each directory is read so callers can start work
+    before the walk finishes.
+
+    include/exclude are glob patterns matched against both the entry name
+    and its path relative to folder (with '/' separators). Excluded
+    directories are not descended into; include only applies to files.
+    skip_dirs are directories never to descend into, e.g. a destination
+    that lives inside the source tree.
+    """
+    media = MediaFilter(extensions, recursive, max_depth, include, exclude, skip_dirs)
+    stack = [(folder, '', 0)]
+
+    while stack:
+        directory, relative_dir, depth = stack.pop()
+        subdirs = []
+        stats = instrument.recorder
+        if stats is not None:
+            started = time.perf_counter()
+            stat_calls = 0
+
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            # An unreadable subfolder shouldn't end the whole walk
+            if depth == 0:
+                raise
+            continue
+
+        with entries:
+            for entry in entries:
+                relative_path = relative_dir + entry.name
+                kind = media.match(entry, relative_path, depth)
+                if kind == ENTRY_DIR:
+                    subdirs.append((entry.path, relative_path + '/', depth + 1))
+                    continue
+                if kind != ENTRY_FILE:
+                    continue
+                try:
+                    scanned = ScannedFile(entry.path, entry.name, entry.stat())
+                except OSError:
+                    # Vanished or unreadable between listing and stat
+                    continue
+
+                if stats is None:
+                    yield scanned
+                else:
+                    # Time spent by the consumer doesn't count towards the folder
+                    stat_calls += 1
+                    suspended = time.perf_counter()
+                    yield scanned
+                    started += time.perf_counter() - suspended
+
+        if stats is not None:
+            stats.timed('scan.folder', time.perf_counter() - started, directory)
+            stats.count('stat', stat_calls)
+
+        # Descend after the listing is closed so only one handle is open at a time
+        stack.extend(reversed(subdirs))
+
+def scan_media_files(folder, extensions, **options):
+    """Enumerate folder once, returning the work list (its length is the total) as a compact FileTable."""
+    return FileTable(iter_media_files(folder, extensions, **options))
+
+class MediaFilter:
+    """Decides, entry by entry, what a walk over a folder keeps.
+
+    Takes the options of iter_media_files; match() tells a subfolder to
+    descend into (ENTRY_DIR) or a media file to take (ENTRY_FILE) from
+    anything else (None). Shared by the plain and the async walkers.
+    """
+
+    def __init__(self, extensions, recursive=False, max_depth=None, include=None, exclude=None, skip_dirs=()):
+        self.extensions = extensions
+        self.recursive = recursive
+        self.max_depth = max_depth
+        self.include = include
+        self.exclude = exclude
+        self.skip_dirs = {os.path.normcase(os.path.realpath(d)) for d in skip_dirs}
+
+    def match(self, entry, relative_path, depth):
+        """Classify a DirEntry found depth levels below the walk's root."""
+        if self.exclude and _matches(entry.name, relative_path, self.exclude):
+            return None
+        try:
+            if entry.is_dir():
+                if not self.recursive or (self.max_depth is not None and depth >= self.max_depth):
+                    return None
+                if self.skip_dirs and os.path.normcase(os.path.realpath(entry.path)) in self.skip_dirs:
+                    return None
+                return ENTRY_DIR
+
+            # Filter on the name first; it needs no syscall at all
+            if os.path.splitext(entry.name)[1].lower() not in self.extensions:
+                return None
+            if self.include and not _matches(entry.name, relative_path, self.include):
+                return None
+            if not entry.is_file():
+                return None
+        except OSError:
+            # Vanished or unreadable since the listing
+            return None
+        return ENTRY_FILE
+
+def _matches(name, relative_path, patterns):
+    return any(fnmatch(name, pattern) or fnmatch(relative_path, pattern) for pattern in patterns)
@@ -0,0 +1,61 @@
+# Filename: photo_sorter_core/ui_events.py
+# Hand-off point between worker threads and the UI. Workers post log lines
+# and progress here; the UI drains them in batches at a fixed frame rate,
+# so a fast run costs a handful of redraws per second instead of one per file.
+import threading
+from collections import deque, namedtuple
+
+# How often the front ends flush queued events (about 15 Hz)
+UI_FLUSH_INTERVAL_MS = 66
+
+# How many log lines stay visible; older lines scroll out of the buffer
+MAX_LOG_LINES = 1000
+
+# messages: new log lines in order (only the newest max_lines are kept)
+# replaced: {line number: latest text} for status lines updated in place
+# progress/has_progress: latest progress value, if any was posted
+UiBatch = namedtuple('UiBatch', ['messages', 'replaced', 'progress', 'has_progress'])
+
+class UiEventQueue:
+    """Thread-safe queue that coalesces log and progress updates for the UI."""
+
+    def __init__(self, max_lines=MAX_LOG_LINES):
+        self._lock = threading.Lock()
+        self._messages = deque(maxlen=max_lines)
+        self._replaced = {}
+        self._progress = None
+        self._has_progress = False
+        # Visible log history, owned by the UI thread
+        self.lines = deque(maxlen=max_lines)
+
+    def log(self, message, replace_line=None):
+        with self._lock:
+            if replace_line is not None:
+                self._replaced[replace_line] = message
+            else:
+                self._messages.append(message)
+
+    def set_progress(self, value):
+        # Only the latest value matters, so older ones are simply overwritten
+        with self._lock:
+            self._progress = value
+            self._has_progress = True
+
+    def drain(self):
+        """Take everything posted since the last drain, or None if nothing was."""
+        with self._lock:
+            if not (self._messages or self._replaced or self._has_progress):
+                return None
+            batch = UiBatch(list(self._messages), self._replaced, self._progress, self._has_progress)
+            self._messages.clear()
+            self._replaced = {}
+            self._has_progress = False
+        self.lines.extend(batch.messages)
+        return batch
+
+    def clear(self):
+        with self._lock:
+            self._messages.clear()
+            self._replaced = {}
+            self._has_progress = False
+        self.lines.clear()
@@ -1,20 +1,62 @@
 # Filename: photo_sorter_ui.py
 import os
-import shutil
+import time
 from datetime import datetime
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 import threading
-import time
-from PIL import Image
-from PIL.ExifTags import TAGS
-from hachoir.parser import createParser
-from hachoir.metadata import extractMetadata
+from functools import partial
+from photo_sorter_core import (
+    ACTION_SKIP, DUPLICATES_HARDLINK, DUPLICATES_KEEP, DUPLICATES_QUARANTINE, DUPLICATES_SKIP, EVENT_DEDUP, EVENT_DUPLICATES, EVENT_INDEXED, EVENT_INDEXING,
+    EVENT_SCAN, EVENT_SCANNED, UI_FLUSH_INTERVAL_MS, MoveJournal, ProgressTracker, RunController, RunStats, SortRun, UiEventQueue,
+    find_resumable_journal, format_progress, instrument, load_plan, read_journal, remaining_entries, undo_last_run,
+)
+
+# Controls the current run (pause/resume/cancel); replaced on every start
+controller = RunController()
+
+# Files done, totals, throughput and ETA of the current run; replaced on every start
+run_progress = ProgressTracker()
+
+# Log lines and progress posted by the worker, drawn by the UI thread in batches
+ui_events = UiEventQueue()
+
+# Set by the worker when the current run returns; flush_ui then ends the run on the Tk thread
+run_finished = None
+
+# Instrumentation for the current run when Live Stats is ticked, else None
+run_stats = None
+STATS_REFRESH_MS = 500
+
+# Log lines above this one are status lines updated in place; the rest scroll
+FIRST_SCROLLING_LOG_LINE = 3
+
+# Metadata extraction pool settings (None picks a default from the CPU count)
+METADATA_WORKERS = None
+USE_PROCESS_POOL = False
+
+# How metadata is read: 'file', 'mmap', 'buffered' (large bounded reads, for
+# network shares) or None to pick per path
+METADATA_IO_BACKEND = None
+
+# Remember resolved dates between runs so unchanged files aren't re-parsed
+USE_METADATA_CACHE = True
+
+# Optional throttling for shared disks (None for no limit)
+MAX_FILES_PER_SECOND = None
+MAX_MB_PER_SECOND = None
 
-# Global control flags
-is_paused = False
-is_cancelled = False
-is_quick_mode = False
+# Keep an index of each destination folder so files already sorted into it
+# are skipped without walking the whole library again
+USE_LIBRARY_INDEX = True
+
+# Worker threads used to hash possible duplicates
+DEDUP_WORKERS = 8
+
+# Subfolder scanning: depth limit (None for unlimited) and glob filters
+SCAN_MAX_DEPTH = None
+SCAN_INCLUDE = None
+SCAN_EXCLUDE = None
 
 # Predefined folder name formats for the dropdown
 FOLDER_NAME_FORMATS = {
@@ -23,6 +65,14 @@ FOLDER_NAME_FORMATS = {
     "YYYY-MM-DD": "%Y-%m-%d",
 }
 
+# What to do with files identical to another file in the same run
+DUPLICATE_POLICIES = {
+    "Skip": DUPLICATES_SKIP,
+    "Hard link": DUPLICATES_HARDLINK,
+    "Quarantine": DUPLICATES_QUARANTINE,
+    "Move anyway": DUPLICATES_KEEP,
+}
+
 # Define accepted image and video file extensions
 image_video_extensions = {
     '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.heif', '.heic',
@@ -33,123 +83,208 @@ image_video_extensions = {
     '.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.mpeg', '.mpg', '.webm'
 }
 
-def get_exif_date_taken(file_path):
+def sort_files_by_date(source_folder, destination_folder, folder_name_format, progress, log_callback, controller, recursive=False, plan_path=None, duplicate_policy=DUPLICATES_SKIP):
+    # Dates are read ahead by the worker pool and streamed into the plan; the
+    # plan is either applied as it's built or saved for later.
+    run = SortRun(source_folder, destination_folder, folder_name_format, image_video_extensions, recursive=recursive,
+                  max_depth=SCAN_MAX_DEPTH, include=SCAN_INCLUDE, exclude=SCAN_EXCLUDE,
+                  duplicate_policy=duplicate_policy, dedup_workers=DEDUP_WORKERS, workers=METADATA_WORKERS,
+                  use_processes=USE_PROCESS_POOL, io_backend=METADATA_IO_BACKEND, use_cache=USE_METADATA_CACHE,
+                  use_library=USE_LIBRARY_INDEX, plan_path=plan_path, controller=controller, progress=progress,
+                  notify=partial(log_run_event, log_callback))
+    show_run(run, log_callback)
+
+def log_run_event(log_callback, event, value=None):
+    if event == EVENT_SCAN:
+        # Without dedup, sorting starts with the first file found while the scan carries on ahead of it
+        log_callback("Scanning for files..." if value else "Scanning while sorting...", replace_line=2)
+    elif event == EVENT_SCANNED:
+        log_callback(f"Total number of files: {value}", replace_line=2)
+    elif event == EVENT_DEDUP:
+        log_callback("Checking for duplicate files...")
+    elif event == EVENT_DUPLICATES:
+        log_callback(f"Found {value} duplicate files.")
+    elif event == EVENT_INDEXING:
+        # First run into this destination: index what's already there, once
+        log_callback("Indexing files already in the destination folder...")
+    elif event == EVENT_INDEXED:
+        if isinstance(value, OSError):
+            log_callback(f"Could not index the destination folder: {value}")
+        else:
+            log_callback(f"Indexed {value} files already in the destination folder.")
+
+def show_run(run, log_callback):
     try:
-        image = Image.open(file_path)
-        exif_data = image._getexif()
-        if not exif_data:
-            return None
-        for tag_id, value in exif_data.items():
-            tag = TAGS.get(tag_id, tag_id)
-            if tag == 'DateTimeOriginal':
-                return datetime.strptime(value, "%Y:%m:%d %H:%M:%S")
-    except Exception:
-        return None
-
-def get_video_creation_date(file_path):
-    try:
-        parser = createParser(file_path)
-        if not parser:
-            return None
-        with parser:
-            metadata = extractMetadata(parser)
-        if metadata and metadata.has("creation_date"):
-            return metadata.get("creation_date").value
-    except Exception:
-        return None
-
-def sort_files_by_date(source_folder, destination_folder, folder_name_format, progress_callback, log_callback, isQuick=False):
-    global is_paused, is_cancelled
-
-    log_callback("Counting total number of files...", replace_line=2)
-    total_files = 0
+        for entry, method, error in run.results():
+            if run.plan_path:
+                continue
+            filename = os.path.basename(entry.source)
+            if error:
+                log_callback(f'Error processing {filename}: {error}')
+            elif entry.action == ACTION_SKIP:
+                if entry.duplicate_of == entry.source:
+                    log_callback(f'Already sorted: {filename}')
+                else:
+                    log_callback(f'Skipped: {filename} (same as {entry.duplicate_of})')
+            else:
+                log_callback(f'Moved: {filename} to {os.path.dirname(entry.target)}')
+    except OSError as e:
+        log_callback(f"Error accessing source folder: {e}")
+        return
 
-    if isQuick:
-        try:
-            total_files = len(os.listdir(source_folder))
-        except Exception as e:
-            log_callback(f"Error accessing source folder: {e}")
-            return
-        log_callback(f"Total number of files: {total_files}", replace_line=2)
-    else:
-        for filename in os.listdir(source_folder):
-            if is_cancelled:
-                log_callback("Process cancelled by the user.")
-                start_button.config(state=tk.NORMAL)
-                return
-            file_path = os.path.join(source_folder, filename)
-            if os.path.isfile(file_path) and (os.path.splitext(filename)[1].lower() in image_video_extensions):
-                total_files += 1
-                log_callback(f"Counting files... Total so far: {total_files}", replace_line=2)
-        log_callback(f"Total number of files: {total_files}", replace_line=2)
-
-    processed_files = 0
-
-    for filename in os.listdir(source_folder):
-        if is_cancelled:
+    if run.cancelled:
+        if run.plan_path:
+            log_callback("Process cancelled by the user. The saved plan is incomplete.")
+        else:
             log_callback("Process cancelled by the user.")
-            start_button.config(state=tk.NORMAL)
-            return
-
-        file_path = os.path.join(source_folder, filename)
-        ext = os.path.splitext(filename)[1].lower()
-
-        if os.path.isdir(file_path) or (ext not in image_video_extensions):
-            continue
+        return
 
-        try:
-            # Try EXIF (for images)
-            date_taken = get_exif_date_taken(file_path) if ext in ['.jpg', '.jpeg', '.tiff'] else None
+    if run.plan_path:
+        log_callback(f"Saved a plan for {run.saved} files to {run.plan_path}")
+        return
+    log_callback(f"Total number of files: {run.progress.done}", replace_line=2)
+    log_callback(f"Moves: {run.mover.summary()}")
+    log_callback("Sorting complete!")
 
-            # Try video metadata if not image
-            if not date_taken and ext in ['.mp4', '.mov', '.avi', '.mkv', '.webm', '.flv']:
-                date_taken = get_video_creation_date(file_path)
+def apply_saved_plan(plan_path, progress, log_callback, controller):
+    try:
+        header, plan = load_plan(plan_path)
+    except (OSError, ValueError) as e:
+        log_callback(f"Error reading plan: {e}")
+        return
 
-            # Fallback to file modification date
-            if not date_taken:
-                modification_time = os.path.getmtime(file_path)
-                date_taken = datetime.fromtimestamp(modification_time)
+    log_callback(f"Applying plan for {len(plan)} files into {header['destination']}", replace_line=2)
+    show_run(SortRun.for_plan(plan, header['destination'], header['folder_format'], use_library=USE_LIBRARY_INDEX,
+                              controller=controller, progress=progress, notify=partial(log_run_event, log_callback)),
+             log_callback)
 
-            folder_name = date_taken.strftime(folder_name_format)
-            target_folder = os.path.join(destination_folder, folder_name)
+# Pick up an interrupted or cancelled run from its journal, without re-reading any dates
+def resume_last_run(destination_folder, progress, log_callback, controller):
+    try:
+        journal_path = find_resumable_journal(destination_folder)
+        if not journal_path:
+            log_callback("There is no interrupted run to resume in this destination folder.")
+            return
+        plan = remaining_entries(read_journal(journal_path))
+    except (OSError, ValueError) as e:
+        log_callback(f"Error reading journal: {e}")
+        return
 
-            if not os.path.exists(target_folder):
-                os.makedirs(target_folder)
+    log_callback(f"Resuming run: {len(plan)} files left to move", replace_line=2)
+    show_run(SortRun.for_plan(plan, destination_folder, journal=MoveJournal(journal_path), use_library=USE_LIBRARY_INDEX,
+                              controller=controller, progress=progress, notify=partial(log_run_event, log_callback)),
+             log_callback)
+    log_callback("Files the interrupted run never reached are still in the source folder; start a new sort to move them (their dates are cached).")
 
-            shutil.move(file_path, os.path.join(target_folder, filename))
-            log_callback(f'Moved: {filename} to {target_folder}')
+def undo_last_sort(destination_folder, progress, log_callback):
+    restored = failed = 0
+    try:
+        for source, target, error in undo_last_run(destination_folder):
+            if error:
+                failed += 1
+                log_callback(f"Could not move back {os.path.basename(target)}: {error}")
+            else:
+                restored += 1
+                log_callback(f"Moved back: {os.path.basename(source)} to {os.path.dirname(source)}")
+            progress.advance()
+    except (OSError, ValueError) as e:
+        log_callback(f"Error reading journal: {e}")
+    progress.finish()
+    log_callback(f"Undo complete: {restored} files moved back, {failed} failed.")
+
+# Safe to call from any thread: updates are queued and drawn by flush_ui
+def log_message(message, replace_line=None):
+    ui_events.log(message, replace_line)
+
+def show_progress(progress):
+    # None means the total isn't known yet, so show activity instead
+    if progress is None:
+        if str(progress_bar.cget("mode")) != "indeterminate":
+            progress_bar.config(mode="indeterminate")
+            progress_bar.start()
+        return
+    if str(progress_bar.cget("mode")) == "indeterminate":
+        progress_bar.stop()
+        progress_bar.config(mode="determinate")
+    progress_var.set(progress)
 
-            if is_cancelled:
-                log_callback("Cancelling process...")
-                log_callback("Process cancelled by the user.")
-                start_button.config(state=tk.NORMAL)
-                return
+def last_log_line():
+    return int(log_text.index("end-1c").split(".")[0])
+
+def show_log_batch(batch):
+    for line, message in sorted(batch.replaced.items()):
+        if last_log_line() < line:
+            log_text.insert(tk.END, "\n" * (line - last_log_line()))
+        log_text.delete(f"{line}.0", f"{line}.end")
+        log_text.insert(f"{line}.0", message)
+
+    if batch.messages:
+        if log_text.index("end-1c").split(".")[1] != "0":
+            log_text.insert(tk.END, "\n")
+        log_text.insert(tk.END, "\n".join(batch.messages) + "\n")
+
+        # Keep the visible log bounded by dropping the oldest scrolling lines
+        excess = last_log_line() - FIRST_SCROLLING_LOG_LINE - ui_events.lines.maxlen
+        if excess > 0:
+            log_text.delete(f"{FIRST_SCROLLING_LOG_LINE}.0", f"{FIRST_SCROLLING_LOG_LINE + excess}.0")
+        log_text.see(tk.END)
 
-        except Exception as e:
-            log_callback(f'Error processing {filename}: {e}')
+# Runs on the Tk event loop at a fixed rate, applying everything queued since the last frame
+def flush_ui():
+    stats = instrument.recorder
+    started = time.perf_counter()
+    batch = ui_events.drain()
+    if batch:
+        show_log_batch(batch)
+    show_run_progress(run_progress.snapshot())
+    if run_finished is not None and run_finished.is_set():
+        end_run()
+    if batch and stats is not None:
+        stats.timed('ui.flush', time.perf_counter() - started)
+    app.after(UI_FLUSH_INTERVAL_MS, flush_ui)
+
+def show_run_progress(snapshot):
+    show_progress(None if snapshot.fraction is None else snapshot.fraction * 100)
+    text = format_progress(snapshot) if snapshot.done or snapshot.total else ""
+    if progress_label.cget("text") != text:
+        progress_label.config(text=text)
+
+def refresh_stats_panel():
+    if run_stats is not None:
+        stats_label.config(text="\n".join(run_stats.summary_lines()))
+    app.after(STATS_REFRESH_MS, refresh_stats_panel)
+
+# Runs target on a worker thread; the run's stats and rates stop when it returns
+def run_in_background(target, *args):
+    global run_finished
+    stats = run_stats
+    progress = run_progress
+    finished = run_finished = threading.Event()
+
+    def worker():
+        try:
+            target(*args)
+        finally:
+            progress.stop()
+            if stats is not None:
+                stats.stop()
+            # Widgets are only touched on the Tk thread, so just flag the end for flush_ui
+            finished.set()
 
-        processed_files += 1
-        progress_percentage = (processed_files / total_files) * 100
-        progress_callback(progress_percentage)
+    threading.Thread(target=worker, daemon=True).start()
 
-        while is_paused:
-            time.sleep(0.1)
+def end_run():
+    global run_finished
+    run_finished = None
+    set_run_controls(tk.NORMAL)
 
-        time.sleep(0.1)
+# Buttons that start a run or touch the destination; only one run may be active at a time
+def set_run_controls(state):
+    for button in (start_button, new_sort_button, save_plan_button, apply_plan_button, resume_button, undo_button):
+        button.config(state=state)
 
-    log_callback("Sorting complete!")
-    start_button.config(state=tk.NORMAL)
-
-def update_progress(progress):
-    progress_var.set(progress)
-
-def log_message(message, replace_line=None):
-    if replace_line is not None:
-        log_text.delete(f"{replace_line}.0", f"{replace_line}.end")
-        log_text.insert(f"{replace_line}.0", f"{message}\n")
-    else:
-        log_text.insert(tk.END, f"{message}\n")
-        log_text.see(tk.END)
+def run_active():
+    return run_finished is not None
 
 def browse_directory(entry_widget):
     folder_selected = filedialog.askdirectory()
@@ -163,95 +298,194 @@ def update_example_label(*args):
     example_folder_name = current_date.strftime(folder_format)
     example_label.config(text=f"Example: {example_folder_name}")
 
-def start_sorting():
-    global is_paused, is_cancelled
-    is_paused = False
-    is_cancelled = False
-
+def read_folders():
     source_folder = source_entry.get()
     destination_folder = destination_entry.get()
-    folder_name_format = FOLDER_NAME_FORMATS[folder_format_var.get()]
-    is_quick_mode = quick_mode_var.get()
 
     if not os.path.isdir(source_folder):
         messagebox.showerror("Error", "Invalid source folder.")
+        return None
+    if not os.path.isdir(destination_folder):
+        messagebox.showerror("Error", "Invalid destination folder.")
+        return None
+    return source_folder, destination_folder
+
+def begin_run():
+    global controller, run_progress, run_stats
+
+    set_run_controls(tk.DISABLED)
+    pause_button.config(text="Pause")
+    ui_events.clear()
+    run_progress = ProgressTracker()
+    log_text.delete(1.0, tk.END)
+
+    bytes_per_second = MAX_MB_PER_SECOND * 1024 * 1024 if MAX_MB_PER_SECOND else None
+    controller = RunController(MAX_FILES_PER_SECOND, bytes_per_second)
+
+    if run_stats is not None:
+        run_stats.stop()
+    run_stats = RunStats().start() if stats_var.get() else None
+    stats_label.config(text="")
+    return controller
+
+def start_sorting(plan_path=None):
+    if run_active():
+        return
+    folders = read_folders()
+    if not folders:
+        return
+    source_folder, destination_folder = folders
+    folder_name_format = FOLDER_NAME_FORMATS[folder_format_var.get()]
+    include_subfolders = subfolders_var.get()
+    duplicate_policy = DUPLICATE_POLICIES[duplicates_var.get()]
+
+    run_controller = begin_run()
+    run_in_background(sort_files_by_date, source_folder, destination_folder, folder_name_format, run_progress, log_message, run_controller, include_subfolders, plan_path, duplicate_policy)
+
+# Plan only: read every date and save where each file would go, moving nothing
+def save_sort_plan():
+    if run_active() or not read_folders():
+        return
+    plan_path = filedialog.asksaveasfilename(title="Save Sort Plan", defaultextension=".jsonl",
+                                             filetypes=[("Sort plans", "*.jsonl"), ("All files", "*.*")])
+    if plan_path:
+        start_sorting(plan_path)
+
+def resume_sorting():
+    if run_active():
         return
+    destination_folder = destination_entry.get()
     if not os.path.isdir(destination_folder):
         messagebox.showerror("Error", "Invalid destination folder.")
         return
 
-    start_button.config(state=tk.DISABLED)
-    progress_var.set(0)
-    log_text.delete(1.0, tk.END)
+    run_controller = begin_run()
+    run_in_background(resume_last_run, destination_folder, run_progress, log_message, run_controller)
+
+def undo_sorting():
+    if run_active():
+        return
+    destination_folder = destination_entry.get()
+    if not os.path.isdir(destination_folder):
+        messagebox.showerror("Error", "Invalid destination folder.")
+        return
+    if not messagebox.askyesno("Confirm Undo", "Move every file from the last run back to where it came from?"):
+        return
+
+    begin_run()
+    run_in_background(undo_last_sort, destination_folder, run_progress, log_message)
+
+def apply_sort_plan():
+    if run_active():
+        return
+    plan_path = filedialog.askopenfilename(title="Apply Sort Plan",
+                                           filetypes=[("Sort plans", "*.jsonl"), ("All files", "*.*")])
+    if not plan_path:
+        return
 
-    threading.Thread(target=sort_files_by_date, args=(source_folder, destination_folder, folder_name_format, update_progress, log_message, is_quick_mode), daemon=True).start()
+    run_controller = begin_run()
+    run_in_background(apply_saved_plan, plan_path, run_progress, log_message, run_controller)
 
 def toggle_pause():
-    global is_paused
-    is_paused = not is_paused
+    is_paused = controller.toggle_pause()
     pause_button.config(text="Resume" if is_paused else "Pause")
     log_message("Process paused." if is_paused else "Process resumed.")
 
 def cancel_sorting():
-    global is_cancelled
     if messagebox.askyesno("Confirm Cancel", "Are you sure you want to cancel the sorting process?"):
-        is_cancelled = True
+        controller.cancel()
         log_message("Cancelling process...")
 
 def reset_for_new_sort():
-    global is_quick_mode
-    is_quick_mode = False
+    global run_progress
+    if run_active():
+        return
     source_entry.delete(0, tk.END)
     destination_entry.delete(0, tk.END)
     folder_format_var.set("YYYY-MM")
-    progress_var.set(0)
+    duplicates_var.set("Skip")
+    ui_events.clear()
+    run_progress = ProgressTracker()
     log_text.delete(1.0, tk.END)
     start_button.config(state=tk.NORMAL)
 
-app = tk.Tk()
-app.title("Photo Sorter v1.3")
-app.minsize(600, 400)
+# Build the window only when run as a script, so importing this module has no side effects
+if __name__ == "__main__":
+    app = tk.Tk()
+    app.title("Photo Sorter v1.3")
+    app.minsize(600, 400)
+
+    progress_var = tk.DoubleVar()
+    progress_bar = ttk.Progressbar(app, maximum=100, variable=progress_var)
+    progress_bar.grid(row=5, column=0, columnspan=4, padx=30, pady=10, sticky="ew")
+
+    tk.Label(app, text="Source Folder:").grid(row=0, column=0, padx=30, pady=10, sticky="w")
+    source_entry = tk.Entry(app, width=50)
+    source_entry.grid(row=0, column=1, padx=10, sticky="ew")
+    tk.Button(app, text="Browse", command=lambda: browse_directory(source_entry)).grid(row=0, column=2, padx=10, pady=10)
+
+    tk.Label(app, text="Destination Folder:").grid(row=1, column=0, padx=30, pady=10, sticky="w")
+    destination_entry = tk.Entry(app, width=50)
+    destination_entry.grid(row=1, column=1, padx=10, sticky="ew")
+    tk.Button(app, text="Browse", command=lambda: browse_directory(destination_entry)).grid(row=1, column=2, padx=10, pady=10)
+
+    tk.Label(app, text="Folder Name Format:").grid(row=2, column=0, padx=30, pady=10, sticky="w")
+    folder_format_var = tk.StringVar(value="YYYY-MM")
+    folder_format_dropdown = ttk.Combobox(app, textvariable=folder_format_var, values=list(FOLDER_NAME_FORMATS.keys()), state="readonly")
+    folder_format_dropdown.grid(row=2, column=1, padx=10, sticky="ew")
+    folder_format_dropdown.bind("<<ComboboxSelected>>", update_example_label)
+
+    example_label = tk.Label(app, text="Example: YYYY-MM")
+    example_label.grid(row=2, column=2, padx=10, pady=10, sticky="w")
+
+    # Files done, throughput and ETA, under way from the first file
+    progress_label = tk.Label(app, text="", anchor="w")
+    progress_label.grid(row=4, column=0, columnspan=2, padx=30, pady=10, sticky="w")
+
+    subfolders_var = tk.BooleanVar()
+    subfolders_checkbox = tk.Checkbutton(app, text="Include Subfolders", variable=subfolders_var)
+    subfolders_checkbox.grid(row=4, column=2, columnspan=2, padx=10, pady=10)
+
+    start_button = tk.Button(app, text="Start Sorting", command=lambda: start_sorting(), width=20)
+    start_button.grid(row=3, column=0, padx=30, pady=10)
 
-progress_var = tk.DoubleVar()
-progress_bar = ttk.Progressbar(app, maximum=100, variable=progress_var)
-progress_bar.grid(row=5, column=0, columnspan=4, padx=30, pady=10, sticky="ew")
+    new_sort_button = tk.Button(app, text="New Sort", command=reset_for_new_sort, width=20)
+    new_sort_button.grid(row=3, column=1, padx=10, pady=10)
 
-tk.Label(app, text="Source Folder:").grid(row=0, column=0, padx=30, pady=10, sticky="w")
-source_entry = tk.Entry(app, width=50)
-source_entry.grid(row=0, column=1, padx=10, sticky="ew")
-tk.Button(app, text="Browse", command=lambda: browse_directory(source_entry)).grid(row=0, column=2, padx=10, pady=10)
+    pause_button = tk.Button(app, text="Pause", command=toggle_pause, width=20)
+    pause_button.grid(row=3, column=2, padx=10, pady=10)
 
-tk.Label(app, text="Destination Folder:").grid(row=1, column=0, padx=30, pady=10, sticky="w")
-destination_entry = tk.Entry(app, width=50)
-destination_entry.grid(row=1, column=1, padx=10, sticky="ew")
-tk.Button(app, text="Browse", command=lambda: browse_directory(destination_entry)).grid(row=1, column=2, padx=10, pady=10)
+    cancel_button = tk.Button(app, text="Cancel", command=cancel_sorting, width=20)
+    cancel_button.grid(row=3, column=3, padx=10, pady=10)
 
-tk.Label(app, text="Folder Name Format:").grid(row=2, column=0, padx=30, pady=10, sticky="w")
-folder_format_var = tk.StringVar(value="YYYY-MM")
-folder_format_dropdown = ttk.Combobox(app, textvariable=folder_format_var, values=list(FOLDER_NAME_FORMATS.keys()), state="readonly")
-folder_format_dropdown.grid(row=2, column=1, padx=10, sticky="ew")
-folder_format_dropdown.bind("<<ComboboxSelected>>", update_example_label)
+    log_text = tk.Text(app, width=80, height=10, state=tk.NORMAL)
+    log_text.grid(row=6, column=0, columnspan=4, padx=30, pady=10, sticky="ew")
 
-example_label = tk.Label(app, text="Example: YYYY-MM")
-example_label.grid(row=2, column=2, padx=10, pady=10, sticky="w")
+    save_plan_button = tk.Button(app, text="Save Plan...", command=save_sort_plan, width=20)
+    save_plan_button.grid(row=7, column=0, padx=30, pady=10)
 
-quick_mode_var = tk.BooleanVar()
-quick_mode_checkbox = tk.Checkbutton(app, text="Quick Mode", variable=quick_mode_var)
-quick_mode_checkbox.grid(row=4, column=0, columnspan=4, padx=30, pady=10)
+    apply_plan_button = tk.Button(app, text="Apply Plan...", command=apply_sort_plan, width=20)
+    apply_plan_button.grid(row=7, column=1, padx=10, pady=10)
 
-start_button = tk.Button(app, text="Start Sorting", command=start_sorting, width=20)
-start_button.grid(row=3, column=0, padx=30, pady=10)
+    resume_button = tk.Button(app, text="Resume Last Run", command=resume_sorting, width=20)
+    resume_button.grid(row=7, column=2, padx=10, pady=10)
 
-new_sort_button = tk.Button(app, text="New Sort", command=reset_for_new_sort, width=20)
-new_sort_button.grid(row=3, column=1, padx=10, pady=10)
+    undo_button = tk.Button(app, text="Undo Last Run", command=undo_sorting, width=20)
+    undo_button.grid(row=7, column=3, padx=10, pady=10)
 
-pause_button = tk.Button(app, text="Pause", command=toggle_pause, width=20)
-pause_button.grid(row=3, column=2, padx=10, pady=10)
+    tk.Label(app, text="Duplicates:").grid(row=8, column=0, padx=30, pady=10, sticky="w")
+    duplicates_var = tk.StringVar(value="Skip")
+    duplicates_dropdown = ttk.Combobox(app, textvariable=duplicates_var, values=list(DUPLICATE_POLICIES.keys()), state="readonly")
+    duplicates_dropdown.grid(row=8, column=1, padx=10, sticky="ew")
 
-cancel_button = tk.Button(app, text="Cancel", command=cancel_sorting, width=20)
-cancel_button.grid(row=3, column=3, padx=10, pady=10)
+    # Timing histograms, I/O counts and the slowest files of the current run
+    stats_var = tk.BooleanVar()
+    stats_checkbox = tk.Checkbutton(app, text="Live Stats", variable=stats_var)
+    stats_checkbox.grid(row=8, column=2, padx=10, pady=10)
 
-log_text = tk.Text(app, width=80, height=10, state=tk.NORMAL)
-log_text.grid(row=6, column=0, columnspan=4, padx=30, pady=10, sticky="ew")
+    stats_label = tk.Label(app, text="", font="TkFixedFont", justify=tk.LEFT, anchor="w")
+    stats_label.grid(row=9, column=0, columnspan=4, padx=30, pady=(0, 10), sticky="ew")
 
-app.mainloop()
+    app.after(UI_FLUSH_INTERVAL_MS, flush_ui)
+    app.after(STATS_REFRESH_MS, refresh_stats_panel)
+    app.mainloop()
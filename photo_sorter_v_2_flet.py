@@ -2,13 +2,15 @@
 
 import flet as ft
 import os
-import shutil
 import threading
 import time
 from datetime import datetime
-from PIL import Image
-from hachoir.parser import createParser
-from hachoir.metadata import extractMetadata
+from functools import partial
+from photo_sorter_core import (
+    ACTION_SKIP, DUPLICATES_HARDLINK, DUPLICATES_KEEP, DUPLICATES_QUARANTINE, DUPLICATES_SKIP, EVENT_DEDUP, EVENT_DUPLICATES, EVENT_INDEXED,
+    EVENT_INDEXING, EVENT_SCANNED, UI_FLUSH_INTERVAL_MS, MoveJournal, ProgressTracker, RunController, RunStats, SortRun, UiEventQueue,
+    find_resumable_journal, format_progress, instrument, is_network_path, read_journal, remaining_entries, undo_last_run,
+)
 
 # Supported file extensions
 image_video_extensions = {
@@ -28,74 +30,205 @@ FOLDER_NAME_FORMATS = {
     "YYYY-MM-DD": "%Y-%m-%d",
 }
 
-# State variables
-is_paused = False
-is_cancelled = False
+# Metadata extraction pool settings (None picks a default from the CPU count)
+METADATA_WORKERS = None
+USE_PROCESS_POOL = False
 
-def get_date_taken(file_path):
-    ext = os.path.splitext(file_path)[1].lower()
-    if ext in {".jpg", ".jpeg", ".tiff"}:
-        try:
-            image = Image.open(file_path)
-            exif_data = image._getexif()
-            if exif_data:
-                date_taken = exif_data.get(36867) or exif_data.get(306)
-                if date_taken:
-                    return datetime.strptime(date_taken, "%Y:%m:%d %H:%M:%S")
-        except Exception:
-            pass
+# How metadata is read: 'file', 'mmap', 'buffered' (large bounded reads, for
+# network shares) or None to pick per path
+METADATA_IO_BACKEND = None
 
-    try:
-        parser = createParser(file_path)
-        if parser:
-            with parser:
-                metadata = extractMetadata(parser)
-                if metadata and metadata.has("creation_date"):
-                    return metadata.get("creation_date").value
-    except Exception:
-        pass
+# Remember resolved dates between runs so unchanged files aren't re-parsed
+USE_METADATA_CACHE = True
 
-    return datetime.fromtimestamp(os.path.getmtime(file_path))
+# Optional throttling for shared disks (None for no limit)
+MAX_FILES_PER_SECOND = None
+MAX_MB_PER_SECOND = None
 
-def sort_files(source, destination, folder_format, log, progress):
-    global is_paused, is_cancelled
+# Index each destination folder so files already sorted into it are skipped
+USE_LIBRARY_INDEX = True
 
-    all_files = [f for f in os.listdir(source) if os.path.splitext(f)[1].lower() in image_video_extensions]
-    total = len(all_files)
-    count = 0
+# What to do with files identical to another file in the same run
+DUPLICATE_POLICIES = {
+    "Skip": DUPLICATES_SKIP,
+    "Hard link": DUPLICATES_HARDLINK,
+    "Quarantine": DUPLICATES_QUARANTINE,
+    "Move anyway": DUPLICATES_KEEP,
+}
+DEDUP_WORKERS = 8
+
+# Subfolder scanning: depth limit (None for unlimited) and glob filters
+SCAN_MAX_DEPTH = None
+SCAN_INCLUDE = None
+SCAN_EXCLUDE = None
+
+# Run sorts on the asyncio engine, which keeps many file operations in flight
+# (pays off on SMB/NFS shares): True, False, or None for network paths only
+ASYNC_ENGINE = None
+ASYNC_IO_CONCURRENCY = 128
+
+# Controls the current run (pause/resume/cancel); replaced on every start
+controller = RunController()
+
+# Files done, totals, throughput and ETA of the current run; replaced on every start
+run_progress = ProgressTracker()
+
+# Instrumentation for the current run when live stats are on, else None
+run_stats = None
+
+# Set when the current run returns; flush_ui then re-enables the run buttons
+run_finished = None
+STATS_REFRESH_SECONDS = 0.5
+
+def new_run(source, destination, folder_format, log, progress, controller, recursive=False,
+            duplicate_policy=DUPLICATES_SKIP):
+    return SortRun(source, destination, folder_format, image_video_extensions, recursive=recursive,
+                   max_depth=SCAN_MAX_DEPTH, include=SCAN_INCLUDE, exclude=SCAN_EXCLUDE,
+                   duplicate_policy=duplicate_policy, dedup_workers=DEDUP_WORKERS, workers=METADATA_WORKERS,
+                   use_processes=USE_PROCESS_POOL, io_backend=METADATA_IO_BACKEND, use_cache=USE_METADATA_CACHE,
+                   use_library=USE_LIBRARY_INDEX, controller=controller, progress=progress,
+                   notify=partial(log_run_event, log))
+
+def sort_files(source, destination, folder_format, log, progress, controller, recursive=False,
+               duplicate_policy=DUPLICATES_SKIP):
+    show_run(new_run(source, destination, folder_format, log, progress, controller, recursive, duplicate_policy), log)
+
+async def sort_files_async(source, destination, folder_format, log, progress, controller, recursive=False,
+                           duplicate_policy=DUPLICATES_SKIP):
+    # Plan entries stream straight into execution as their dates are read, with
+    # every blocking call on the engine's pool, never on Flet's event loop
+    run = new_run(source, destination, folder_format, log, progress, controller, recursive, duplicate_policy)
+    try:
+        async for entry, method, error in run.results_async(ASYNC_IO_CONCURRENCY):
+            log_result(entry, error, log)
+    except OSError as e:
+        log(f"❌ Error accessing source folder: {e}")
+        return
+    finish_run(run, log)
 
-    if total == 0:
+def log_run_event(log, event, value=None):
+    if event == EVENT_SCANNED and not value:
         log("⚠️ No supported files found in source folder.")
+    elif event == EVENT_DEDUP:
+        log("🔍 Checking for duplicate files...")
+    elif event == EVENT_DUPLICATES:
+        log(f"🔍 Found {value} duplicate files.")
+    elif event == EVENT_INDEXING:
+        log("🗂 Indexing files already in the destination folder...")
+    elif event == EVENT_INDEXED:
+        if isinstance(value, OSError):
+            log(f"❌ Could not index the destination folder: {value}")
+        else:
+            log(f"🗂 Indexed {value} files.")
+
+def show_run(run, log):
+    try:
+        for entry, method, error in run.results():
+            log_result(entry, error, log)
+    except OSError as e:
+        log(f"❌ Error accessing source folder: {e}")
+        return
+    finish_run(run, log)
+
+def log_result(entry, error, log):
+    filename = os.path.basename(entry.source)
+    if error:
+        log(f"❌ Error: {filename} - {error}")
+    elif entry.action == ACTION_SKIP:
+        if entry.duplicate_of == entry.source:
+            log(f"⏭ Already sorted: {filename}")
+        else:
+            log(f"⏭ Skipped: {filename} (same as {entry.duplicate_of})")
+    else:
+        log(f"✅ Moved: {filename} → {os.path.basename(os.path.dirname(entry.target))}")
+
+def finish_run(run, log):
+    if run.cancelled:
+        log("⛔ Cancelled.")
         return
 
-    for filename in all_files:
-        if is_cancelled:
-            log("⛔ Cancelled.")
-            return
+    if run.progress.done == 0 and run.files is None:
+        log("⚠️ No supported files found in source folder.")
 
-        while is_paused:
-            time.sleep(0.2)
+    log(f"📦 Moves: {run.mover.summary()}")
+    log("🎉 Sorting Complete!")
 
-        src_path = os.path.join(source, filename)
-        try:
-            date_taken = get_date_taken(src_path)
-            folder_name = date_taken.strftime(folder_format)
-            target_folder = os.path.join(destination, folder_name)
-            os.makedirs(target_folder, exist_ok=True)
+def use_async_engine(source, destination):
+    if ASYNC_ENGINE is None:
+        return is_network_path(source) or is_network_path(destination)
+    return ASYNC_ENGINE
 
-            shutil.move(src_path, os.path.join(target_folder, filename))
-            log(f"✅ Moved: {filename} → {folder_name}")
+def resume_sort(destination, log, progress, controller):
+    try:
+        journal_path = find_resumable_journal(destination)
+        if not journal_path:
+            log("⚠️ No interrupted run to resume in this destination folder.")
+            return
+        plan = remaining_entries(read_journal(journal_path))
+    except (OSError, ValueError) as e:
+        log(f"❌ Error reading journal: {e}")
+        return
 
-        except Exception as e:
-            log(f"❌ Error: {filename} - {e}")
+    log(f"⏯ Resuming: {len(plan)} files left to move")
+    show_run(SortRun.for_plan(plan, destination, journal=MoveJournal(journal_path), use_library=USE_LIBRARY_INDEX,
+                              controller=controller, progress=progress, notify=partial(log_run_event, log)), log)
+    log("ℹ️ Files the interrupted run never reached are still in the source folder; start a new sort to move them.")
 
-        count += 1
-        progress.value = (count / total)
-        progress.update()
+def undo_sort(destination, log, progress):
+    restored = failed = 0
+    try:
+        for source, target, error in undo_last_run(destination):
+            if error:
+                failed += 1
+                log(f"❌ Could not move back {os.path.basename(target)}: {error}")
+            else:
+                restored += 1
+                log(f"↩ Moved back: {os.path.basename(source)}")
+            progress.advance()
+    except (OSError, ValueError) as e:
+        log(f"❌ Error reading journal: {e}")
+    progress.finish()
+    log(f"↩ Undo complete: {restored} moved back, {failed} failed.")
+
+# Only one run may be active at a time; a second would replace the controller of the first
+def run_active():
+    return run_finished is not None
+
+# Runs target on a worker thread; the run's stats and rates stop when it returns
+def run_in_background(target, *args):
+    global run_finished
+    stats = run_stats
+    progress = run_progress
+    finished = run_finished = threading.Event()
+
+    def worker():
+        try:
+            target(*args)
+        finally:
+            progress.stop()
+            if stats is not None:
+                stats.stop()
+            finished.set()
+
+    threading.Thread(target=worker, daemon=True).start()
+
+# As run_in_background, for a coroutine function run on Flet's own event loop
+def run_on_page_loop(page, target, *args):
+    global run_finished
+    stats = run_stats
+    progress = run_progress
+    finished = run_finished = threading.Event()
+
+    async def task():
+        try:
+            await target(*args)
+        finally:
+            progress.stop()
+            if stats is not None:
+                stats.stop()
+            finished.set()
 
-    progress.value = 1.0
-    progress.update()
-    log("🎉 Sorting Complete!")
+    page.run_task(task)
 
 def main(page: ft.Page):
     page.title = "Photo Sorter v2.0"
@@ -111,6 +244,13 @@ def main(page: ft.Page):
         value="YYYY-MM"
     )
 
+    include_subfolders = ft.Checkbox(label="Include subfolders", value=False)
+    duplicates = ft.Dropdown(
+        label="Duplicates",
+        options=[ft.dropdown.Option(k) for k in DUPLICATE_POLICIES.keys()],
+        value="Skip"
+    )
+
     format_preview = ft.Text(value=f"Preview: {datetime.now().strftime(FOLDER_NAME_FORMATS[folder_format.value])}")
 
     def update_format_preview(e):
@@ -122,10 +262,56 @@ def main(page: ft.Page):
 
     log_output = ft.TextField(multiline=True, read_only=True, expand=True, min_lines=10, max_lines=20)
     progress = ft.ProgressBar(width=400, value=0)
+    # Files done, throughput and ETA, under way from the first file
+    progress_text = ft.Text(value="", size=12)
+
+    # Timing histograms, I/O counts and the slowest files of the current run
+    show_stats = ft.Checkbox(label="Live stats", value=False)
+    stats_panel = ft.Text(value="", font_family="monospace", size=12, selectable=True)
+
+    # Worker threads post here; flush_ui redraws at a fixed rate with the latest state
+    ui_events = UiEventQueue()
 
     def log(msg):
-        log_output.value += msg + "\n"
-        log_output.update()
+        ui_events.log(msg)
+
+    def flush_ui():
+        global run_finished
+        next_stats = 0
+        final_stats_shown = None
+        while True:
+            time.sleep(UI_FLUSH_INTERVAL_MS / 1000)
+            if run_finished is not None and run_finished.is_set():
+                run_finished = None
+                set_run_buttons(disabled=False)
+            stats = instrument.recorder
+            current_stats = run_stats
+            started = time.perf_counter()
+            batch = ui_events.drain()
+            # The panel refreshes twice a second while a run records, and once more when it stops
+            stats_due = (current_stats is not None and started >= next_stats
+                         and final_stats_shown is not current_stats)
+            snapshot = run_progress.snapshot()
+            progress_line = format_progress(snapshot) if snapshot.done or snapshot.total else ""
+            progress_due = progress_line != progress_text.value or snapshot.fraction != progress.value
+            if not batch and not stats_due and not progress_due:
+                continue
+            if batch and batch.messages:
+                # The visible log is a bounded ring buffer, not an ever-growing string
+                log_output.value = "\n".join(ui_events.lines) + "\n"
+            # None makes the bar show activity while the total is still unknown
+            progress.value = snapshot.fraction
+            progress_text.value = progress_line
+            if stats_due:
+                stats_panel.value = "\n".join(current_stats.summary_lines())
+                next_stats = started + STATS_REFRESH_SECONDS
+                if current_stats.stopped is not None:
+                    final_stats_shown = current_stats
+            page.update()
+            if stats is not None and batch:
+                stats.timed('ui.flush', time.perf_counter() - started)
+
+    threading.Thread(target=flush_ui, daemon=True).start()
 
     def browse_folder(ctrl: ft.TextField):
         def result(e: ft.FilePickerResultEvent):
@@ -138,49 +324,98 @@ def main(page: ft.Page):
         page.update()
         picker.get_directory_path()
 
-    def start_sorting(e):
-        global is_paused, is_cancelled
-        is_paused = False
-        is_cancelled = False
+    def set_run_buttons(disabled):
+        for button in run_buttons:
+            button.disabled = disabled
+        page.update()
+
+    def begin_run():
+        global controller, run_progress, run_stats
+        for button in run_buttons:
+            button.disabled = True
+        ui_events.clear()
         log_output.value = ""
-        progress.value = 0
+        run_progress = ProgressTracker()
+        bytes_per_second = MAX_MB_PER_SECOND * 1024 * 1024 if MAX_MB_PER_SECOND else None
+        controller = RunController(MAX_FILES_PER_SECOND, bytes_per_second)
+        if run_stats is not None:
+            run_stats.stop()
+        run_stats = RunStats().start() if show_stats.value else None
+        stats_panel.value = ""
+        pause_btn.text = "⏸ Pause"
         page.update()
 
+    def start_sorting(e):
+        if run_active():
+            return
         if not os.path.isdir(source.value) or not os.path.isdir(destination.value):
             log("⚠️ Invalid folder(s). Please check paths.")
             return
+        begin_run()
 
         fmt = FOLDER_NAME_FORMATS[folder_format.value]
-        threading.Thread(
-            target=sort_files,
-            args=(source.value, destination.value, fmt, log, progress),
-            daemon=True
-        ).start()
+        args = (source.value, destination.value, fmt, log, run_progress, controller,
+                include_subfolders.value, DUPLICATE_POLICIES[duplicates.value])
+        if use_async_engine(source.value, destination.value):
+            run_on_page_loop(page, sort_files_async, *args)
+        else:
+            run_in_background(sort_files, *args)
+
+    def resume_last_run(e):
+        if run_active():
+            return
+        if not os.path.isdir(destination.value):
+            log("⚠️ Invalid destination folder.")
+            return
+        begin_run()
+        run_in_background(resume_sort, destination.value, log, run_progress, controller)
+
+    def undo_last(e):
+        if run_active():
+            return
+        if not os.path.isdir(destination.value):
+            log("⚠️ Invalid destination folder.")
+            return
+        begin_run()
+        run_in_background(undo_sort, destination.value, log, run_progress)
 
     def pause_resume(e):
-        global is_paused
-        is_paused = not is_paused
+        is_paused = controller.toggle_pause()
         pause_btn.text = "▶ Resume" if is_paused else "⏸ Pause"
         pause_btn.update()
 
     def cancel(e):
-        global is_cancelled
-        is_cancelled = True
+        controller.cancel()
 
     pause_btn = ft.ElevatedButton("⏸ Pause", on_click=pause_resume)
+    start_btn = ft.ElevatedButton("🚀 Start Sorting", on_click=start_sorting)
+    resume_btn = ft.ElevatedButton("⏯ Resume Last Run", on_click=resume_last_run)
+    undo_btn = ft.ElevatedButton("↩ Undo Last Run", on_click=undo_last)
+    # Disabled while a run is active
+    run_buttons = (start_btn, resume_btn, undo_btn)
 
     page.add(
         ft.Row([source, ft.IconButton(icon="folder_open", on_click=lambda _: browse_folder(source))]),
         ft.Row([destination, ft.IconButton(icon="folder_open", on_click=lambda _: browse_folder(destination))]),
         folder_format,
         format_preview,
+        include_subfolders,
+        duplicates,
+        show_stats,
         ft.Row([
-            ft.ElevatedButton("🚀 Start Sorting", on_click=start_sorting),
+            start_btn,
             pause_btn,
             ft.ElevatedButton("🛑 Cancel", on_click=cancel)
         ]),
+        ft.Row([
+            resume_btn,
+            undo_btn
+        ]),
         ft.Container(progress, padding=10),
-        log_output
+        progress_text,
+        log_output,
+        stats_panel
     )
 
-ft.app(target=main)
+if __name__ == "__main__":
+    ft.app(target=main)
@@ -0,0 +1,82 @@
+# Filename: tests/support.py
+# Helpers shared by the tests: temporary source and destination folders,
+# small files with a chosen date, CLI runs with a parsed JSON summary, and
+# damaged-input checks for the metadata parsers.
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# The benchmarks' corpus builders double as test fixtures
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+import photo_sorter
+
+def write_file(path, content, mtime):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as fh:
+        fh.write(content)
+    os.utime(path, (mtime, mtime))
+
+def read_folder(folder):
+    contents = {}
+    for name in os.listdir(folder):
+        with open(os.path.join(folder, name)) as fh:
+            contents[name] = fh.read()
+    return contents
+
+def run_sort(*args):
+    """Run 'photo_sorter sort ARGS --no-cache --json', returning (exit code, summary)."""
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        code = photo_sorter.main(['sort', *args, '--no-cache', '--json'])
+    return code, json.loads(out.getvalue())
+
+class SortTestCase(unittest.TestCase):
+    """A test with empty self.source and self.destination folders, removed afterwards."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self._tmp.name, 'src')
+        self.destination = os.path.join(self._tmp.name, 'dst')
+        os.makedirs(self.source)
+        os.makedirs(self.destination)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+class BothEngines:
+    """Mixin running the test case's check_engine(engine) on the threaded and the asyncio engine."""
+
+    def test_threads(self):
+        self.check_engine('threads')
+
+    def test_asyncio(self):
+        self.check_engine('asyncio')
+
+class ParserChecks:
+    """Mixin for metadata parser tests: damaged input may only be answered
+    with a result or a ValueError, never IndexError, struct.error and the like."""
+
+    def check_damaged(self, read, data, mutations=200):
+        # Every truncation, then copies with a few bytes overwritten at random
+        rng = random.Random(len(data))
+        samples = [data[:n] for n in range(len(data))]
+        for _ in range(mutations):
+            damaged = bytearray(data)
+            for _ in range(rng.randint(1, 4)):
+                damaged[rng.randrange(len(damaged))] = rng.randrange(256)
+            samples.append(bytes(damaged))
+        for sample in samples:
+            try:
+                read(io.BytesIO(sample))
+            except ValueError:
+                pass
+            except Exception as e:
+                self.fail(f"{type(e).__name__} from {sample!r}: {e}")
@@ -0,0 +1,38 @@
+# Filename: tests/test_buckets.py
+# Folder names that FolderNamer formats once per month or day must match
+# what strftime gives for every file.
+#
+#   python -m pytest tests
+import os
+import random
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from photo_sorter import FOLDER_NAME_FORMATS
+from photo_sorter_core import FolderNamer
+
+def sample_dates(count=2000, seed=1):
+    rng = random.Random(seed)
+    start = datetime(2015, 12, 30, 23, 59)
+    # Month and year ends, and times on either side of midnight
+    return [start + timedelta(minutes=rng.randrange(4 * 366 * 1440)) for _ in range(count)]
+
+class FolderNamerTest(unittest.TestCase):
+    def test_matches_strftime_for_every_format(self):
+        dates = sample_dates()
+        for fmt in FOLDER_NAME_FORMATS.values():
+            namer = FolderNamer(fmt)
+            with self.subTest(fmt=fmt):
+                self.assertEqual([namer(d) for d in dates], [d.strftime(fmt) for d in dates])
+
+    def test_time_fields_are_formatted_per_file(self):
+        namer = FolderNamer('%Y-%m-%d %H')
+        self.assertEqual(namer(datetime(2020, 5, 1, 9)), '2020-05-01 09')
+        self.assertEqual(namer(datetime(2020, 5, 1, 17)), '2020-05-01 17')
+
+if __name__ == '__main__':
+    unittest.main()
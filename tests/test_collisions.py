@@ -0,0 +1,65 @@
+# Filename: tests/test_collisions.py
+# Files with the same name from different source folders must never land on
+# one another, with either engine.
+#
+#   python -m pytest tests
+import os
+import unittest
+from datetime import datetime
+
+from support import BothEngines, SortTestCase, read_folder, run_sort, write_file
+
+from photo_sorter_core import FileMover
+from photo_sorter_core.mover import copy_then_unlink
+
+MARCH_2024 = datetime(2024, 3, 5, 12).timestamp()
+
+class SameNameTest(BothEngines, SortTestCase):
+
+    def check_engine(self, engine):
+        write_file(os.path.join(self.source, 'a', 'IMG_0001.jpg'), 'from a', MARCH_2024)
+        write_file(os.path.join(self.source, 'b', 'IMG_0001.jpg'), 'from b', MARCH_2024)
+        # Already in the destination, and only differs by case
+        write_file(os.path.join(self.destination, '2024-03', 'img_0001.JPG'), 'sorted before', MARCH_2024)
+
+        code, summary = run_sort(self.source, self.destination, '--recursive', '--engine', engine)
+
+        self.assertEqual(code, 0)
+        self.assertEqual(summary['counts']['moved'], 2)
+        contents = read_folder(os.path.join(self.destination, '2024-03'))
+        self.assertEqual(sorted(contents.values()), ['from a', 'from b', 'sorted before'])
+        self.assertEqual(contents['img_0001.JPG'], 'sorted before')
+
+    def check_in_place(self, engine):
+        # Sorting a folder into itself, run after run, must leave sorted files alone
+        write_file(os.path.join(self.destination, 'a.jpg'), 'only copy', MARCH_2024)
+
+        for run in range(3):
+            code, summary = run_sort(self.destination, self.destination, '--recursive', '--engine', engine)
+            self.assertEqual(code, 0)
+            self.assertEqual(summary['counts']['moved'], 1 if run == 0 else 0)
+            self.assertEqual(summary['counts']['skipped'], 0 if run == 0 else 1)
+            self.assertEqual(read_folder(os.path.join(self.destination, '2024-03')), {'a.jpg': 'only copy'})
+
+    def test_in_place_threads(self):
+        self.check_in_place('threads')
+
+    def test_in_place_asyncio(self):
+        self.check_in_place('asyncio')
+
+    def test_move_refuses_existing_target(self):
+        source = os.path.join(self.source, 'IMG_0001.jpg')
+        target = os.path.join(self.destination, 'IMG_0001.jpg')
+        write_file(source, 'new', MARCH_2024)
+        write_file(target, 'old', MARCH_2024)
+
+        with self.assertRaises(FileExistsError):
+            FileMover(self.destination).move(source, target, os.stat(source))
+        with self.assertRaises(FileExistsError):
+            copy_then_unlink(source, target)
+
+        self.assertEqual(read_folder(self.destination), {'IMG_0001.jpg': 'old'})
+        self.assertEqual(read_folder(self.source), {'IMG_0001.jpg': 'new'})
+
+if __name__ == "__main__":
+    unittest.main()
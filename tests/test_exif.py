@@ -0,0 +1,64 @@
+# Filename: tests/test_exif.py
+# The EXIF fast path must find dates in either byte order and past other
+# APP1 segments, and must turn damaged files into ValueError so callers can
+# fall back to Pillow.
+#
+#   python -m pytest tests
+import io
+import struct
+import unittest
+from datetime import datetime
+
+from support import ParserChecks
+
+from corpus import jpeg_bytes, tiff_with_date
+from photo_sorter_core.exif import read_jpeg_date, read_tiff_date
+
+TAKEN = datetime(2021, 6, 7, 8, 9, 10)
+
+def big_endian_tiff(date):
+    # Same layout as corpus.tiff_with_date, in Motorola byte order
+    raw = date.strftime("%Y:%m:%d %H:%M:%S").encode() + b'\x00'
+    ifd0 = struct.pack('>H', 1) + struct.pack('>HHII', 34665, 4, 1, 26) + struct.pack('>I', 0)
+    exif_ifd = struct.pack('>H', 1) + struct.pack('>HHII', 36867, 2, len(raw), 44) + struct.pack('>I', 0)
+    return b'MM\x00*' + struct.pack('>I', 8) + ifd0 + exif_ifd + raw
+
+def jpeg_with_xmp(date):
+    # An XMP APP1 segment ahead of the Exif one, as editors write it
+    xmp = b'http://ns.adobe.com/xap/1.0/\x00<x:xmpmeta/>'
+    exif = b'Exif\x00\x00' + tiff_with_date(date)
+    return (b'\xff\xd8' + b'\xff\xe1' + struct.pack('>H', len(xmp) + 2) + xmp
+            + b'\xff\xe1' + struct.pack('>H', len(exif) + 2) + exif + b'\xff\xda\x00\x02\xff\xd9')
+
+class ExifTest(ParserChecks, unittest.TestCase):
+
+    def test_little_endian_tiff(self):
+        self.assertEqual(read_tiff_date(io.BytesIO(tiff_with_date(TAKEN))), TAKEN)
+
+    def test_big_endian_tiff(self):
+        self.assertEqual(read_tiff_date(io.BytesIO(big_endian_tiff(TAKEN))), TAKEN)
+
+    def test_jpeg_skips_other_segments(self):
+        self.assertEqual(read_jpeg_date(io.BytesIO(jpeg_bytes(TAKEN, 4096))), TAKEN)
+        self.assertEqual(read_jpeg_date(io.BytesIO(jpeg_with_xmp(TAKEN))), TAKEN)
+
+    def test_jpeg_without_exif(self):
+        self.assertIsNone(read_jpeg_date(io.BytesIO(b'\xff\xd8\xff\xda\x00\x02\xff\xd9')))
+
+    def test_damaged_tiff(self):
+        self.check_damaged(read_tiff_date, tiff_with_date(TAKEN))
+        self.check_damaged(read_tiff_date, big_endian_tiff(TAKEN))
+
+    def test_damaged_jpeg(self):
+        self.check_damaged(read_jpeg_date, jpeg_with_xmp(TAKEN))
+
+    def test_garbage(self):
+        for data in (b'', b'\x00' * 64, b'II*\x00\xff\xff\xff\xff'):
+            with self.assertRaises(ValueError):
+                read_tiff_date(io.BytesIO(data))
+        for data in (b'\xff\xd8', b'\xff\xd8\xff\xe1\x00\x01', b'\xff\xd8' + b'\x00' * 64):
+            with self.assertRaises(ValueError):
+                read_jpeg_date(io.BytesIO(data))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+# Filename: tests/test_isobmff.py
+# The MP4/MOV box walker must follow 64-bit and open-ended box sizes, read
+# both mvhd versions, and reject damaged files with ValueError.
+#
+#   python -m pytest tests
+import io
+import struct
+import unittest
+from datetime import datetime
+
+from support import ParserChecks
+
+from corpus import MAC_EPOCH, box, mp4_bytes
+from photo_sorter_core.isobmff import iter_boxes, read_mvhd_date
+
+TAKEN = datetime(2022, 2, 3, 4, 5, 6)
+
+def mvhd_v1(date):
+    created = int((date - MAC_EPOCH).total_seconds())
+    return box(b'mvhd', b'\x01\x00\x00\x00' + struct.pack('>QQIQ', created, created, 1000, 1000) + bytes(80))
+
+def large_box(box_type, payload):
+    # size == 1: the real size follows the type as a 64-bit integer
+    return struct.pack('>I4sQ', 1, box_type, len(payload) + 16) + payload
+
+class IsoBmffTest(ParserChecks, unittest.TestCase):
+
+    def test_mvhd_version_0(self):
+        self.assertEqual(read_mvhd_date(io.BytesIO(mp4_bytes(TAKEN, 4096))), TAKEN)
+
+    def test_mvhd_version_1(self):
+        data = box(b'ftyp', b'isom') + box(b'moov', mvhd_v1(TAKEN))
+        self.assertEqual(read_mvhd_date(io.BytesIO(data)), TAKEN)
+
+    def test_large_box(self):
+        data = large_box(b'mdat', bytes(100)) + box(b'moov', mvhd_v1(TAKEN))
+        boxes = list(iter_boxes(io.BytesIO(data), 0, len(data)))
+        self.assertEqual(boxes[0], (b'mdat', 16, 116))
+        self.assertEqual(boxes[1][0], b'moov')
+        self.assertEqual(read_mvhd_date(io.BytesIO(data)), TAKEN)
+
+    def test_box_to_end(self):
+        # size == 0: the last box runs to the end of the file
+        data = box(b'ftyp', b'isom') + struct.pack('>I4s', 0, b'moov') + mvhd_v1(TAKEN)
+        boxes = list(iter_boxes(io.BytesIO(data), 0, len(data)))
+        self.assertEqual(boxes[-1], (b'moov', 20, len(data)))
+        self.assertEqual(read_mvhd_date(io.BytesIO(data)), TAKEN)
+
+    def test_no_movie_header(self):
+        self.assertIsNone(read_mvhd_date(io.BytesIO(box(b'ftyp', b'isom') + box(b'mdat', bytes(16)))))
+
+    def test_damaged(self):
+        self.check_damaged(read_mvhd_date, box(b'ftyp', b'isom') + box(b'moov', mvhd_v1(TAKEN)))
+        self.check_damaged(read_mvhd_date, large_box(b'moov', box(b'mvhd', bytes(100))))
+
+    def test_garbage(self):
+        for data in (struct.pack('>I4s', 4, b'moov'), struct.pack('>I4s', 1, b'moov') + b'\x00' * 4,
+                     box(b'moov', box(b'mvhd', b'\x01'))):
+            with self.assertRaises(ValueError):
+                read_mvhd_date(io.BytesIO(data))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+# Filename: tests/test_library.py
+# Files already in the destination before the first run must count as
+# sorted, so an identical copy in the source is skipped, not moved again.
+#
+#   python -m pytest tests
+import os
+import unittest
+from datetime import datetime
+
+from support import BothEngines, SortTestCase, run_sort, write_file
+
+from photo_sorter_core import LibraryIndex
+
+JANUARY_2020 = datetime(2020, 1, 15, 12).timestamp()
+
+class ExistingLibraryTest(BothEngines, SortTestCase):
+
+    def setUp(self):
+        super().setUp()
+        write_file(os.path.join(self.destination, '2020-01', 'x.jpg'), 'already sorted', JANUARY_2020)
+        write_file(os.path.join(self.source, 'copy.jpg'), 'already sorted', JANUARY_2020)
+
+    def check_engine(self, engine):
+        code, summary = run_sort(self.source, self.destination, '--engine', engine)
+
+        self.assertEqual(code, 0)
+        self.assertEqual(summary['counts']['moved'], 0)
+        self.assertEqual(summary['counts']['skipped'], 1)
+        self.assertTrue(os.path.exists(os.path.join(self.source, 'copy.jpg')))
+        self.assertEqual(os.listdir(os.path.join(self.destination, '2020-01')), ['x.jpg'])
+        with LibraryIndex(self.destination) as library:
+            self.assertIsNotNone(library.last_refreshed)
+            self.assertEqual(len(library), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+# Filename: tests/test_raw.py
+# RAF, CR3 and HEIF readers must follow each container's pointers to the
+# EXIF block, for every iloc layout in use, and reject damaged files with
+# ValueError.
+#
+#   python -m pytest tests
+import io
+import struct
+import unittest
+from datetime import datetime
+
+from support import ParserChecks
+
+from corpus import box, jpeg_bytes, tiff_with_date
+from photo_sorter_core.exif import EXIF_DATE_TIME, EXIF_DATE_TIME_ORIGINAL
+from photo_sorter_core.raw import (CR3_METADATA_UUID, RAF_JPEG_POINTER, RAF_MAGIC, read_cr3_date,
+                                   read_heif_date, read_raf_date)
+
+TAKEN = datetime(2023, 4, 5, 6, 7, 8)
+
+EXIF_ITEM_ID = 2
+
+def flat_tiff(tag, date):
+    # A TIFF whose IFD0 holds the date tag itself, as in CR3's CMT boxes
+    raw = date.strftime("%Y:%m:%d %H:%M:%S").encode() + b'\x00'
+    return (b'II*\x00' + struct.pack('<I', 8) + struct.pack('<H', 1)
+            + struct.pack('<HHII', tag, 2, len(raw), 26) + struct.pack('<I', 0) + raw)
+
+def raf_bytes(date):
+    jpeg = jpeg_bytes(date, 4096)
+    jpeg_offset = 128
+    header = RAF_MAGIC + bytes(RAF_JPEG_POINTER - len(RAF_MAGIC)) + struct.pack('>II', jpeg_offset, len(jpeg))
+    return header + bytes(jpeg_offset - len(header)) + jpeg
+
+def cr3_bytes(cmt1=None, cmt2=None):
+    blocks = b''
+    if cmt1:
+        blocks += box(b'CMT1', cmt1)
+    if cmt2:
+        blocks += box(b'CMT2', cmt2)
+    moov = box(b'moov', box(b'mvhd', bytes(100)) + box(b'uuid', CR3_METADATA_UUID + blocks))
+    return box(b'ftyp', b'crx \x00\x00\x00\x01crx isom') + moov + box(b'mdat', bytes(64))
+
+def full_box(box_type, version, payload):
+    return box(box_type, struct.pack('>B3x', version) + payload)
+
+def heif_bytes(date, iloc_version):
+    exif_item = struct.pack('>I', 0) + tiff_with_date(date)
+    ftyp = box(b'ftyp', b'heic\x00\x00\x00\x00mif1heic')
+
+    def meta(exif_offset):
+        iinf = full_box(b'iinf', 0, struct.pack('>H', 2)
+                        + full_box(b'infe', 2, struct.pack('>HH', 1, 0) + b'hvc1\x00')
+                        + full_box(b'infe', 2, struct.pack('>HH', EXIF_ITEM_ID, 0) + b'Exif\x00'))
+        id_format = '>H' if iloc_version < 2 else '>I'
+        items = b''
+        for item_id, offset, length in ((1, 0, 0), (EXIF_ITEM_ID, exif_offset, len(exif_item))):
+            # item id, construction method, data reference index, one extent
+            items += (struct.pack(id_format, item_id) + struct.pack('>HHH', 0, 0, 1)
+                      + struct.pack('>II', offset, length))
+        iloc = full_box(b'iloc', iloc_version, bytes([0x44, 0x00]) + struct.pack(id_format, 2) + items)
+        return full_box(b'meta', 0, full_box(b'hdlr', 0, bytes(20)) + iinf + iloc)
+
+    # The iloc offset is absolute, so size the meta box first
+    exif_offset = len(ftyp) + len(meta(0)) + 8
+    return ftyp + meta(exif_offset) + box(b'mdat', exif_item)
+
+class RawTest(ParserChecks, unittest.TestCase):
+
+    def test_raf(self):
+        self.assertEqual(read_raf_date(io.BytesIO(raf_bytes(TAKEN))), TAKEN)
+
+    def test_cr3(self):
+        self.assertEqual(read_cr3_date(io.BytesIO(cr3_bytes(cmt2=flat_tiff(EXIF_DATE_TIME_ORIGINAL, TAKEN)))),
+                         TAKEN)
+        # Without CMT2 the IFD0 date in CMT1 is used
+        self.assertEqual(read_cr3_date(io.BytesIO(cr3_bytes(cmt1=flat_tiff(EXIF_DATE_TIME, TAKEN)))), TAKEN)
+
+    def test_heif(self):
+        for version in (1, 2):
+            with self.subTest(iloc_version=version):
+                self.assertEqual(read_heif_date(io.BytesIO(heif_bytes(TAKEN, version))), TAKEN)
+
+    def test_damaged(self):
+        self.check_damaged(read_raf_date, raf_bytes(TAKEN)[:1024], mutations=100)
+        self.check_damaged(read_cr3_date, cr3_bytes(cmt2=flat_tiff(EXIF_DATE_TIME_ORIGINAL, TAKEN)))
+        for version in (1, 2):
+            self.check_damaged(read_heif_date, heif_bytes(TAKEN, version))
+
+    def test_garbage(self):
+        with self.assertRaises(ValueError):
+            read_raf_date(io.BytesIO(b'FUJIFILM'))
+        with self.assertRaises(ValueError):
+            read_raf_date(io.BytesIO(RAF_MAGIC + bytes(RAF_JPEG_POINTER - len(RAF_MAGIC)) + b'\x00\x00\x01\x00'))
+        # Empty item info and location boxes
+        empty = box(b'ftyp', b'heic') + full_box(b'meta', 0, box(b'iinf', b'') + box(b'iloc', b''))
+        with self.assertRaises(ValueError):
+            read_heif_date(io.BytesIO(empty))
+
+if __name__ == "__main__":
+    unittest.main()